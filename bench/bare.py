@@ -0,0 +1,231 @@
+"""The benchmark scenarios, implemented using the bare frameworks.
+
+These are the baselines for measuring the overhead of _uapi_. They do the same
+work as the _uapi_ endpoints, except for validating the request bodies.
+"""
+from typing import Any
+
+from orjson import dumps, loads
+
+JSON = "application/json"
+
+
+def _model(payload: dict[str, Any]) -> bytes:
+    return dumps({"a": int(payload["a"]), "b": str(payload["b"]), "c": payload["c"]})
+
+
+def make_aiohttp_app() -> Any:
+    from aiohttp.web import Application, Request, Response, RouteTableDef
+
+    routes = RouteTableDef()
+
+    @routes.get("/")
+    async def hello(request: Request) -> Response:
+        return Response(text="Hello, world")
+
+    @routes.get("/path/{path_id}")
+    async def path_param(request: Request) -> Response:
+        return Response(text=str(int(request.match_info["path_id"]) + 1))
+
+    @routes.get("/query")
+    async def query(request: Request) -> Response:
+        return Response(text=str(int(request.query["page"]) + 1))
+
+    @routes.get("/header")
+    async def header(request: Request) -> Response:
+        return Response(text=request.headers["test-header"])
+
+    @routes.get("/cookie")
+    async def cookie(request: Request) -> Response:
+        return Response(text=request.cookies["a_cookie"])
+
+    @routes.post("/model")
+    async def req_body(request: Request) -> Response:
+        return Response(body=_model(loads(await request.read())), content_type=JSON)
+
+    @routes.post("/form")
+    async def form(request: Request) -> Response:
+        return Response(text=str((await request.post())["b"]))
+
+    @routes.get("/union")
+    async def union(request: Request) -> Response:
+        if request.query.get("found") == "1":
+            return Response(body=dumps({"a": 1, "b": "b", "c": []}), content_type=JSON)
+        return Response(status=404)
+
+    app = Application()
+    app.add_routes(routes)
+    return app
+
+
+def make_flask_app() -> Any:
+    from flask import Flask, Response, request
+
+    app = Flask(__name__)
+
+    @app.get("/")
+    def hello() -> Response:
+        return Response("Hello, world")
+
+    @app.get("/path/<int:path_id>")
+    def path_param(path_id: int) -> Response:
+        return Response(str(path_id + 1))
+
+    @app.get("/query")
+    def query() -> Response:
+        return Response(str(int(request.args["page"]) + 1))
+
+    @app.get("/header")
+    def header() -> Response:
+        return Response(request.headers["test-header"])
+
+    @app.get("/cookie")
+    def cookie() -> Response:
+        return Response(request.cookies["a_cookie"])
+
+    @app.post("/model")
+    def req_body() -> Response:
+        return Response(_model(loads(request.get_data())), content_type=JSON)
+
+    @app.post("/form")
+    def form() -> Response:
+        return Response(request.form["b"])
+
+    @app.get("/union")
+    def union() -> Response:
+        if request.args.get("found") == "1":
+            return Response(dumps({"a": 1, "b": "b", "c": []}), content_type=JSON)
+        return Response(status=404)
+
+    return app
+
+
+def make_quart_app() -> Any:
+    from quart import Quart, Response, request
+
+    app = Quart(__name__)
+
+    @app.get("/")
+    async def hello() -> Response:
+        return Response("Hello, world")
+
+    @app.get("/path/<int:path_id>")
+    async def path_param(path_id: int) -> Response:
+        return Response(str(path_id + 1))
+
+    @app.get("/query")
+    async def query() -> Response:
+        return Response(str(int(request.args["page"]) + 1))
+
+    @app.get("/header")
+    async def header() -> Response:
+        return Response(request.headers["test-header"])
+
+    @app.get("/cookie")
+    async def cookie() -> Response:
+        return Response(request.cookies["a_cookie"])
+
+    @app.post("/model")
+    async def req_body() -> Response:
+        return Response(_model(loads(await request.get_data())), content_type=JSON)
+
+    @app.post("/form")
+    async def form() -> Response:
+        return Response((await request.form)["b"])
+
+    @app.get("/union")
+    async def union() -> Response:
+        if request.args.get("found") == "1":
+            return Response(dumps({"a": 1, "b": "b", "c": []}), content_type=JSON)
+        return Response(status=404)
+
+    return app
+
+
+def make_starlette_app() -> Any:
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import PlainTextResponse, Response
+    from starlette.routing import Route
+
+    async def hello(request: Request) -> Response:
+        return PlainTextResponse("Hello, world")
+
+    async def path_param(request: Request) -> Response:
+        return PlainTextResponse(str(request.path_params["path_id"] + 1))
+
+    async def query(request: Request) -> Response:
+        return PlainTextResponse(str(int(request.query_params["page"]) + 1))
+
+    async def header(request: Request) -> Response:
+        return PlainTextResponse(request.headers["test-header"])
+
+    async def cookie(request: Request) -> Response:
+        return PlainTextResponse(request.cookies["a_cookie"])
+
+    async def req_body(request: Request) -> Response:
+        return Response(_model(loads(await request.body())), media_type=JSON)
+
+    async def form(request: Request) -> Response:
+        async with request.form() as form:
+            return PlainTextResponse(str(form["b"]))
+
+    async def union(request: Request) -> Response:
+        if request.query_params.get("found") == "1":
+            return Response(dumps({"a": 1, "b": "b", "c": []}), media_type=JSON)
+        return Response(status_code=404)
+
+    return Starlette(
+        routes=[
+            Route("/", hello),
+            Route("/path/{path_id:int}", path_param),
+            Route("/query", query),
+            Route("/header", header),
+            Route("/cookie", cookie),
+            Route("/model", req_body, methods=["POST"]),
+            Route("/form", form, methods=["POST"]),
+            Route("/union", union),
+        ]
+    )
+
+
+def make_django_urlpatterns() -> list:
+    from django.http import HttpRequest, HttpResponse
+    from django.urls import path
+
+    def hello(request: HttpRequest) -> HttpResponse:
+        return HttpResponse("Hello, world")
+
+    def path_param(request: HttpRequest, path_id: int) -> HttpResponse:
+        return HttpResponse(str(path_id + 1))
+
+    def query(request: HttpRequest) -> HttpResponse:
+        return HttpResponse(str(int(request.GET["page"]) + 1))
+
+    def header(request: HttpRequest) -> HttpResponse:
+        return HttpResponse(request.headers["test-header"])
+
+    def cookie(request: HttpRequest) -> HttpResponse:
+        return HttpResponse(request.COOKIES["a_cookie"])
+
+    def req_body(request: HttpRequest) -> HttpResponse:
+        return HttpResponse(_model(loads(request.body)), content_type=JSON)
+
+    def form(request: HttpRequest) -> HttpResponse:
+        return HttpResponse(request.POST["b"])
+
+    def union(request: HttpRequest) -> HttpResponse:
+        if request.GET.get("found") == "1":
+            return HttpResponse(dumps({"a": 1, "b": "b", "c": []}), content_type=JSON)
+        return HttpResponse(status=404)
+
+    return [
+        path("", hello),
+        path("path/<int:path_id>", path_param),
+        path("query", query),
+        path("header", header),
+        path("cookie", cookie),
+        path("model", req_body),
+        path("form", form),
+        path("union", union),
+    ]
@@ -0,0 +1,426 @@
+"""In-process microbenchmarks of the _uapi_ backends.
+
+Requests are sent straight to the ASGI and WSGI apps (and the aiohttp request
+handler), without sockets, so the results show the overhead of the frameworks
+and _uapi_ itself. Every scenario is also run against the bare framework, to
+show the overhead of _uapi_.
+
+Run with `python bench/inprocess.py`; `--help` shows the options.
+"""
+import asyncio
+import gc
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from io import BytesIO
+from time import perf_counter_ns
+from typing import Any, Final
+
+from attrs import asdict, frozen
+
+from uapi.bench.load import percentile
+
+import bare
+from scenarios import SCENARIOS, Scenario, angle_path, configure_async, configure_sync
+
+BACKENDS: Final = ["aiohttp", "django", "flask", "quart", "starlette"]
+
+#: Django routes to these.
+urlpatterns: list = []
+
+SyncCall = Callable[[Scenario], tuple[int, bytes]]
+AsyncCall = Callable[[Scenario], Awaitable[tuple[int, bytes]]]
+
+
+@frozen
+class Result:
+    backend: str
+    scenario: str
+    #: `uapi` or `bare`.
+    variant: str
+    requests: int
+    ops_per_sec: float
+    mean_us: float
+    p50_us: float
+    p90_us: float
+    p99_us: float
+
+
+def wsgi_call(app: Any) -> SyncCall:
+    """Send requests to a WSGI app."""
+
+    def call(scenario: Scenario) -> tuple[int, bytes]:
+        environ = {
+            "REQUEST_METHOD": scenario.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": scenario.path,
+            "QUERY_STRING": scenario.query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_LENGTH": str(len(scenario.body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(scenario.body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in scenario.headers:
+            if name == "content-type":
+                environ["CONTENT_TYPE"] = value
+            else:
+                environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+        status = []
+
+        def start_response(s: str, headers: Any, exc_info: Any = None) -> Any:
+            status.append(int(s[:3]))
+
+        body = app(environ, start_response)
+        try:
+            payload = b"".join(body)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+        return status[0], payload
+
+    return call
+
+
+def asgi_call(app: Any) -> AsyncCall:
+    """Send requests to an ASGI app."""
+
+    async def call(scenario: Scenario) -> tuple[int, bytes]:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": scenario.method,
+            "scheme": "http",
+            "path": scenario.path,
+            "raw_path": scenario.path.encode(),
+            "query_string": scenario.query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"content-length", str(len(scenario.body)).encode()),
+                *((n.encode(), v.encode()) for n, v in scenario.headers),
+            ],
+            "client": ("127.0.0.1", 1234),
+            "server": ("localhost", 80),
+            "extensions": {},
+        }
+        received = False
+        status = 0
+        body = []
+
+        async def receive() -> dict[str, Any]:
+            nonlocal received
+            if received:
+                # Wait like a real server, until the response is done.
+                await asyncio.Future()
+            received = True
+            return {"type": "http.request", "body": scenario.body, "more_body": False}
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await app(scope, receive, send)
+        return status, b"".join(body)
+
+    return call
+
+
+class _AiohttpTransport:
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        return {"peername": ("127.0.0.1", 1234), "sockname": ("localhost", 80)}.get(
+            name, default
+        )
+
+    def is_closing(self) -> bool:
+        return False
+
+
+class _AiohttpProtocol:
+    """Just enough of a protocol for requests, which `make_mocked_request` mocks.
+
+    Mocks are too slow for benchmarks.
+    """
+
+    max_field_size = 8190
+    max_line_length = 8190
+    max_headers = 128
+    transport = _AiohttpTransport()
+    writer = None
+    peername = ("127.0.0.1", 1234)
+    sockname = ("localhost", 80)
+    ssl_context = None
+
+
+def aiohttp_call(app: Any) -> AsyncCall:
+    """Send requests to the request handler of an aiohttp app."""
+    from aiohttp.base_protocol import BaseProtocol
+    from aiohttp.http import HttpVersion11
+    from aiohttp.http_parser import RawRequestMessage
+    from aiohttp.streams import StreamReader
+    from aiohttp.web import Request
+    from multidict import CIMultiDict, CIMultiDictProxy
+    from yarl import URL
+
+    app.freeze()
+    protocol = _AiohttpProtocol()
+
+    async def call(scenario: Scenario) -> tuple[int, bytes]:
+        loop = asyncio.get_running_loop()
+        payload = StreamReader(BaseProtocol(loop), 2**16, loop=loop)
+        payload.feed_data(scenario.body)
+        payload.feed_eof()
+        path = f"{scenario.path}?{scenario.query}" if scenario.query else scenario.path
+        headers = [
+            ("host", "localhost"),
+            ("content-length", str(len(scenario.body))),
+            *scenario.headers,
+        ]
+        message = RawRequestMessage(
+            scenario.method,
+            path,
+            HttpVersion11,
+            CIMultiDictProxy(CIMultiDict(headers)),
+            tuple((n.encode(), v.encode()) for n, v in headers),
+            False,
+            None,
+            False,
+            False,
+            URL(path),
+        )
+        request = Request(
+            message, payload, protocol, None, asyncio.current_task(), loop  # type: ignore
+        )
+        response = await app._handle(request)
+        return response.status, response.body or b""
+
+    return call
+
+
+def make_django_call(patterns: list) -> SyncCall:
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import clear_url_caches
+
+    if not settings.configured:
+        settings.configure(ROOT_URLCONF=__name__, ALLOWED_HOSTS=["localhost"])
+        import django
+
+        django.setup()
+    urlpatterns[:] = patterns
+    clear_url_caches()
+    return wsgi_call(WSGIHandler())
+
+
+def make_calls(backend: str) -> tuple[bool, Callable[[], Any], Callable[[], Any]]:
+    """Make the calls for the _uapi_ and bare apps of a backend.
+
+    :return: Whether the calls are async, and factories for the calls. Django apps
+        share the URL configuration, so only one of them can be used at a time.
+    """
+    if backend == "aiohttp":
+        from uapi.aiohttp import App as AiohttpApp
+
+        aiohttp_app = AiohttpApp()
+        configure_async(aiohttp_app)
+        return (
+            True,
+            lambda: aiohttp_call(aiohttp_app.to_framework_app()),
+            lambda: aiohttp_call(bare.make_aiohttp_app()),
+        )
+    if backend == "django":
+        from uapi.django import App as DjangoApp
+
+        django_app = DjangoApp()
+        configure_sync(django_app, angle_path)
+        return (
+            False,
+            lambda: make_django_call(django_app.to_urlpatterns()),
+            lambda: make_django_call(bare.make_django_urlpatterns()),
+        )
+    if backend == "flask":
+        from uapi.flask import App as FlaskApp
+
+        flask_app = FlaskApp()
+        configure_sync(flask_app, angle_path)
+        return (
+            False,
+            lambda: wsgi_call(flask_app.to_framework_app(__name__)),
+            lambda: wsgi_call(bare.make_flask_app()),
+        )
+    if backend == "quart":
+        from uapi.quart import App as QuartApp
+
+        quart_app = QuartApp()
+        configure_async(quart_app, angle_path)
+        return (
+            True,
+            lambda: asgi_call(quart_app.to_framework_app(__name__)),
+            lambda: asgi_call(bare.make_quart_app()),
+        )
+    if backend == "starlette":
+        from uapi.starlette import App as StarletteApp
+
+        starlette_app = StarletteApp()
+        configure_async(starlette_app)
+        return (
+            True,
+            lambda: asgi_call(starlette_app.to_framework_app()),
+            lambda: asgi_call(bare.make_starlette_app()),
+        )
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def _check(scenario: Scenario, variant: str, status: int, body: bytes) -> None:
+    if status != scenario.status:
+        raise Exception(
+            f"{variant} {scenario.name}: expected {scenario.status}, got {status}: "
+            f"{body[:200]!r}"
+        )
+
+
+def _result(
+    backend: str, scenario: Scenario, variant: str, durations: list[int]
+) -> Result:
+    total = sum(durations)
+    durations = sorted(durations)
+    p50, p90, p99 = (percentile(durations, p) for p in (50, 90, 99))
+    return Result(
+        backend,
+        scenario.name,
+        variant,
+        len(durations),
+        len(durations) / (total / 1e9),
+        total / len(durations) / 1000,
+        p50 / 1000,
+        p90 / 1000,
+        p99 / 1000,
+    )
+
+
+def measure_sync(
+    call: SyncCall, scenario: Scenario, variant: str, requests: int, warmup: int
+) -> list[int]:
+    for _ in range(warmup):
+        _check(scenario, variant, *call(scenario))
+    durations = []
+    gc.collect()
+    for _ in range(requests):
+        start = perf_counter_ns()
+        call(scenario)
+        durations.append(perf_counter_ns() - start)
+    return durations
+
+
+async def measure_async(
+    call: AsyncCall, scenario: Scenario, variant: str, requests: int, warmup: int
+) -> list[int]:
+    for _ in range(warmup):
+        _check(scenario, variant, *(await call(scenario)))
+    durations = []
+    gc.collect()
+    for _ in range(requests):
+        start = perf_counter_ns()
+        await call(scenario)
+        durations.append(perf_counter_ns() - start)
+    return durations
+
+
+async def run_backend(
+    backend: str, scenarios: list[Scenario], requests: int, warmup: int
+) -> list[Result]:
+    is_async, make_uapi_call, make_bare_call = make_calls(backend)
+    res = []
+    for variant, make_call in (("uapi", make_uapi_call), ("bare", make_bare_call)):
+        call = make_call()
+        for scenario in scenarios:
+            if is_async:
+                durations = await measure_async(
+                    call, scenario, variant, requests, warmup
+                )
+            else:
+                durations = measure_sync(call, scenario, variant, requests, warmup)
+            res.append(_result(backend, scenario, variant, durations))
+    return res
+
+
+def render_table(results: list[Result]) -> str:
+    """Render the results as a table, with the overhead of _uapi_ over the bare
+    frameworks."""
+    bare_means = {
+        (r.backend, r.scenario): r.mean_us for r in results if r.variant == "bare"
+    }
+    lines = [
+        (
+            f"{'backend':<10} {'scenario':<10} {'variant':<7} {'ops/s':>9}"
+            f" {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'overhead':>16}"
+        )
+    ]
+    for r in results:
+        overhead = ""
+        if r.variant == "uapi" and (
+            bare_mean := bare_means.get((r.backend, r.scenario))
+        ):
+            diff = r.mean_us - bare_mean
+            overhead = f"{diff:+.1f}us {diff / bare_mean:+.0%}"
+        lines.append(
+            f"{r.backend:<10} {r.scenario:<10} {r.variant:<7} {r.ops_per_sec:>9.0f}"
+            f" {r.mean_us:>6.1f}us {r.p50_us:>6.1f}us {r.p90_us:>6.1f}us"
+            f" {r.p99_us:>6.1f}us {overhead:>16}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-b", "--backend", action="append", choices=BACKENDS, help="default: all"
+    )
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=[s.name for s in SCENARIOS],
+        help="default: all",
+    )
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-w", "--warmup", type=int, default=500)
+    parser.add_argument("--json", metavar="PATH", help="also write the results here")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    results = []
+    for backend in args.backend or BACKENDS:
+        results.extend(
+            asyncio.run(run_backend(backend, scenarios, args.requests, args.warmup))
+        )
+
+    print(render_table(results))  # noqa: T201
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": [asdict(r) for r in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
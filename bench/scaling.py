@@ -0,0 +1,246 @@
+"""Scaling benchmarks of large synthetic _uapi_ apps.
+
+Apps with an increasing number of routes are generated, every route taking and
+returning its own model. The models are nested to varying depths. For every app,
+the benchmark measures:
+
+- the time to define the models and routes
+- the time to create the framework app (or the URL patterns for Django)
+- the resident memory added per route
+- the time to generate the OpenAPI spec, and its size
+
+Every app is measured in a fresh process, so memory measurements don't interfere.
+
+Run with `python bench/scaling.py`; `--help` shows the options.
+"""
+import json
+import platform
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Final
+
+from attrs import asdict, field, frozen, make_class
+
+from uapi import ReqBody
+
+BACKENDS: Final = ["aiohttp", "django", "flask", "quart", "starlette"]
+SIZES: Final = [10, 100, 1_000, 10_000]
+
+
+@frozen
+class Result:
+    backend: str
+    routes: int
+    max_depth: int
+    define_s: float
+    framework_app_s: float
+    #: `None` if the platform doesn't provide the resident memory.
+    rss_per_route: float | None
+    openapi_s: float
+    openapi_bytes: int
+    components: int
+
+
+def rss() -> int | None:
+    """The resident memory of the process, in bytes, on Linux."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    import resource
+
+    return pages * resource.getpagesize()
+
+
+def make_model(index: int, depth: int) -> type:
+    """Make a model nested `depth` levels deep."""
+    inner: type | None = None
+    for level in reversed(range(depth)):
+        attrs: dict[str, Any] = {"an_int": int, "a_string": str, "a_list": list[int]}
+        if inner is not None:
+            attrs["inner"] = inner
+            attrs["inners"] = list[inner]  # type: ignore[valid-type]
+        inner = make_class(
+            f"Route{index}Level{level}",
+            {name: field(type=type) for name, type in attrs.items()},
+        )
+    assert inner is not None
+    return inner
+
+
+def app_class(backend: str) -> Any:
+    if backend == "aiohttp":
+        from uapi.aiohttp import App as AiohttpApp
+
+        return AiohttpApp
+    if backend == "django":
+        from uapi.django import App as DjangoApp
+
+        return DjangoApp
+    if backend == "flask":
+        from uapi.flask import App as FlaskApp
+
+        return FlaskApp
+    if backend == "quart":
+        from uapi.quart import App as QuartApp
+
+        return QuartApp
+    from uapi.starlette import App as StarletteApp
+
+    return StarletteApp
+
+
+def make_app(backend: str, routes: int, max_depth: int) -> Any:
+    app = app_class(backend)()
+    is_async = backend in ("aiohttp", "quart", "starlette")
+    for i in range(routes):
+        model = make_model(i, i % max_depth + 1)
+        if is_async:
+
+            async def handler(body: ReqBody[model], page: int = 0) -> model:  # type: ignore
+                return body
+
+        else:
+
+            def handler(body: ReqBody[model], page: int = 0) -> model:  # type: ignore
+                return body
+
+        app.post(f"/route{i}", name=f"route{i}")(handler)
+    return app
+
+
+def run_one(backend: str, routes: int, max_depth: int) -> Result:
+    from uapi.openapi import converter
+
+    # Import the backend first, so its memory isn't counted.
+    app_class(backend)
+    rss_start = rss()
+
+    start = perf_counter()
+    app = make_app(backend, routes, max_depth)
+    define_s = perf_counter() - start
+
+    start = perf_counter()
+    if backend == "django":
+        app.to_urlpatterns()
+    elif backend in ("flask", "quart"):
+        app.to_framework_app(__name__)
+    else:
+        app.to_framework_app()
+    framework_app_s = perf_counter() - start
+    rss_end = rss()
+
+    start = perf_counter()
+    spec = app.make_openapi_spec()
+    openapi_s = perf_counter() - start
+    payload = json.dumps(converter.unstructure(spec))
+
+    return Result(
+        backend,
+        routes,
+        max_depth,
+        define_s,
+        framework_app_s,
+        (
+            (rss_end - rss_start) / routes
+            if rss_start is not None and rss_end is not None
+            else None
+        ),
+        openapi_s,
+        len(payload),
+        len(spec.components.schemas),
+    )
+
+
+def render_table(results: list[Result]) -> str:
+    """Render the results as a table, with the growth factors between sizes."""
+    lines = [
+        (
+            f"{'backend':<10} {'routes':>7} {'define':>9} {'app':>9} {'rss/route':>10}"
+            f" {'openapi':>9} {'growth':>7} {'spec size':>11}"
+        )
+    ]
+    previous: Result | None = None
+    for r in results:
+        growth = ""
+        if previous is not None and previous.backend == r.backend:
+            # 1.0 is linear; higher means the OpenAPI time per route grows.
+            per_route = r.openapi_s / r.routes
+            growth = f"{per_route / (previous.openapi_s / previous.routes):.2f}x"
+        rss_per_route = (
+            f"{r.rss_per_route / 1024:.1f}KiB" if r.rss_per_route is not None else "-"
+        )
+        lines.append(
+            f"{r.backend:<10} {r.routes:>7} {r.define_s:>8.3f}s"
+            f" {r.framework_app_s:>8.3f}s {rss_per_route:>10} {r.openapi_s:>8.3f}s"
+            f" {growth:>7} {r.openapi_bytes / 1024:>8.0f}KiB"
+        )
+        previous = r
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-b", "--backend", action="append", choices=BACKENDS, help="default: all"
+    )
+    parser.add_argument(
+        "-r",
+        "--routes",
+        action="append",
+        type=int,
+        help=f"the app sizes; default: {', '.join(map(str, SIZES))}",
+    )
+    parser.add_argument(
+        "-d", "--max-depth", type=int, default=4, help="the deepest model nesting"
+    )
+    parser.add_argument("--json", metavar="PATH", help="also write the results here")
+    parser.add_argument("--one", action="store_true", help="internal")
+    args = parser.parse_args()
+
+    if args.one:
+        # Running in a subprocess; report a single result.
+        result = run_one(args.backend[0], args.routes[0], args.max_depth)
+        print(json.dumps(asdict(result)))  # noqa: T201
+        return
+
+    results = []
+    for backend in args.backend or BACKENDS:
+        for routes in args.routes or SIZES:
+            out = subprocess.run(  # noqa: S603
+                [
+                    sys.executable,
+                    __file__,
+                    "--one",
+                    "-b",
+                    backend,
+                    "-r",
+                    str(routes),
+                    "-d",
+                    str(args.max_depth),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(Result(**json.loads(out)))
+
+    print(render_table(results))  # noqa: T201
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": [asdict(r) for r in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark scenarios, shared by the benchmark scripts.
+
+Every scenario is a request exercising one feature, like path parameters or
+request bodies, and an endpoint handling it on _uapi_ apps.
+"""
+from collections.abc import Callable
+from typing import Final
+
+from attrs import define, frozen
+
+from uapi import Cookie, FormBody, Header, ReqBody
+from uapi.base import App, AsyncApp
+from uapi.status import NotFound, Ok
+
+
+@define
+class Model:
+    a: int
+    b: str
+    c: list[int]
+
+
+@define
+class FormModel:
+    a: int
+    b: str
+
+
+@frozen
+class Scenario:
+    name: str
+    method: str
+    path: str
+    #: The path of the endpoint, using curly braces for path parameters.
+    route: str
+    query: str = ""
+    headers: tuple[tuple[str, str], ...] = ()
+    body: bytes = b""
+    #: The expected response status code.
+    status: int = 200
+
+
+SCENARIOS: Final = [
+    Scenario("hello", "GET", "/", "/"),
+    Scenario("path", "GET", "/path/1", "/path/{path_id}"),
+    Scenario("query", "GET", "/query", "/query", query="page=1"),
+    Scenario("header", "GET", "/header", "/header", headers=(("test-header", "1"),)),
+    Scenario(
+        "cookie", "GET", "/cookie", "/cookie", headers=(("cookie", "a_cookie=1"),)
+    ),
+    Scenario(
+        "req_body",
+        "POST",
+        "/model",
+        "/model",
+        headers=(("content-type", "application/json"),),
+        body=b'{"a": 1, "b": "b", "c": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]}',
+    ),
+    Scenario(
+        "form",
+        "POST",
+        "/form",
+        "/form",
+        headers=(("content-type", "application/x-www-form-urlencoded"),),
+        body=b"a=1&b=b",
+    ),
+    Scenario("union", "GET", "/union", "/union", query="found=1"),
+]
+
+
+def angle_path(route: str) -> str:
+    """Convert a route to the angle bracket syntax of Flask, Quart and Django.
+
+    These frameworks need converters for integer path parameters, and all the
+    scenario path parameters are integers.
+    """
+    return route.replace("{", "<int:").replace("}", ">")
+
+
+def configure_async(app: AsyncApp, path: Callable[[str], str] = str) -> None:
+    """Add the scenario endpoints to an async app."""
+
+    @app.get(path("/"))
+    async def hello() -> str:
+        return "Hello, world"
+
+    @app.get(path("/path/{path_id}"))
+    async def path_param(path_id: int) -> str:
+        return str(path_id + 1)
+
+    @app.get(path("/query"))
+    async def query(page: int) -> str:
+        return str(page + 1)
+
+    @app.get(path("/header"))
+    async def header(test_header: Header[str]) -> str:
+        return test_header
+
+    @app.get(path("/cookie"))
+    async def cookie(a_cookie: Cookie) -> str:
+        return a_cookie
+
+    @app.post(path("/model"))
+    async def req_body(model: ReqBody[Model]) -> Model:
+        return model
+
+    @app.post(path("/form"))
+    async def form(form: FormBody[FormModel]) -> str:
+        return form.b
+
+    @app.get(path("/union"))
+    async def union(found: str = "") -> Ok[Model] | NotFound[None]:
+        return Ok(Model(1, "b", [])) if found == "1" else NotFound(None)
+
+
+def configure_sync(app: App, path: Callable[[str], str] = str) -> None:
+    """Add the scenario endpoints to a sync app."""
+
+    @app.get(path("/"))
+    def hello() -> str:
+        return "Hello, world"
+
+    @app.get(path("/path/{path_id}"))
+    def path_param(path_id: int) -> str:
+        return str(path_id + 1)
+
+    @app.get(path("/query"))
+    def query(page: int) -> str:
+        return str(page + 1)
+
+    @app.get(path("/header"))
+    def header(test_header: Header[str]) -> str:
+        return test_header
+
+    @app.get(path("/cookie"))
+    def cookie(a_cookie: Cookie) -> str:
+        return a_cookie
+
+    @app.post(path("/model"))
+    def req_body(model: ReqBody[Model]) -> Model:
+        return model
+
+    @app.post(path("/form"))
+    def form(form: FormBody[FormModel]) -> str:
+        return form.b
+
+    @app.get(path("/union"))
+    def union(found: str = "") -> Ok[Model] | NotFound[None]:
+        return Ok(Model(1, "b", [])) if found == "1" else NotFound(None)
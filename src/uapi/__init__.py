@@ -2,9 +2,10 @@ from .cookies import Cookie
 from .requests import FormBody, Header, HeaderSpec, ReqBody, ReqBytes
 from .responses import ResponseException
 from .status import Found, Headers, SeeOther
-from .types import Method, RouteName
+from .types import ClientAddress, Method, RouteName
 
 __all__ = [
+    "ClientAddress",
     "Cookie",
     "FormBody",
     "Header",
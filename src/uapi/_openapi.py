@@ -38,7 +38,7 @@ from .requests import (
 )
 from .shorthands import ResponseShorthand, can_shorthand_handle
 from .status import BaseResponse, get_status_code
-from .types import Method, PathParamParser, RouteName, RouteTags
+from .types import ClientAddress, Method, PathParamParser, RouteName, RouteTags
 
 Routes: TypeAlias = dict[
     tuple[Method, str], tuple[Callable, Callable, RouteName, RouteTags]
@@ -95,7 +95,7 @@ def build_operation(
         if arg in path_params:
             continue
         arg_type = arg_param.annotation
-        if arg_type in (RouteName, Method):
+        if arg_type in (RouteName, Method, ClientAddress):
             # These are special and fulfilled by uapi itself.
             continue
         if arg_type is not InspectParameter.empty and is_subclass(
@@ -414,7 +414,7 @@ def components_to_openapi(
     for handler, *_ in routes.values():
         gather_endpoint_components(handler, builder)
 
-    for component in builder._build_queue:
+    for component in list(builder._build_queue):
         builder.get_schema_for_type(component)
 
     return OpenAPI.Components(builder.components, security_schemes)
@@ -0,0 +1,58 @@
+"""Running Lua scripts cached by Redis, with the supported client libraries."""
+from collections.abc import Sequence
+from hashlib import sha1
+from typing import Any
+
+from attrs import Factory, field, frozen
+
+
+@frozen
+class Script:
+    """A Lua script, run by its SHA and loaded into Redis when missing.
+
+    Redis replies `NOSCRIPT` to `EVALSHA` when its script cache doesn't have the
+    script, after a restart or a `SCRIPT FLUSH`. The script is then run using
+    `EVAL`, which caches it again.
+    """
+
+    source: str
+    sha: str = field(
+        init=False,
+        default=Factory(
+            lambda self: sha1(self.source.encode(), usedforsecurity=False).hexdigest(),
+            takes_self=True,
+        ),
+    )
+
+    async def run_aioredis(
+        self, redis: Any, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        """Run using an aioredis 1.3 connection pool."""
+        from aioredis.errors import ReplyError
+
+        try:
+            return await redis.evalsha(self.sha, keys, args)
+        except ReplyError as exc:
+            if not str(exc).startswith("NOSCRIPT"):
+                raise
+            return await redis.eval(self.source, keys, args)
+
+    async def run_async(
+        self, redis: Any, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        """Run using a redis-py asyncio client."""
+        from redis.exceptions import NoScriptError
+
+        try:
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return await redis.eval(self.source, len(keys), *keys, *args)
+
+    def run_sync(self, redis: Any, keys: Sequence[str], args: Sequence[Any]) -> Any:
+        """Run using a redis-py client."""
+        from redis.exceptions import NoScriptError
+
+        try:
+            return redis.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return redis.eval(self.source, len(keys), *keys, *args)
@@ -0,0 +1,196 @@
+"""Multi-process serving: a supervisor forking and babysitting worker processes."""
+import os
+import signal
+from asyncio import Event, Task, create_task, get_running_loop, run, sleep
+from collections.abc import Callable, Coroutine
+from contextlib import suppress
+from inspect import iscoroutine
+from logging import getLogger
+from socket import (
+    AF_INET,
+    AF_INET6,
+    IPPROTO_TCP,
+    SO_REUSEADDR,
+    SOCK_STREAM,
+    SOL_SOCKET,
+    socket,
+)
+from time import monotonic
+from typing import Any, Final
+
+__all__ = ["supervise"]
+
+logger: Final = getLogger("uapi.workers")
+
+#: Workers exiting sooner than this after starting are restarted with a delay, to
+#: avoid crash loops eating the CPU.
+_MIN_WORKER_LIFETIME: Final = 1.0
+
+
+def bind_socket(host: str | None, port: int, reuse_port: bool = False) -> socket:
+    """Create a listening TCP socket."""
+    host = host or "0.0.0.0"  # noqa: S104
+    # With an explicit protocol, asyncio sets `TCP_NODELAY` on accepted sockets.
+    sock = socket(AF_INET6 if ":" in host else AF_INET, SOCK_STREAM, IPPROTO_TCP)
+    try:
+        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        if reuse_port:
+            from socket import SO_REUSEPORT
+
+            sock.setsockopt(SOL_SOCKET, SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        sock.listen(2048)
+        sock.setblocking(False)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _run_worker(
+    serve: Callable[[socket], Coroutine[Any, Any, None] | None],
+    sock: socket | None,
+    host: str | None,
+    port: int,
+) -> None:
+    """The body of a freshly forked worker. Never returns."""
+    code = 1
+    try:
+        # The supervisor event loop may have redirected signals to itself.
+        signal.set_wakeup_fd(-1)
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        if sock is None:
+            sock = bind_socket(host, port, reuse_port=True)
+        if iscoroutine(res := serve(sock)):
+            run(res)
+        code = 0
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else 0
+    except KeyboardInterrupt:
+        code = 0
+    except BaseException:
+        logger.exception("Worker %d crashed.", os.getpid())
+    finally:
+        # Skip the interpreter teardown inherited from the supervisor, like
+        # `atexit` hooks.
+        os._exit(code)
+
+
+async def supervise(
+    serve: Callable[[socket], Coroutine[Any, Any, None] | None],
+    workers: int,
+    host: str | None,
+    port: int,
+    reuse_port: bool = False,
+    handle_signals: bool = True,
+    shutdown_timeout: float = 60,
+) -> None:
+    """Fork `workers` processes, each running `serve` with a listening socket.
+
+    `serve` may be a coroutine function, run in a fresh event loop, or a
+    blocking function.
+
+    Crashed workers are restarted. On shutdown (either by cancelling the task
+    running this, or by SIGINT or SIGTERM if `handle_signals` is set) the workers
+    receive SIGTERM, and are killed if still running after `shutdown_timeout`
+    seconds.
+
+    If `handle_signals` is set, SIGHUP gracefully replaces the workers: a new set
+    of workers is started, and the old workers are shut down. The new workers are
+    forked from this process, so code changes are not picked up.
+
+    :param reuse_port: If set, every worker binds a socket of its own using
+        `SO_REUSEPORT`, letting the kernel balance connections between them.
+        Otherwise, the workers share a socket bound here.
+    """
+    if not hasattr(os, "fork"):
+        raise Exception("Multiple workers require a POSIX system.")
+    if reuse_port:
+        # Fail early if the port is unavailable, but don't listen here.
+        bind_socket(host, port, reuse_port=True).close()
+        sock = None
+    else:
+        sock = bind_socket(host, port)
+
+    children: dict[int, float] = {}
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(serve, sock, host, port)
+        children[pid] = monotonic()
+
+    loop = get_running_loop()
+    stop = Event()
+    reload = Event()
+    retiring: set[Task] = set()
+    if handle_signals:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        loop.add_signal_handler(signal.SIGHUP, reload.set)
+    try:
+        for _ in range(workers):
+            spawn()
+        logger.info("Started %d workers on port %d.", workers, port)
+
+        while not stop.is_set():
+            await sleep(0.1)
+            if reload.is_set() and not stop.is_set():
+                reload.clear()
+                logger.info("Replacing the workers.")
+                old_children = children.copy()
+                children.clear()
+                for _ in range(workers):
+                    spawn()
+                retiring.add(
+                    t := create_task(_stop_children(old_children, shutdown_timeout))
+                )
+                t.add_done_callback(retiring.discard)
+            for pid, started in list(children.items()):
+                if (code := _reap(pid)) is None:
+                    continue
+                del children[pid]
+                if stop.is_set():
+                    break
+                logger.warning("Worker %d exited with %d, restarting.", pid, code)
+                if monotonic() - started < _MIN_WORKER_LIFETIME:
+                    await sleep(_MIN_WORKER_LIFETIME)
+                spawn()
+    finally:
+        if handle_signals:
+            for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                loop.remove_signal_handler(signum)
+        await _stop_children(children, shutdown_timeout)
+        for t in list(retiring):
+            await t
+        if sock is not None:
+            sock.close()
+
+
+def _reap(pid: int) -> int | None:
+    """Collect a child if it exited, returning its exit status."""
+    try:
+        reaped, status = os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        return -1
+    return os.waitstatus_to_exitcode(status) if reaped else None
+
+
+async def _stop_children(children: dict[int, float], timeout: float) -> None:
+    for pid in children:
+        with suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGTERM)
+    deadline = monotonic() + timeout
+    while children and monotonic() < deadline:
+        for pid in [pid for pid in children if _reap(pid) is not None]:
+            del children[pid]
+        if children:
+            await sleep(0.05)
+    for pid in children:
+        logger.warning("Worker %d did not shut down in time, killing.", pid)
+        with suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGKILL)
+        with suppress(ChildProcessError):
+            os.waitpid(pid, 0)
+    children.clear()
@@ -0,0 +1,68 @@
+"""Serving WSGI apps using waitress."""
+import signal
+from asyncio import run
+from collections.abc import Callable
+from socket import socket
+from typing import Any
+
+from ._workers import bind_socket, supervise
+
+__all__ = ["run_wsgi"]
+
+
+def _raise_exit(*_: Any) -> None:
+    raise SystemExit(0)
+
+
+def serve_wsgi(
+    make_app: Callable[[], Any], sock: socket, threads: int, keep_alive_timeout: float
+) -> None:
+    """Serve a WSGI app on a listening socket until SIGINT or SIGTERM.
+
+    On shutdown, waitress stops accepting connections and waits a little for the
+    requests in flight.
+    """
+    from waitress import create_server
+
+    server = create_server(
+        make_app(), sockets=[sock], threads=threads, channel_timeout=keep_alive_timeout
+    )
+    previous = signal.signal(signal.SIGTERM, _raise_exit)
+    try:
+        server.run()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        server.close()
+
+
+def run_wsgi(
+    make_app: Callable[[], Any],
+    shutdown: Callable[[], None],
+    host: str,
+    port: int,
+    threads: int,
+    workers: int,
+    reuse_port: bool,
+    keep_alive_timeout: float,
+) -> None:
+    """Serve a WSGI app using waitress, optionally in several worker processes.
+
+    The app is created in the worker processes, and `shutdown` is called in them
+    once they are done serving.
+    """
+
+    def serve_worker(sock: socket) -> None:
+        try:
+            serve_wsgi(make_app, sock, threads, keep_alive_timeout)
+        finally:
+            shutdown()
+
+    if workers > 1:
+        run(supervise(serve_worker, workers, host, port, reuse_port=reuse_port))
+        return
+
+    sock = bind_socket(host, port)
+    try:
+        serve_worker(sock)
+    finally:
+        sock.close()
@@ -3,6 +3,8 @@ from collections.abc import Callable, Coroutine
 from functools import partial
 from inspect import Parameter, Signature, signature
 from logging import Logger
+from operator import attrgetter
+from socket import socket
 from typing import Any, ClassVar, Generic, TypeAlias, TypeVar
 
 from attrs import Factory, define
@@ -10,12 +12,20 @@ from cattrs import Converter
 from incant import Hook, Incanter
 from multidict import CIMultiDict
 
-from aiohttp.web import AppRunner, Response, RouteTableDef, TCPSite, access_logger
+from aiohttp.web import (
+    AppRunner,
+    Response,
+    RouteTableDef,
+    SockSite,
+    TCPSite,
+    access_logger,
+)
 from aiohttp.web import Request as FrameworkRequest
 from aiohttp.web import StreamResponse as FrameworkResponse
 from aiohttp.web_app import Application
 
 from . import ResponseException
+from ._workers import supervise
 from .base import AsyncApp as BaseApp
 from .path import parse_curly_path_params
 from .requests import (
@@ -33,7 +43,7 @@ from .requests import (
 from .responses import dict_to_headers, make_exception_adapter, make_response_adapter
 from .shorthands import ResponseShorthand, T_co
 from .status import BadRequest, BaseResponse, get_status_code
-from .types import Method, RouteName
+from .types import ClientAddress, Method, RouteName
 
 __all__ = ["App", "AiohttpApp"]
 
@@ -72,6 +82,7 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
     def to_framework_routes(self) -> RouteTableDef:
         r = RouteTableDef()
         exc_adapter = make_exception_adapter(self.converter)
+        return_adapter = self._capture_response(_framework_return_adapter)
 
         for (method, path), (handler, name, _) in self._route_map.items():
             ra = make_response_adapter(
@@ -83,7 +94,7 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
             path_params = parse_curly_path_params(path)
             hooks = [Hook.for_name(p, None) for p in path_params]
 
-            base_handler = self.incant.compose(handler, is_async=True)
+            base_handler = self._compose_handler(handler, name, is_async=True)
             # Detect required content-types here, based on the registered
             # request loaders.
             base_sig = signature(base_handler)
@@ -109,7 +120,7 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
                 async def adapted(
                     request: FrameworkRequest,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ea=exc_adapter,
                     _prepared=adapted,
                     _path_params=path_params,
@@ -146,7 +157,7 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                 async def adapted(
                     request: FrameworkRequest,
                     _ra=ra,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ea=exc_adapter,
                     _handler=adapted,
                     _path_params=path_params,
@@ -177,10 +188,39 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                     except ResponseException as exc:
                         return _fra(_ea(exc))
 
+            adapted = self._wrap_route(
+                adapted,
+                method,
+                path,
+                name,
+                return_adapter,
+                _is_disconnected,
+                response_status=attrgetter("status"),
+                request_header=lambda args, header: args[0].headers.get(header),
+            )
+
             r.route(method, path, name=name)(adapted)
 
         return r
 
+    def to_framework_app(self) -> Application:
+        """Create an aiohttp `Application` serving the routes of this app.
+
+        The app startup and shutdown are tied to the application lifecycle.
+        """
+        app = Application()
+        app.add_routes(self.to_framework_routes())
+
+        async def on_startup(_: Application) -> None:
+            await self.startup()
+
+        async def on_cleanup(_: Application) -> None:
+            await self.shutdown()
+
+        app.on_startup.append(on_startup)
+        app.on_cleanup.append(on_cleanup)
+        return app
+
     async def run(
         self,
         port: int = 8000,
@@ -189,15 +229,63 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
         shutdown_timeout: float = 60,
         access_log: Logger | None = access_logger,
         handler_cancellation: bool = False,
+        workers: int = 1,
+        reuse_port: bool = False,
     ):
         """Start serving this app.
 
         If `handle_signals` is `False`, cancel the task running this to shut down.
 
         :param handle_signals: Whether to let the underlying server handle signals.
+        :param workers: The number of worker processes. With more than one, this
+            process forks the workers and supervises them, restarting crashed
+            workers and shutting them down gracefully. Requires a POSIX system.
+        :param reuse_port: With multiple workers, give every worker a socket of its
+            own using `SO_REUSEPORT`, instead of sharing a single socket.
         """
-        app = Application()
-        app.add_routes(self.to_framework_routes())
+        if workers > 1:
+
+            async def serve_worker(sock: socket) -> None:
+                await self._serve(
+                    SockSite,
+                    sock,
+                    handle_signals=True,
+                    shutdown_timeout=shutdown_timeout,
+                    access_log=access_log,
+                    handler_cancellation=handler_cancellation,
+                )
+
+            await supervise(
+                serve_worker,
+                workers,
+                host,
+                port,
+                reuse_port=reuse_port,
+                handle_signals=handle_signals,
+                shutdown_timeout=shutdown_timeout + 5,
+            )
+            return
+
+        await self._serve(
+            TCPSite,
+            host,
+            port,
+            handle_signals=handle_signals,
+            shutdown_timeout=shutdown_timeout,
+            access_log=access_log,
+            handler_cancellation=handler_cancellation,
+        )
+
+    async def _serve(
+        self,
+        site_cls: type[TCPSite] | type[SockSite],
+        *site_args: Any,
+        handle_signals: bool,
+        shutdown_timeout: float,
+        access_log: Logger | None,
+        handler_cancellation: bool,
+    ) -> None:
+        app = self.to_framework_app()
         runner = AppRunner(
             app,
             handle_signals=handle_signals,
@@ -205,11 +293,14 @@ class AiohttpApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
             handler_cancellation=handler_cancellation,
         )
         await runner.setup()
-        site = TCPSite(runner, host, port, shutdown_timeout=shutdown_timeout)
-        await site.start()
+        try:
+            site = site_cls(runner, *site_args, shutdown_timeout=shutdown_timeout)
+            await site.start()
 
-        while True:
-            await sleep(3600)
+            while True:
+                await sleep(3600)
+        finally:
+            await runner.cleanup()
 
 
 App: TypeAlias = AiohttpApp[FrameworkResponse]
@@ -263,6 +354,11 @@ def _make_aiohttp_incanter(converter: Converter) -> Incanter:
 
     res.register_hook(lambda p: p.annotation is ReqBytes, request_bytes)
 
+    def client_address(_request: FrameworkRequest) -> ClientAddress:
+        return ClientAddress(_request.remote or "")
+
+    res.register_hook(lambda p: p.annotation is ClientAddress, client_address)
+
     res.register_hook_factory(
         is_req_body_attrs, partial(attrs_body_factory, converter=converter)
     )
@@ -346,6 +442,10 @@ def _make_form_dependency(
     return read_form
 
 
+async def _is_disconnected(request: FrameworkRequest) -> bool:
+    return request.transport is None or request.transport.is_closing()
+
+
 def _framework_return_adapter(resp: BaseResponse) -> FrameworkResponse:
     return Response(
         body=resp.ret or b"",
@@ -1,9 +1,10 @@
-from collections.abc import Callable, Coroutine, Iterable, Sequence
+from collections.abc import Awaitable, Callable, Coroutine, Iterable, Sequence
 from functools import partial
+from operator import attrgetter
 from types import NoneType
 from typing import Any, ClassVar, Final, Generic, TypeAlias, TypeVar
 
-from attrs import AttrsInstance, Factory, define, field
+from attrs import AttrsInstance, Factory, define, field, frozen
 from cattrs import Converter
 from cattrs.preconf.orjson import make_converter
 from incant import Incanter
@@ -16,8 +17,21 @@ from ._openapi import (
     default_summary_transformer,
     make_openapi_spec,
 )
-from .openapi import ApiKeySecurityScheme, OpenAPI
+from .hooks import (
+    ExceptionHook,
+    LifecycleHooks,
+    RequestStartHook,
+    ResponseHook,
+    apply_hooks_async,
+    apply_hooks_sync,
+    capture_response,
+)
+from .lifespan import Lifespan, Singleton, singleton_type
+from .limits import Cancellations, ConcurrencyLimiter, apply_deadline, limit_concurrency
+from .metrics import PROMETHEUS_CONTENT_TYPE, Metrics, instrument_async, instrument_sync
+from .openapi import ApiKeySecurityScheme, OpenAPI, Response, StatusCodeType
 from .openapi import converter as openapi_converter
+from .profiling import MemoryProfiler, profile_memory_async, profile_memory_sync
 from .shorthands import (
     BytesShorthand,
     NoneShorthand,
@@ -26,7 +40,10 @@ from .shorthands import (
     T_co,
     make_attrs_shorthand,
 )
-from .status import BaseResponse, Ok
+from .slowlog import SlowRequestLog, capture_arguments, watch_async, watch_sync
+from .status import BaseResponse, GatewayTimeout, Ok, ServiceUnavailable
+from .timing import PhaseTiming, time_handler, time_phases_async, time_phases_sync
+from .tracing import Tracer, trace_async, trace_sync, traced_dependency, traced_incanter
 from .types import Method, RouteName, RouteTags
 
 __all__ = ["App"]
@@ -37,8 +54,39 @@ class OpenAPISecuritySpec:
     security_scheme: ApiKeySecurityScheme
 
 
+@frozen
+class RouteOptions:
+    """Per-route serving policies."""
+
+    max_concurrency: int | None = None
+    max_queue: int = 0
+    timeout: float | None = None
+    cancel_on_disconnect: bool = False
+
+
+_default_route_options: Final = RouteOptions()
+
+
+@frozen
+class RouteDependency:
+    """A dependency run before the handlers of some routes, like a rate limit.
+
+    The dependency result is discarded; to reject a request, it should raise a
+    `ResponseException`.
+    """
+
+    #: Produces the dependency for a route, given the route name. Returns `None` for
+    #: routes the dependency does not apply to.
+    factory: Callable[[RouteName], Callable | None]
+    #: The responses the dependency may produce, for the OpenAPI spec.
+    responses: dict[StatusCodeType, Response] = Factory(dict)
+
+
 C = TypeVar("C")
 H = TypeVar("H", bound=Callable[..., Any])
+RSH = TypeVar("RSH", bound=RequestStartHook)
+RH = TypeVar("RH", bound=ResponseHook)
+EH = TypeVar("EH", bound=ExceptionHook)
 
 default_shorthands: Final = (NoneShorthand, StrShorthand, BytesShorthand)
 
@@ -57,13 +105,30 @@ class _AppBase:
     _route_map: dict[
         tuple[Method, str], tuple[Callable, RouteName, RouteTags]
     ] = Factory(dict)
+    _route_options: dict[tuple[Method, str], RouteOptions] = Factory(dict)
     _openapi_security: list[OpenAPISecuritySpec] = Factory(list)
+    _route_dependencies: list[RouteDependency] = Factory(list)
     _shorthands: Sequence[type[ResponseShorthand]] = field(
         default=Factory(
             lambda self: make_default_shorthands(self.converter), takes_self=True
         ),
         init=False,
     )
+    _lifespan: Lifespan = Factory(Lifespan)
+    _hooks: LifecycleHooks = Factory(LifecycleHooks)
+    #: Per-route request metrics. `None` disables collection; set by
+    #: `serve_metrics()`.
+    metrics: Metrics | None = None
+    #: Sampled timing of the request processing phases. `None` disables timing.
+    phase_timing: PhaseTiming | None = None
+    #: Request tracing. `None` disables tracing.
+    tracer: Tracer | None = None
+    #: Logging of slow requests. `None` disables logging.
+    slow_request_log: SlowRequestLog | None = None
+    #: Sampled memory profiling. `None` disables profiling; set by
+    #: `serve_memory_profile()`.
+    memory_profiler: MemoryProfiler | None = None
+    _traced_incant: tuple[int, Incanter] | None = field(default=None, init=False)
     _framework_req_cls: ClassVar[type] = NoneType
     _framework_resp_cls: ClassVar[type] = NoneType
 
@@ -82,6 +147,68 @@ class _AppBase:
             if name_prefix is not None:
                 name = RouteName(f"{name_prefix}.{name}")
             self._route_map[(method, (prefix or "") + path)] = (handler, name, tags)
+            if (options := app._route_options.get((method, path))) is not None:
+                self._route_options[(method, (prefix or "") + path)] = options
+
+    def on_startup(self, hook: H) -> H:
+        """Register a hook to run on app startup. May be used as a decorator.
+
+        Hooks run after the singletons are created, in registration order.
+        """
+        self._lifespan.startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: H) -> H:
+        """Register a hook to run on app shutdown. May be used as a decorator.
+
+        Hooks run before the singletons are finalized, in registration order.
+        """
+        self._lifespan.shutdown_hooks.append(hook)
+        return hook
+
+    def on_request_start(self, hook: RSH) -> RSH:
+        """Register a hook to run before every request. May be used as a decorator.
+
+        The hook is called with the route name and method.
+        """
+        self._hooks.request_start.append(hook)
+        return hook
+
+    def on_response(self, hook: RH) -> RH:
+        """Register a hook to run after every request. May be used as a decorator.
+
+        The hook is called with the route name, method, the processing duration in
+        seconds and the response. The response is `None` if the handler returned a
+        framework response.
+        """
+        self._hooks.response.append(hook)
+        return hook
+
+    def on_exception(self, hook: EH) -> EH:
+        """Register a hook to run on requests raising unhandled exceptions. May be
+        used as a decorator.
+
+        The hook is called with the route name, method, the processing duration in
+        seconds and the exception, which is then propagated.
+        """
+        self._hooks.exception.append(hook)
+        return hook
+
+    def singleton(self, factory: H, type: Any = None) -> H:
+        """Register a singleton dependency. May be used as a decorator.
+
+        The factory is called once on app startup, and the result is made
+        available to handlers (and other dependencies) requesting it.
+        If the factory is a generator, it should yield the singleton; the rest
+        of the generator is run on app shutdown.
+
+        :param type: The type of the singleton. If not provided, the return
+            annotation of the factory is used.
+        """
+        s = Singleton(factory, type if type is not None else singleton_type(factory))
+        self._lifespan.singletons.append(s)
+        self.incant.register_by_type(s.get, s.type)
+        return factory
 
     def make_openapi_spec(
         self,
@@ -104,11 +231,16 @@ class _AppBase:
         """
         # We need to prepare the handlers to get the correct signature.
         route_map = {
-            k: (self.incant.compose(v[0]), v[0], v[1], v[2])
+            k: (
+                self.incant.compose(v[0], forced_deps=self._forced_deps(v[1])),
+                v[0],
+                v[1],
+                v[2],
+            )
             for k, v in self._route_map.items()
             if v[1] not in exclude
         }
-        return make_openapi_spec(
+        res = make_openapi_spec(
             route_map,
             self.__class__._path_param_parser,
             title,
@@ -120,6 +252,81 @@ class _AppBase:
             summary_transformer,
             description_transformer,
         )
+        for method, path in route_map:
+            if not (extra := self._openapi_extra_responses(method, path)):
+                continue
+            path_item = res.paths.get(self._path_param_parser(path)[0])
+            op = getattr(path_item, method.lower(), None)
+            if op is not None:
+                for status, response in extra.items():
+                    op.responses.setdefault(status, response)
+        return res
+
+    def _compose_handler(
+        self, handler: Callable, name: RouteName, is_async: bool
+    ) -> Callable:
+        """Compose a handler with its dependencies, for creating a framework route."""
+        if (
+            self.phase_timing is not None
+            or self.tracer is not None
+            or self.slow_request_log is not None
+        ):
+            handler = time_handler(handler)
+        if self.slow_request_log is not None:
+            handler = capture_arguments(handler)
+        if self.tracer is not None:
+            return self._traced_incanter().compose(
+                handler,
+                is_async=is_async,
+                forced_deps=[traced_dependency(d) for d in self._forced_deps(name)],
+            )
+        return self.incant.compose(
+            handler, is_async=is_async, forced_deps=self._forced_deps(name)
+        )
+
+    def _traced_incanter(self) -> Incanter:
+        """The app incanter with its dependencies traced, built once per app.
+
+        Rebuilt if hooks are registered with the app incanter afterwards.
+        """
+        hooks = len(self.incant.hook_factory_registry)
+        if self._traced_incant is None or self._traced_incant[0] != hooks:
+            self._traced_incant = (hooks, traced_incanter(self.incant))
+        return self._traced_incant[1]
+
+    def _capture_response(
+        self, framework_return_adapter: Callable[[BaseResponse], C]
+    ) -> Callable[[BaseResponse], C]:
+        """Make responses available to the lifecycle hooks, if any are registered."""
+        if not self._hooks:
+            return framework_return_adapter
+        return capture_response(framework_return_adapter)
+
+    def _forced_deps(self, name: RouteName) -> list[Callable]:
+        """The route dependencies applying to a route, for composing its handler."""
+        return [
+            dep
+            for route_dep in self._route_dependencies
+            if (dep := route_dep.factory(name)) is not None
+        ]
+
+    def _openapi_extra_responses(
+        self, method: Method, path: str
+    ) -> dict[StatusCodeType, Response]:
+        """Responses produced by _uapi_ itself on a route, for the OpenAPI spec."""
+        res: dict[StatusCodeType, Response] = {}
+        name = self._route_map[(method, path)][1]
+        for route_dep in self._route_dependencies:
+            if not route_dep.responses or route_dep.factory(name) is None:
+                continue
+            for status, response in route_dep.responses.items():
+                if (existing := res.get(status)) is not None:
+                    response = Response(
+                        f"{existing.description}; {response.description}",
+                        existing.content,
+                    )
+                res[status] = response
+        return res
 
     def serve_openapi(
         self,
@@ -155,6 +362,60 @@ class _AppBase:
             (),
         )
 
+    def serve_metrics(self, path: str = "/metrics") -> None:
+        """
+        Start collecting request metrics and serving them at the given path.
+
+        The metrics are served in the Prometheus text format, and include
+        request counts by status code, requests in flight and request duration
+        histograms, by route name and method.
+
+        If phase timing is enabled, the phase timings are served too.
+
+        Metrics are only collected for routes created afterwards by
+        `to_framework_app()` and similar.
+        """
+        if self.metrics is None:
+            self.metrics = Metrics()
+        metrics = self.metrics
+
+        def metrics_handler() -> Ok[bytes]:
+            payload = metrics.render()
+            if self.phase_timing is not None:
+                payload += self.phase_timing.render()
+            return Ok(payload.encode(), {"content-type": PROMETHEUS_CONTENT_TYPE})
+
+        self._route_map[("GET", path)] = (
+            metrics_handler,
+            RouteName("metrics_handler"),
+            (),
+        )
+
+    def serve_memory_profile(self, path: str = "/memory") -> None:
+        """
+        Start profiling the memory usage of sampled requests and serving a report at
+        the given path.
+
+        The report is a JSON array of the profiled routes and methods, with their
+        retained and peak memory, starting with the highest peak. It should only be
+        served internally.
+
+        Requests are only profiled for routes created afterwards by
+        `to_framework_app()` and similar.
+        """
+        if self.memory_profiler is None:
+            self.memory_profiler = MemoryProfiler()
+        profiler = self.memory_profiler
+
+        def memory_profile_handler() -> Ok[bytes]:
+            return Ok(dumps(profiler.report()), {"content-type": "application/json"})
+
+        self._route_map[("GET", path)] = (
+            memory_profile_handler,
+            RouteName("memory_profile_handler"),
+            (),
+        )
+
     def serve_swaggerui(
         self, path: str = "/swaggerui", openapi_path: str = "/openapi.json"
     ):
@@ -267,6 +528,62 @@ class App(Generic[C], _AppBase):
     ) -> Callable[[Callable[..., DefaultReturns | C]], Any]:
         return partial(self.route, path, name=name, methods=["OPTIONS"], tags=tags)
 
+    def _wrap_route(
+        self,
+        adapted: Callable[..., Any],
+        method: Method,
+        path: str,
+        name: RouteName,
+        response_status: Callable[[Any], int] = attrgetter("status_code"),
+        request_header: Callable[[tuple[Any, ...], str], str | None] | None = None,
+    ) -> Callable[..., Any]:
+        """Apply the app instrumentation to an adapted handler.
+
+        Called by the framework apps when creating framework routes.
+
+        :param response_status: Gets the status code of a framework response.
+        :param request_header: Gets a request header, given the arguments to
+            `adapted` and the header name. `None` if unsupported.
+        """
+        if self.memory_profiler is not None:
+            adapted = profile_memory_sync(adapted, self.memory_profiler, name, method)
+        if self.tracer is not None:
+            adapted = trace_sync(
+                adapted,
+                self.tracer,
+                name,
+                method,
+                path,
+                response_status,
+                request_header,
+            )
+        if self.phase_timing is not None:
+            adapted = time_phases_sync(adapted, self.phase_timing, name, method)
+        if self.slow_request_log is not None:
+            adapted = watch_sync(adapted, self.slow_request_log, name, method)
+        if self._hooks:
+            if self._hooks.has_async():
+                raise Exception("Sync apps only support sync hooks.")
+            adapted = apply_hooks_sync(adapted, self._hooks, name, method)
+        if self.metrics is not None:
+            adapted = instrument_sync(
+                adapted, self.metrics, name, method, response_status
+            )
+        if not self._lifespan.is_empty():
+            adapted = self._lifespan.start_on_first_request(adapted)
+        return adapted
+
+    def startup(self) -> None:
+        """Create the singletons and run the startup hooks.
+
+        Framework apps call this automatically; repeated calls are no-ops.
+        """
+        self._lifespan.startup()
+
+    def shutdown(self) -> None:
+        """Run the shutdown hooks and finalize the singletons."""
+        self._lifespan.shutdown()
+
     def add_response_shorthand(
         self, shorthand: type[ResponseShorthand[T_co]]
     ) -> "App[C | T_co]":
@@ -284,9 +601,39 @@ class App(Generic[C], _AppBase):
         return self  # type: ignore
 
 
+@define
 class AsyncApp(Generic[C], _AppBase):
     """Override type signatures for handlers."""
 
+    #: The maximum number of requests processed concurrently across all routes.
+    #: `None` means no limit.
+    max_concurrency: int | None = None
+    #: The maximum number of requests waiting for a free slot when the app is at
+    #: `max_concurrency`. Requests over this are shed.
+    max_queue: int = 0
+    #: The response for requests shed due to overload.
+    overload_response: BaseResponse = Factory(
+        lambda: ServiceUnavailable(None, {"retry-after": "1"})
+    )
+    #: The default deadline for processing a request, in seconds. `None` means no
+    #: deadline.
+    timeout: float | None = None
+    #: The response for requests over their deadline.
+    timeout_response: BaseResponse = Factory(lambda: GatewayTimeout(None))
+    #: How often to check for client disconnects, on routes cancelling on
+    #: disconnect.
+    disconnect_poll_interval: float = 0.5
+    #: The concurrency limiters, by route name. Populated when the framework app is
+    #: created.
+    concurrency_limiters: dict[RouteName, ConcurrencyLimiter] = field(
+        factory=dict, init=False
+    )
+    #: The app-wide concurrency limiter, if `max_concurrency` is set.
+    app_concurrency_limiter: ConcurrencyLimiter | None = field(default=None, init=False)
+    #: Counters of requests cancelled due to deadlines or client disconnects, by
+    #: route name. Populated when the framework app is created.
+    cancellations: dict[RouteName, Cancellations] = field(factory=dict, init=False)
+
     def route(
         self,
         path: str,
@@ -296,6 +643,10 @@ class AsyncApp(Generic[C], _AppBase):
         methods: Iterable[Method] = {"GET"},
         name: str | None = None,
         tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Any:
         """Register routes. This is not a decorator.
 
@@ -304,68 +655,303 @@ class AsyncApp(Generic[C], _AppBase):
         :param methods: The HTTP methods on which to serve the handler.
         :param name: The route name. If not provided, will use the handler name.
         :param tags: The OpenAPI tags to apply.
+        :param max_concurrency: The maximum number of requests processed
+            concurrently by this route. `None` means no limit.
+        :param max_queue: The maximum number of requests waiting for a free slot
+            when the route is at `max_concurrency`. Requests over this are shed.
+        :param timeout: The deadline for processing a request, in seconds. Requests
+            over the deadline are cancelled. Overrides the app timeout.
+        :param cancel_on_disconnect: Whether to cancel processing requests when the
+            client disconnects, if supported by the underlying framework.
         """
         if name is None:
             name = handler.__name__
+        options = RouteOptions(
+            max_concurrency, max_queue, timeout, cancel_on_disconnect
+        )
         for method in methods:
             self._route_map[(method, path)] = (handler, RouteName(name), tags)
+            if options != _default_route_options:
+                self._route_options[(method, path)] = options
         return handler
 
     def get(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["GET"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["GET"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
 
     def post(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["POST"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["POST"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
 
     def put(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["PUT"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["PUT"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
 
     def patch(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["PATCH"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["PATCH"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
 
     def delete(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["DELETE"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["DELETE"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
 
     def head(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["HEAD"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["HEAD"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
 
     def options(
-        self, path: str, name: str | None = None, tags: RouteTags = ()
+        self,
+        path: str,
+        name: str | None = None,
+        tags: RouteTags = (),
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        timeout: float | None = None,
+        cancel_on_disconnect: bool = False,
     ) -> Callable[
         [Callable[..., DefaultReturns | C | Coroutine[None, None, DefaultReturns | C]]],
         Any,
     ]:
-        return partial(self.route, path, name=name, methods=["OPTIONS"], tags=tags)
+        return partial(
+            self.route,
+            path,
+            name=name,
+            methods=["OPTIONS"],
+            tags=tags,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            timeout=timeout,
+            cancel_on_disconnect=cancel_on_disconnect,
+        )
+
+    def _wrap_route(
+        self,
+        adapted: Callable[..., Awaitable[Any]],
+        method: Method,
+        path: str,
+        name: RouteName,
+        framework_return_adapter: Callable[[BaseResponse], Any],
+        is_disconnected: Callable[[Any], Awaitable[bool]] | None = None,
+        response_status: Callable[[Any], int] = attrgetter("status_code"),
+        request_header: Callable[[tuple[Any, ...], str], str | None] | None = None,
+    ) -> Callable[..., Awaitable[Any]]:
+        """Apply the route policies, like concurrency limits, and the app
+        instrumentation to an adapted handler.
+
+        Called by the framework apps when creating framework routes.
+
+        :param is_disconnected: A coroutine checking whether the client of a
+            request (the first argument to `adapted`) has disconnected. `None` if
+            the framework does not support this.
+        :param response_status: Gets the status code of a framework response.
+        :param request_header: Gets a request header, given the arguments to
+            `adapted` and the header name. `None` if unsupported.
+        """
+        options = self._route_options.get((method, path), _default_route_options)
+        if options.max_concurrency is not None or self.max_concurrency is not None:
+            overload_response = partial(
+                framework_return_adapter, self.overload_response
+            )
+            if self.max_concurrency is not None:
+                if self.app_concurrency_limiter is None:
+                    self.app_concurrency_limiter = ConcurrencyLimiter(
+                        self.max_concurrency, self.max_queue
+                    )
+                adapted = limit_concurrency(
+                    adapted, self.app_concurrency_limiter, overload_response
+                )
+            if options.max_concurrency is not None:
+                limiter = self.concurrency_limiters.setdefault(
+                    name, ConcurrencyLimiter(options.max_concurrency, options.max_queue)
+                )
+                adapted = limit_concurrency(adapted, limiter, overload_response)
+        timeout = options.timeout if options.timeout is not None else self.timeout
+        if not options.cancel_on_disconnect:
+            is_disconnected = None
+        if timeout is not None or is_disconnected is not None:
+            # The deadline also covers the time spent queueing.
+            adapted = apply_deadline(
+                adapted,
+                timeout,
+                self.cancellations.setdefault(name, Cancellations()),
+                partial(framework_return_adapter, self.timeout_response),
+                is_disconnected,
+                self.disconnect_poll_interval,
+            )
+        if self.memory_profiler is not None:
+            adapted = profile_memory_async(adapted, self.memory_profiler, name, method)
+        if self.tracer is not None:
+            adapted = trace_async(
+                adapted,
+                self.tracer,
+                name,
+                method,
+                path,
+                response_status,
+                request_header,
+            )
+        if self.phase_timing is not None:
+            adapted = time_phases_async(adapted, self.phase_timing, name, method)
+        if self.slow_request_log is not None:
+            adapted = watch_async(adapted, self.slow_request_log, name, method)
+        if self._hooks:
+            adapted = apply_hooks_async(adapted, self._hooks, name, method)
+        if self.metrics is not None:
+            # Outermost, so shed and timed out requests are measured too.
+            adapted = instrument_async(
+                adapted, self.metrics, name, method, response_status
+            )
+        return adapted
+
+    def _openapi_extra_responses(
+        self, method: Method, path: str
+    ) -> dict[StatusCodeType, Response]:
+        res = super()._openapi_extra_responses(method, path)
+        options = self._route_options.get((method, path), _default_route_options)
+        if options.max_concurrency is not None or self.max_concurrency is not None:
+            res[str(self.overload_response.status_code())] = Response(
+                "Service Unavailable"
+            )
+        if options.timeout is not None or self.timeout is not None:
+            res[str(self.timeout_response.status_code())] = Response("Gateway Timeout")
+        return res
+
+    async def startup(self) -> None:
+        """Create the singletons and run the startup hooks.
+
+        Framework apps call this automatically; repeated calls are no-ops.
+        """
+        await self._lifespan.astartup()
+
+    async def shutdown(self) -> None:
+        """Run the shutdown hooks and finalize the singletons."""
+        await self._lifespan.ashutdown()
 
     def add_response_shorthand(
         self, shorthand: type[ResponseShorthand[T_co]]
@@ -0,0 +1,18 @@
+"""A load generator for benchmarking the backends over real sockets.
+
+Run `python -m uapi.bench --help` for usage.
+"""
+from .app import BACKENDS, make_app, serve
+from .client import HttpConnection
+from .load import EndpointReport, Report, Workload, generate_load
+
+__all__ = [
+    "BACKENDS",
+    "EndpointReport",
+    "HttpConnection",
+    "Report",
+    "Workload",
+    "generate_load",
+    "make_app",
+    "serve",
+]
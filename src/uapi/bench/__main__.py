@@ -0,0 +1,181 @@
+"""Load test a backend over real sockets.
+
+The benchmark app is served by the `run()` method of the backend in a separate
+process, and driven by an asyncio HTTP client.
+"""
+import asyncio
+import json
+import platform
+import socket
+from argparse import ArgumentParser, ArgumentTypeError
+from importlib.metadata import PackageNotFoundError, version
+from multiprocessing import get_context
+from time import monotonic, sleep
+from typing import Any
+
+from .app import BACKENDS, serve
+from .load import PERCENTILES, REQUESTS, Report, Workload, generate_load
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(host: str, port: int, timeout: float) -> None:
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            if monotonic() > deadline:
+                raise
+            sleep(0.05)
+
+
+def _parse_mix(value: str) -> dict[str, float]:
+    """Parse a request mix, like `hello=3,echo=1`."""
+    res = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in REQUESTS:
+            raise ArgumentTypeError(f"unknown request: {name}")
+        try:
+            res[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ArgumentTypeError(f"invalid weight: {weight}") from None
+    return res
+
+
+def _uapi_version() -> str | None:
+    try:
+        return version("uapi")
+    except PackageNotFoundError:
+        return None
+
+
+def render(report: Report) -> str:
+    """Render a report as a table."""
+    header = f"{'request':<8} {'requests':>9} {'req/s':>9} {'errors':>7} {'mean':>9}"
+    for p in PERCENTILES:
+        header += f" {f'p{p:g}':>9}"
+    lines = [
+        (
+            f"{report.backend}: {report.workload.concurrency} connections,"
+            f" {report.duration:.1f}s"
+        ),
+        header,
+    ]
+    for name, r in [*report.endpoints.items(), ("total", report.total)]:
+        line = (
+            f"{name:<8} {r.requests:>9} {r.throughput:>9.0f} {r.error_rate:>7.2%}"
+            f" {r.mean_ms:>7.2f}ms"
+        )
+        for value in r.percentiles_ms.values():
+            line += f" {value:>7.2f}ms"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> str:
+    """Compare the totals of two JSON reports."""
+    lines = ["Compared to the baseline:"]
+    current, previous = report["total"], baseline["total"]
+    metrics = [("throughput", "req/s"), ("mean_ms", "mean")] + [
+        (f"p{p:g}", f"p{p:g}") for p in PERCENTILES
+    ]
+    for key, label in metrics:
+        if key in current:
+            new, old = current[key], previous[key]
+        else:
+            new, old = current["percentiles_ms"][key], previous["percentiles_ms"][key]
+        change = f"{(new - old) / old:+.1%}" if old else "n/a"
+        lines.append(f"  {label:<6} {old:>10.2f} -> {new:>10.2f} ({change})")
+    lines.append(
+        f"  errors {previous['error_rate']:>10.2%} -> {current['error_rate']:>10.2%}"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="python -m uapi.bench", description=__doc__)
+    parser.add_argument("backend", choices=BACKENDS)
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument(
+        "-d", "--duration", type=float, default=10.0, help="in seconds; default: 10"
+    )
+    parser.add_argument(
+        "-w", "--warmup", type=float, default=2.0, help="in seconds; default: 2"
+    )
+    parser.add_argument(
+        "-m",
+        "--mix",
+        type=_parse_mix,
+        default={"hello": 1.0},
+        help=(
+            "the weighted requests to send, like `hello=3,echo=1`; one of "
+            f"{', '.join(REQUESTS)}; default: hello"
+        ),
+    )
+    parser.add_argument(
+        "-p",
+        "--payload-size",
+        type=int,
+        action="append",
+        help="the number of items in echo payloads, picked at random; default: 10",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="the number of server processes"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="default: a free port")
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="compare to a previous JSON report"
+    )
+    args = parser.parse_args()
+
+    workload = Workload(
+        args.concurrency,
+        args.duration,
+        args.warmup,
+        args.mix,
+        tuple(args.payload_size or (10,)),
+        args.seed,
+    )
+    port = args.port if args.port is not None else _free_port(args.host)
+
+    # Spawn, so the server starts clean.
+    server = get_context("spawn").Process(
+        target=serve, args=(args.backend, args.host, port, args.workers), daemon=True
+    )
+    server.start()
+    try:
+        _wait_for_port(args.host, port, 30)
+        report = asyncio.run(generate_load(args.host, port, workload, args.backend))
+    finally:
+        server.terminate()
+        server.join(10)
+        if server.is_alive():
+            server.kill()
+
+    print(render(report))  # noqa: T201
+    payload = {
+        "uapi": _uapi_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **report.to_json(),
+    }
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(payload, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            print(compare(payload, json.load(f)))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
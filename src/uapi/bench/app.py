@@ -0,0 +1,111 @@
+"""The app served by the load generator."""
+import asyncio
+from typing import Any, Final
+
+from attrs import define
+
+from .. import ReqBody
+from ..base import App, AsyncApp
+
+__all__ = ["BACKENDS", "Item", "Payload", "make_app", "serve"]
+
+BACKENDS: Final = ("aiohttp", "django", "flask", "quart", "starlette")
+
+
+@define
+class Item:
+    id: int
+    name: str
+    tags: list[str]
+
+
+@define
+class Payload:
+    items: list[Item]
+
+
+def _configure_async(app: AsyncApp, path_id: str) -> None:
+    @app.get("/")
+    async def hello() -> str:
+        return "Hello, world"
+
+    @app.get(f"/path/{path_id}")
+    async def path_param(path_id: int) -> str:
+        return str(path_id + 1)
+
+    @app.get("/query")
+    async def query(page: int = 0) -> str:
+        return str(page + 1)
+
+    @app.post("/echo")
+    async def echo(payload: ReqBody[Payload]) -> Payload:
+        return payload
+
+
+def _configure_sync(app: App, path_id: str) -> None:
+    @app.get("/")
+    def hello() -> str:
+        return "Hello, world"
+
+    @app.get(f"/path/{path_id}")
+    def path_param(path_id: int) -> str:
+        return str(path_id + 1)
+
+    @app.get("/query")
+    def query(page: int = 0) -> str:
+        return str(page + 1)
+
+    @app.post("/echo")
+    def echo(payload: ReqBody[Payload]) -> Payload:
+        return payload
+
+
+def make_app(backend: str) -> Any:
+    """Make the benchmark app, using the given backend."""
+    if backend == "aiohttp":
+        from ..aiohttp import App as AiohttpApp
+
+        aiohttp_app = AiohttpApp()
+        _configure_async(aiohttp_app, "{path_id}")
+        return aiohttp_app
+    if backend == "django":
+        from ..django import App as DjangoApp
+
+        django_app = DjangoApp()
+        _configure_sync(django_app, "<int:path_id>")
+        return django_app
+    if backend == "flask":
+        from ..flask import App as FlaskApp
+
+        flask_app = FlaskApp()
+        _configure_sync(flask_app, "<int:path_id>")
+        return flask_app
+    if backend == "quart":
+        from ..quart import App as QuartApp
+
+        quart_app = QuartApp()
+        _configure_async(quart_app, "<int:path_id>")
+        return quart_app
+    if backend == "starlette":
+        from ..starlette import App as StarletteApp
+
+        starlette_app = StarletteApp()
+        _configure_async(starlette_app, "{path_id}")
+        return starlette_app
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def serve(backend: str, host: str, port: int, workers: int = 1) -> None:
+    """Serve the benchmark app using the `run()` method of the backend, until
+    SIGINT or SIGTERM."""
+    app = make_app(backend)
+    if backend == "aiohttp":
+        asyncio.run(app.run(port, host, access_log=None, workers=workers))
+    elif backend == "django":
+        app.run(host, port, workers=workers)
+    elif backend == "flask":
+        app.run(__name__, host, port, workers=workers)
+    elif backend == "quart":
+        asyncio.run(app.run(__name__, host, port, log_level="warning", workers=workers))
+    else:
+        asyncio.run(app.run(host, port, log_level="warning", workers=workers))
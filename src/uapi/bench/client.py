@@ -0,0 +1,96 @@
+"""A minimal asyncio HTTP/1.1 client, for generating load without dependencies."""
+from asyncio import StreamReader, StreamWriter, open_connection
+
+from attrs import define
+
+__all__ = ["HttpConnection"]
+
+
+@define
+class HttpConnection:
+    """A keep-alive HTTP/1.1 connection.
+
+    Only what the load generator needs is supported: requests with bodies of
+    known length, and responses delimited by `content-length` or chunked.
+    """
+
+    host: str
+    port: int
+    _reader: StreamReader | None = None
+    _writer: StreamWriter | None = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: tuple[tuple[str, str], ...] = (),
+    ) -> tuple[int, bytes]:
+        """Send a request, connecting if needed.
+
+        :return: The status code and the response body.
+        """
+        if self._writer is None:
+            self._reader, self._writer = await open_connection(self.host, self.port)
+        reader, writer = self._reader, self._writer
+        assert reader is not None
+        head = [
+            f"{method} {path} HTTP/1.1",
+            f"host: {self.host}:{self.port}",
+            f"content-length: {len(body)}",
+            *(f"{name}: {value}" for name, value in headers),
+        ]
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            status, response_body, keep_alive = await self._read_response(
+                reader, method
+            )
+        except BaseException:
+            self.close()
+            raise
+        if not keep_alive:
+            self.close()
+        return status, response_body
+
+    @staticmethod
+    async def _read_response(
+        reader: StreamReader, method: str
+    ) -> tuple[int, bytes, bool]:
+        status_line = await reader.readuntil(b"\r\n")
+        version, status, *_ = status_line.split(b" ", 2)
+        keep_alive = version == b"HTTP/1.1"
+        length: int | None = None
+        chunked = False
+        while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = value.endswith(b"chunked")
+            elif name == b"connection":
+                keep_alive = value == b"keep-alive" or (
+                    keep_alive and value != b"close"
+                )
+        code = int(status)
+        if method == "HEAD" or code in (204, 304) or 100 <= code < 200:
+            return code, b"", keep_alive
+        if chunked:
+            parts = []
+            while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            # Skip the trailers.
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            return code, b"".join(parts), keep_alive
+        if length is not None:
+            return code, await reader.readexactly(length), keep_alive
+        # Delimited by the connection closing.
+        return code, await reader.read(), False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
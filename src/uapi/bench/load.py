@@ -0,0 +1,224 @@
+"""Generating load and reporting latencies."""
+from asyncio import CancelledError, gather, get_running_loop, sleep
+from collections.abc import Mapping
+from random import Random
+from time import perf_counter_ns
+from typing import Any, Final
+
+from attrs import Factory, define, frozen
+from orjson import dumps
+
+from .client import HttpConnection
+
+__all__ = ["EndpointReport", "Report", "Workload", "generate_load", "percentile"]
+
+#: The requests of the workload, by name.
+REQUESTS: Final = ("hello", "path", "query", "echo")
+
+#: The reported latency percentiles.
+PERCENTILES: Final = (50.0, 90.0, 99.0, 99.9)
+
+
+@frozen
+class Workload:
+    """What load to generate."""
+
+    #: The number of connections sending requests concurrently.
+    concurrency: int = 64
+    #: How long to generate load for, in seconds, after the warmup.
+    duration: float = 10.0
+    #: How long to generate load for before recording, in seconds.
+    warmup: float = 2.0
+    #: The relative weights of the requests, by name.
+    mix: Mapping[str, float] = Factory(lambda: {"hello": 1.0})
+    #: The numbers of items in the `echo` request payloads, picked at random for
+    #: every request.
+    payload_sizes: tuple[int, ...] = (10,)
+    #: The seed for picking requests and payloads, for repeatable workloads.
+    seed: int = 0
+
+
+def make_echo_body(items: int) -> bytes:
+    return dumps(
+        {
+            "items": [
+                {"id": i, "name": f"item {i}", "tags": ["a", "b", "c"]}
+                for i in range(items)
+            ]
+        }
+    )
+
+
+def percentile(sorted_values: list[int], p: float) -> int:
+    """The nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+@define
+class _Recorder:
+    latencies: dict[str, list[int]] = Factory(dict)
+    errors: dict[str, int] = Factory(dict)
+    recording: bool = False
+
+    def record(self, name: str, latency: int, error: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies.setdefault(name, []).append(latency)
+        if error:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+@frozen
+class EndpointReport:
+    """The results of one request of the mix, or all of them."""
+
+    requests: int
+    errors: int
+    #: Requests per second.
+    throughput: float
+    mean_ms: float
+    #: Latency percentiles in milliseconds, keyed like `p99.9`.
+    percentiles_ms: dict[str, float]
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @classmethod
+    def from_latencies(
+        cls, latencies: list[int], errors: int, duration: float
+    ) -> "EndpointReport":
+        latencies = sorted(latencies)
+        return cls(
+            len(latencies),
+            errors,
+            len(latencies) / duration,
+            sum(latencies) / len(latencies) / 1e6 if latencies else 0.0,
+            {f"p{p:g}": percentile(latencies, p) / 1e6 for p in PERCENTILES},
+        )
+
+
+@frozen
+class Report:
+    """The results of generating load."""
+
+    backend: str
+    workload: Workload
+    #: The measured duration, in seconds.
+    duration: float
+    total: EndpointReport
+    endpoints: dict[str, EndpointReport]
+
+    def to_json(self) -> dict[str, Any]:
+        def endpoint(r: EndpointReport) -> dict[str, Any]:
+            return {
+                "requests": r.requests,
+                "errors": r.errors,
+                "error_rate": r.error_rate,
+                "throughput": r.throughput,
+                "mean_ms": r.mean_ms,
+                "percentiles_ms": r.percentiles_ms,
+            }
+
+        return {
+            "backend": self.backend,
+            "workload": {
+                "concurrency": self.workload.concurrency,
+                "duration": self.workload.duration,
+                "warmup": self.workload.warmup,
+                "mix": dict(self.workload.mix),
+                "payload_sizes": list(self.workload.payload_sizes),
+                "seed": self.workload.seed,
+            },
+            "duration": self.duration,
+            "total": endpoint(self.total),
+            "endpoints": {n: endpoint(r) for n, r in self.endpoints.items()},
+        }
+
+
+async def _worker(
+    connection: HttpConnection,
+    workload: Workload,
+    recorder: _Recorder,
+    rng: Random,
+    echo_bodies: dict[int, bytes],
+) -> None:
+    names = list(workload.mix)
+    weights = [workload.mix[n] for n in names]
+    json_headers = (("content-type", "application/json"),)
+    while True:
+        name = rng.choices(names, weights)[0]
+        if name == "hello":
+            request: tuple[Any, ...] = ("GET", "/")
+        elif name == "path":
+            request = ("GET", f"/path/{rng.randrange(1000)}")
+        elif name == "query":
+            request = ("GET", f"/query?page={rng.randrange(1000)}")
+        else:
+            body = echo_bodies[rng.choice(workload.payload_sizes)]
+            request = ("POST", "/echo", body, json_headers)
+        start = perf_counter_ns()
+        try:
+            status, _ = await connection.request(*request)
+            error = status >= 400
+        except (OSError, EOFError):
+            # `EOFError` includes `IncompleteReadError`. The connection is closed,
+            # and reopened by the next request.
+            error = True
+        recorder.record(name, perf_counter_ns() - start, error)
+
+
+async def generate_load(
+    host: str, port: int, workload: Workload, backend: str = ""
+) -> Report:
+    """Send requests to a running benchmark app, and report on them."""
+    if unknown := set(workload.mix) - set(REQUESTS):
+        raise ValueError(f"Unknown requests: {', '.join(sorted(unknown))}")
+    recorder = _Recorder()
+    echo_bodies = {size: make_echo_body(size) for size in workload.payload_sizes}
+    connections = [HttpConnection(host, port) for _ in range(workload.concurrency)]
+    loop = get_running_loop()
+    workers = []
+    for i, c in enumerate(connections):
+        # Seeded for reproducible workloads, not for security.
+        rng = Random(workload.seed + i)  # noqa: S311, RUF100
+        workers.append(
+            loop.create_task(_worker(c, workload, recorder, rng, echo_bodies))
+        )
+    try:
+        await sleep(workload.warmup)
+        recorder.recording = True
+        start = perf_counter_ns()
+        await sleep(workload.duration)
+        recorder.recording = False
+        duration = (perf_counter_ns() - start) / 1e9
+    finally:
+        for worker in workers:
+            worker.cancel()
+        for result in await gather(*workers, return_exceptions=True):
+            if isinstance(result, BaseException) and not isinstance(
+                result, CancelledError
+            ):
+                raise result
+        for connection in connections:
+            connection.close()
+
+    return Report(
+        backend,
+        workload,
+        duration,
+        EndpointReport.from_latencies(
+            [latency for ls in recorder.latencies.values() for latency in ls],
+            sum(recorder.errors.values()),
+            duration,
+        ),
+        {
+            name: EndpointReport.from_latencies(
+                latencies, recorder.errors.get(name, 0), duration
+            )
+            for name, latencies in sorted(recorder.latencies.items())
+        },
+    )
@@ -1,13 +1,14 @@
 from collections.abc import Callable
 from functools import partial
 from inspect import Parameter, Signature, signature
+from types import ModuleType
 from typing import Any, ClassVar, Generic, TypeAlias, TypeVar
 
 from attrs import Factory, define
 from cattrs import Converter
 from incant import Hook, Incanter
 
-from django.core.handlers.wsgi import WSGIRequest
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
 from django.http import HttpRequest as FrameworkRequest
 from django.http import HttpResponse as FrameworkResponse
 from django.urls import URLPattern
@@ -16,6 +17,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
 from . import ResponseException
+from ._wsgi import run_wsgi
 from .base import App as BaseApp
 from .path import (
     angle_to_curly,
@@ -38,7 +40,7 @@ from .requests import (
 from .responses import dict_to_headers, make_exception_adapter, make_response_adapter
 from .shorthands import ResponseShorthand, T_co
 from .status import BadRequest, BaseResponse, get_status_code
-from .types import Method, RouteName, RouteTags
+from .types import ClientAddress, Method, RouteName, RouteTags
 
 __all__ = ["App", "DjangoApp"]
 
@@ -84,6 +86,7 @@ class DjangoApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
             by_path_by_method.setdefault(path, {})[method] = v
 
         exc_adapter = make_exception_adapter(self.converter)
+        return_adapter = self._capture_response(_framework_return_adapter)
 
         for path, methods_and_handlers in by_path_by_method.items():
             # Django does not strip the prefix slash, so we do it for it.
@@ -98,7 +101,7 @@ class DjangoApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                 )
                 path_params = parse_angle_path_params(path)
                 hooks = [Hook.for_name(p, None) for p in path_params]
-                base_handler = self.incant.compose(handler, is_async=False)
+                base_handler = self._compose_handler(handler, name, is_async=False)
                 # Detect required content-types here, based on the registered
                 # request loaders.
                 base_sig = signature(base_handler)
@@ -124,7 +127,7 @@ class DjangoApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
                     def adapted(
                         request: WSGIRequest,
-                        _fra=_framework_return_adapter,
+                        _fra=return_adapter,
                         _ea=exc_adapter,
                         _handler=adapted,
                         _path_params=path_params,
@@ -160,7 +163,7 @@ class DjangoApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                     def adapted(
                         request: WSGIRequest,
                         _ra=ra,
-                        _fra=_framework_return_adapter,
+                        _fra=return_adapter,
                         _ea=exc_adapter,
                         _handler=adapted,
                         _path_params=path_params,
@@ -191,6 +194,13 @@ class DjangoApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                         except ResponseException as exc:
                             return _fra(_ea(exc))
 
+                adapted = self._wrap_route(
+                    adapted,
+                    method,
+                    path,
+                    name,
+                    request_header=lambda args, header: args[0].headers.get(header),
+                )
                 per_method_adapted[method] = adapted
 
             if len(methods_and_handlers) > 1:
@@ -217,6 +227,50 @@ class DjangoApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
         return res
 
+    def run(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        threads: int = 8,
+        workers: int = 1,
+        reuse_port: bool = False,
+        keep_alive_timeout: float = 120,
+    ) -> None:
+        """Start serving the app using waitress, until SIGINT or SIGTERM.
+
+        If the Django settings are not configured, they are configured to serve
+        just this app. Otherwise, the configured `ROOT_URLCONF` is served, and it
+        should include the patterns from `to_urlpatterns()`.
+
+        :param threads: The number of threads handling requests, per worker.
+        :param workers: The number of worker processes. With more than one, this
+            process forks the workers and supervises them. Requires a POSIX system.
+        :param reuse_port: With multiple workers, give every worker a socket of its
+            own using `SO_REUSEPORT`, instead of sharing a single socket.
+        :param keep_alive_timeout: How long to keep idle connections open, in
+            seconds.
+        """
+        run_wsgi(
+            self._make_wsgi_app,
+            self.shutdown,
+            host,
+            port,
+            threads,
+            workers,
+            reuse_port,
+            keep_alive_timeout,
+        )
+
+    def _make_wsgi_app(self) -> WSGIHandler:
+        from django.conf import settings
+        from django.core.wsgi import get_wsgi_application
+
+        if not settings.configured:
+            urlconf = ModuleType("uapi_urlconf")
+            urlconf.urlpatterns = self.to_urlpatterns()  # type: ignore[attr-defined]
+            settings.configure(ROOT_URLCONF=urlconf, ALLOWED_HOSTS=["*"])
+        return get_wsgi_application()
+
 
 App: TypeAlias = DjangoApp[FrameworkResponse]
 
@@ -270,6 +324,12 @@ def _make_django_incanter(converter: Converter) -> Incanter:
         return _request.body
 
     res.register_hook(lambda p: p.annotation is ReqBytes, request_bytes)
+
+    def client_address(_request: FrameworkRequest) -> ClientAddress:
+        return ClientAddress(_request.META.get("REMOTE_ADDR") or "")
+
+    res.register_hook(lambda p: p.annotation is ClientAddress, client_address)
+
     res.register_hook_factory(
         is_req_body_attrs, partial(attrs_body_factory, converter=converter)
     )
@@ -11,6 +11,7 @@ from flask import Flask, request
 from flask import Response as FrameworkResponse
 
 from . import ResponseException
+from ._wsgi import run_wsgi
 from .base import App as BaseApp
 from .path import (
     angle_to_curly,
@@ -32,7 +33,7 @@ from .requests import (
 )
 from .responses import dict_to_headers, make_exception_adapter, make_response_adapter
 from .status import BadRequest, BaseResponse, get_status_code
-from .types import Method, RouteName
+from .types import ClientAddress, Method, RouteName
 
 __all__ = ["App", "FlaskApp"]
 
@@ -50,6 +51,7 @@ class FlaskApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
     def to_framework_app(self, import_name: str) -> Flask:
         f = Flask(import_name)
         exc_adapter = make_exception_adapter(self.converter)
+        return_adapter = self._capture_response(_framework_return_adapter)
 
         for (method, path), (handler, name, _) in self._route_map.items():
             ra = make_response_adapter(
@@ -61,7 +63,7 @@ class FlaskApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
             path_params = parse_angle_path_params(path)
             hooks = [Hook.for_name(p, None) for p in path_params]
 
-            base_handler = self.incant.compose(handler, is_async=False)
+            base_handler = self._compose_handler(handler, name, is_async=False)
             # Detect required content-types here, based on the registered
             # request loaders.
             base_sig = signature(base_handler)
@@ -85,7 +87,7 @@ class FlaskApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                 def o0(
                     _handler=adapted,
                     _req_ct=req_ct,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ea=exc_adapter,
                     _rn=name,
                     _rm=method,
@@ -112,7 +114,7 @@ class FlaskApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                 def o1(
                     _handler=adapted,
                     _ra=ra,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _req_ct=req_ct,
                     _ea=exc_adapter,
                     _rn=name,
@@ -135,6 +137,14 @@ class FlaskApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
                 adapted = o1()
 
+            adapted = self._wrap_route(
+                adapted,
+                method,
+                path,
+                name,
+                request_header=lambda _, header: request.headers.get(header),
+            )
+
             f.route(
                 path,
                 methods=[method],
@@ -143,9 +153,37 @@ class FlaskApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
         return f
 
-    def run(self, import_name: str, host: str | None = None, port: int = 8000):
-        """Start serving the app using the Flask development server."""
-        self.to_framework_app(import_name).run(host=host, port=port)
+    def run(
+        self,
+        import_name: str,
+        host: str | None = None,
+        port: int = 8000,
+        threads: int = 8,
+        workers: int = 1,
+        reuse_port: bool = False,
+        keep_alive_timeout: float = 120,
+    ) -> None:
+        """Start serving the app using waitress, until SIGINT or SIGTERM.
+
+        :param host: The host to bind to. Defaults to `127.0.0.1`.
+        :param threads: The number of threads handling requests, per worker.
+        :param workers: The number of worker processes. With more than one, this
+            process forks the workers and supervises them. Requires a POSIX system.
+        :param reuse_port: With multiple workers, give every worker a socket of its
+            own using `SO_REUSEPORT`, instead of sharing a single socket.
+        :param keep_alive_timeout: How long to keep idle connections open, in
+            seconds.
+        """
+        run_wsgi(
+            partial(self.to_framework_app, import_name),
+            self.shutdown,
+            host or "127.0.0.1",
+            port,
+            threads,
+            workers,
+            reuse_port,
+            keep_alive_timeout,
+        )
 
     @staticmethod
     def _path_param_parser(p: str) -> tuple[str, list[str]]:
@@ -190,6 +228,11 @@ def _make_flask_incanter(converter: Converter) -> Incanter:
 
     res.register_hook(lambda p: p.annotation is ReqBytes, request_bytes)
 
+    def client_address() -> ClientAddress:
+        return ClientAddress(request.remote_addr or "")
+
+    res.register_hook(lambda p: p.annotation is ClientAddress, client_address)
+
     res.register_hook_factory(
         is_req_body_attrs, partial(attrs_body_factory, converter=converter)
     )
@@ -0,0 +1,139 @@
+"""Request lifecycle hooks."""
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from inspect import isawaitable, iscoroutinefunction
+from time import perf_counter
+from typing import Any, TypeAlias, TypeVar
+
+from attrs import Factory, define
+
+from .status import BaseResponse
+from .types import Method, RouteName
+
+__all__ = ["ExceptionHook", "LifecycleHooks", "RequestStartHook", "ResponseHook"]
+
+R = TypeVar("R")
+
+#: Called with the route name and method before a request is processed.
+RequestStartHook: TypeAlias = Callable[[RouteName, Method], Any]
+#: Called with the route name, method, processing duration in seconds and response
+#: once a request is processed. The response is `None` if the handler returned a
+#: framework response.
+ResponseHook: TypeAlias = Callable[[RouteName, Method, float, BaseResponse | None], Any]
+#: Called with the route name, method, processing duration in seconds and the
+#: exception when processing a request raises an unhandled exception.
+#: Cancellations, like `asyncio.CancelledError`, don't count as exceptions.
+ExceptionHook: TypeAlias = Callable[[RouteName, Method, float, Exception], Any]
+
+#: Holds the response of the request being processed, if any hooks are registered.
+_response_slot: ContextVar[list[BaseResponse | None] | None] = ContextVar(
+    "uapi_response_slot", default=None
+)
+
+
+@define
+class LifecycleHooks:
+    """The request lifecycle hooks registered on an app."""
+
+    request_start: list[RequestStartHook] = Factory(list)
+    response: list[ResponseHook] = Factory(list)
+    exception: list[ExceptionHook] = Factory(list)
+
+    def __bool__(self) -> bool:
+        return bool(self.request_start or self.response or self.exception)
+
+    def has_async(self) -> bool:
+        """Whether any of the hooks are coroutine functions."""
+        return any(
+            iscoroutinefunction(h)
+            for h in (*self.request_start, *self.response, *self.exception)
+        )
+
+
+def capture_response(
+    framework_return_adapter: Callable[[BaseResponse], R]
+) -> Callable[[BaseResponse], R]:
+    """Wrap a framework return adapter to make responses available to hooks."""
+
+    def capturing_return_adapter(
+        response: BaseResponse, _fra=framework_return_adapter
+    ) -> R:
+        if (slot := _response_slot.get()) is not None:
+            slot[0] = response
+        return _fra(response)
+
+    return capturing_return_adapter
+
+
+def apply_hooks_async(
+    handler: Callable[..., Awaitable[R]],
+    hooks: LifecycleHooks,
+    name: RouteName,
+    method: Method,
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted async handler to run the lifecycle hooks.
+
+    Hooks may be sync or async.
+    """
+    request_start = list(hooks.request_start)
+    response_hooks = list(hooks.response)
+    exception_hooks = list(hooks.exception)
+
+    async def hooked(*args: Any, **kwargs: Any) -> R:
+        for start_hook in request_start:
+            if isawaitable(res := start_hook(name, method)):
+                await res
+        slot: list[BaseResponse | None] = [None]
+        token = _response_slot.set(slot)
+        start = perf_counter()
+        try:
+            resp = await handler(*args, **kwargs)
+        except Exception as exc:
+            duration = perf_counter() - start
+            for exception_hook in exception_hooks:
+                if isawaitable(res := exception_hook(name, method, duration, exc)):
+                    await res
+            raise
+        finally:
+            _response_slot.reset(token)
+        duration = perf_counter() - start
+        for response_hook in response_hooks:
+            if isawaitable(res := response_hook(name, method, duration, slot[0])):
+                await res
+        return resp
+
+    return hooked
+
+
+def apply_hooks_sync(
+    handler: Callable[..., R], hooks: LifecycleHooks, name: RouteName, method: Method
+) -> Callable[..., R]:
+    """Wrap an adapted sync handler to run the lifecycle hooks.
+
+    Hooks must be sync.
+    """
+    request_start = list(hooks.request_start)
+    response_hooks = list(hooks.response)
+    exception_hooks = list(hooks.exception)
+
+    def hooked(*args: Any, **kwargs: Any) -> R:
+        for start_hook in request_start:
+            start_hook(name, method)
+        slot: list[BaseResponse | None] = [None]
+        token = _response_slot.set(slot)
+        start = perf_counter()
+        try:
+            resp = handler(*args, **kwargs)
+        except Exception as exc:
+            duration = perf_counter() - start
+            for exception_hook in exception_hooks:
+                exception_hook(name, method, duration, exc)
+            raise
+        finally:
+            _response_slot.reset(token)
+        duration = perf_counter() - start
+        for response_hook in response_hooks:
+            response_hook(name, method, duration, slot[0])
+        return resp
+
+    return hooked
@@ -0,0 +1,180 @@
+"""App lifecycles: startup and shutdown hooks, and singleton dependencies."""
+from atexit import register as register_atexit
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Generator, Iterator
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+from inspect import (
+    isasyncgenfunction,
+    isawaitable,
+    iscoroutinefunction,
+    isgeneratorfunction,
+    signature,
+)
+from threading import Lock
+from typing import Any, Final, get_args, get_origin
+
+from attrs import Factory, define
+
+__all__ = ["Lifespan", "Singleton"]
+
+_UNSET: Final = object()
+
+
+@define
+class Singleton:
+    """A dependency created once on app startup, and shared by all requests."""
+
+    factory: Callable[[], Any]
+    type: Any
+    value: Any = _UNSET
+
+    def get(self) -> Any:
+        """Fetch the value. This is the dependency registered with the app incanter."""
+        if (val := self.value) is _UNSET:
+            raise Exception(f"Singleton {self.type!r} requested before app startup.")
+        return val
+
+
+def singleton_type(factory: Callable) -> Any:
+    """Derive the singleton type from the return annotation of a factory.
+
+    Generator factories (`Iterator[T]`, `AsyncIterator[T]` and friends) produce
+    singletons of `T`.
+    """
+    t = signature(factory, eval_str=True).return_annotation
+    if t is signature(factory).empty:
+        raise Exception(f"Cannot determine the singleton type of {factory!r}.")
+    if (isgeneratorfunction(factory) or isasyncgenfunction(factory)) and get_origin(
+        t
+    ) in (Iterator, Generator, AsyncIterator, AsyncGenerator):
+        return get_args(t)[0]
+    return t
+
+
+@define
+class Lifespan:
+    """Startup and shutdown hooks, and the singletons living between them.
+
+    On startup, singletons are created in registration order, then the startup hooks
+    run. On shutdown, the shutdown hooks run, and then the singletons are finalized in
+    reverse order.
+
+    Singleton factories may be generators (or async generators, for async apps), in
+    which case the code after the `yield` is run on shutdown.
+    """
+
+    startup_hooks: list[Callable[[], Any]] = Factory(list)
+    shutdown_hooks: list[Callable[[], Any]] = Factory(list)
+    singletons: list[Singleton] = Factory(list)
+    _started: bool = False
+    _exit_stack: ExitStack | AsyncExitStack | None = None
+    _ready: bool = False
+    _exit_registered: bool = False
+    _lock: Lock = Factory(Lock)
+
+    def is_empty(self) -> bool:
+        return not (self.startup_hooks or self.shutdown_hooks or self.singletons)
+
+    async def astartup(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        stack = self._exit_stack = AsyncExitStack()
+        try:
+            for singleton in self.singletons:
+                factory = singleton.factory
+                if isasyncgenfunction(factory):
+                    singleton.value = await stack.enter_async_context(
+                        asynccontextmanager(factory)()
+                    )
+                elif isgeneratorfunction(factory):
+                    singleton.value = stack.enter_context(contextmanager(factory)())
+                elif iscoroutinefunction(factory):
+                    singleton.value = await factory()
+                else:
+                    singleton.value = factory()
+            for hook in self.startup_hooks:
+                if isawaitable(res := hook()):
+                    await res
+        except BaseException:
+            # Finalize whatever got created, but skip the shutdown hooks.
+            self._reset()
+            await stack.aclose()
+            raise
+
+    async def ashutdown(self) -> None:
+        if not self._started:
+            return
+        stack = self._exit_stack
+        try:
+            for hook in self.shutdown_hooks:
+                if isawaitable(res := hook()):
+                    await res
+        finally:
+            self._reset()
+            if isinstance(stack, AsyncExitStack):
+                await stack.aclose()
+
+    def startup(self) -> None:
+        """Like `astartup`, but for sync apps. Async hooks are not supported."""
+        if self._started:
+            return
+        self._started = True
+        stack = self._exit_stack = ExitStack()
+        try:
+            for singleton in self.singletons:
+                factory = singleton.factory
+                if isgeneratorfunction(factory):
+                    singleton.value = stack.enter_context(contextmanager(factory)())
+                elif iscoroutinefunction(factory) or isasyncgenfunction(factory):
+                    raise Exception(f"Sync apps cannot use async factory {factory!r}.")
+                else:
+                    singleton.value = factory()
+            for hook in self.startup_hooks:
+                if isawaitable(res := hook()):
+                    res.close()  # type: ignore[attr-defined]
+                    raise Exception(f"Sync apps cannot use async hook {hook!r}.")
+        except BaseException:
+            self._reset()
+            stack.close()
+            raise
+
+    def start_on_first_request(self, handler: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a sync handler to start the lifespan before the first request, and
+        shut it down on interpreter exit.
+
+        Used by WSGI frameworks, since WSGI has no lifespan protocol. Starting on the
+        first request and not on import means preforking servers create the
+        singletons in every worker, instead of sharing them across the fork.
+        """
+
+        def ensure_started(*args: Any, **kwargs: Any) -> Any:
+            if not self._ready:
+                with self._lock:
+                    if not self._ready:
+                        self.startup()
+                        self._ready = True
+                        if not self._exit_registered:
+                            self._exit_registered = True
+                            register_atexit(self.shutdown)
+            return handler(*args, **kwargs)
+
+        return ensure_started
+
+    def shutdown(self) -> None:
+        if not self._started:
+            return
+        stack = self._exit_stack
+        try:
+            for hook in self.shutdown_hooks:
+                hook()
+        finally:
+            self._reset()
+            if isinstance(stack, ExitStack):
+                stack.close()
+
+    def _reset(self) -> None:
+        self._started = False
+        self._ready = False
+        self._exit_stack = None
+        for singleton in self.singletons:
+            singleton.value = _UNSET
@@ -0,0 +1,174 @@
+"""Concurrency limits (bulkheads) and deadlines for async routes."""
+from asyncio import (
+    CancelledError,
+    Future,
+    Task,
+    create_task,
+    get_running_loop,
+    wait,
+    wait_for,
+)
+from asyncio import TimeoutError as AsyncTimeoutError
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import Any, TypeVar
+
+from attrs import Factory, define
+
+__all__ = ["Cancellations", "ConcurrencyLimiter"]
+
+R = TypeVar("R")
+
+
+@define
+class ConcurrencyLimiter:
+    """Limit the number of requests in flight.
+
+    Requests over the limit wait in a bounded FIFO queue for a free slot.
+    When the queue is full, requests are shed immediately.
+    """
+
+    max_concurrency: int
+    max_queue: int = 0
+    #: The number of requests currently being processed.
+    in_flight: int = 0
+    #: The total number of requests shed due to overload.
+    shed: int = 0
+    _waiters: deque[Future[None]] = Factory(deque)
+
+    @property
+    def queued(self) -> int:
+        """The number of requests currently waiting for a slot."""
+        return len(self._waiters)
+
+    async def wait(self) -> bool:
+        """Wait in the queue for a slot; only call when there are no free slots.
+
+        :return: Whether a slot was acquired. If `False`, the request should be shed.
+        """
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+        fut: Future[None] = get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except CancelledError:
+            if fut.done() and not fut.cancelled():
+                # We were handed a slot right before getting cancelled.
+                self.release()
+            else:
+                with suppress(ValueError):
+                    self._waiters.remove(fut)
+            raise
+        return True
+
+    def release(self) -> None:
+        """Release a slot, handing it over to the next waiter if there is one."""
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+def limit_concurrency(
+    handler: Callable[..., Awaitable[R]],
+    limiter: ConcurrencyLimiter,
+    overload_response: Callable[[], R],
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted handler with a concurrency limiter."""
+
+    async def limited(
+        *args: Any, _h=handler, _l=limiter, _or=overload_response, **kwargs: Any
+    ) -> R:
+        if _l.in_flight < _l.max_concurrency:
+            _l.in_flight += 1
+        elif not await _l.wait():
+            return _or()
+        try:
+            return await _h(*args, **kwargs)
+        finally:
+            _l.release()
+
+    return limited
+
+
+@define
+class Cancellations:
+    """Counters of requests cancelled early on a route."""
+
+    #: Requests cancelled for exceeding their deadline.
+    timeouts: int = 0
+    #: Requests cancelled because the client disconnected.
+    disconnects: int = 0
+
+
+def apply_deadline(
+    handler: Callable[..., Awaitable[R]],
+    timeout: float | None,
+    cancellations: Cancellations,
+    timeout_response: Callable[[], R],
+    is_disconnected: Callable[[Any], Awaitable[bool]] | None = None,
+    poll_interval: float = 0.5,
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted handler to cancel it on timeouts and, optionally, disconnects.
+
+    :param is_disconnected: A coroutine checking whether the client of a request
+        (the first argument to the handler) has disconnected.
+    """
+    if is_disconnected is None:
+
+        async def deadlined(
+            *args: Any,
+            _h=handler,
+            _t=timeout,
+            _c=cancellations,
+            _tr=timeout_response,
+            **kwargs: Any,
+        ) -> R:
+            try:
+                return await wait_for(_h(*args, **kwargs), _t)
+            except AsyncTimeoutError:
+                _c.timeouts += 1
+                return _tr()
+
+        return deadlined
+
+    async def watched(*args: Any, **kwargs: Any) -> R:
+        loop = get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        task: Task[R] = create_task(handler(*args, **kwargs))  # type: ignore[arg-type]
+        try:
+            while True:
+                wait_time = (
+                    poll_interval
+                    if deadline is None
+                    else min(poll_interval, deadline - loop.time())
+                )
+                await wait((task,), timeout=max(wait_time, 0))
+                if task.done():
+                    return task.result()
+                if deadline is not None and loop.time() >= deadline:
+                    cancellations.timeouts += 1
+                    break
+                if await is_disconnected(args[0]):
+                    # The client is gone, so this response will never be read.
+                    cancellations.disconnects += 1
+                    break
+        except CancelledError:
+            task.cancel()
+            raise
+        task.cancel()
+        task.add_done_callback(_consume_result)
+        return timeout_response()
+
+    return watched
+
+
+def _consume_result(task: Task) -> None:
+    """Retrieve the result of a cancelled task, so errors don't get logged."""
+    with suppress(BaseException):
+        task.result()
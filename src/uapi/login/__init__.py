@@ -4,8 +4,13 @@ from typing import Generic, TypeVar
 from attrs import frozen
 
 from .. import ResponseException
-from ..base import AsyncApp
-from ..sessions.redis import AsyncRedisSessionStore, AsyncSession
+from ..base import App, AsyncApp
+from ..sessions.redis import (
+    AsyncRedisSessionStore,
+    AsyncSession,
+    SyncRedisSessionStore,
+    SyncSession,
+)
 from ..status import BaseResponse, Forbidden, Headers
 
 T = TypeVar("T")
@@ -34,13 +39,41 @@ class AsyncLoginSession(Generic[T]):
         The produced headers need to be returned to the user to set the appropriate
         cookies.
         """
-        self._session["user_id"] = str(user_id)
+        (await self._session)["user_id"] = str(user_id)
         return await self._session.update_session(namespace=str(user_id))
 
     async def logout_and_return(self) -> Headers:
         return await self._session.clear_session()
 
 
+@frozen
+class SyncLoginManager(Generic[T]):
+    #: The session store used for the sessions.
+    session_store: SyncRedisSessionStore
+
+    def logout(self, user_id: T) -> None:
+        """Invalidate all sessions of `user_id`."""
+        self.session_store.remove_namespace(str(user_id))
+
+
+@frozen
+class SyncLoginSession(Generic[T]):
+    user_id: T | None
+    _session: SyncSession
+
+    def login_and_return(self, user_id: T) -> Headers:
+        """Set the current session as logged with the given user ID.
+
+        The produced headers need to be returned to the user to set the appropriate
+        cookies.
+        """
+        self._session["user_id"] = str(user_id)
+        return self._session.update_session(namespace=str(user_id))
+
+    def logout_and_return(self) -> Headers:
+        return self._session.clear_session()
+
+
 def configure_async_login(
     app: AsyncApp,
     user_id_cls: type[T],
@@ -53,13 +86,13 @@ def configure_async_login(
         `current_user_id` parameter with this class or `user_id_cls | None`.
     """
 
-    def user_id_factory(session: AsyncSession) -> T:
-        if "user_id" in session:
+    async def user_id_factory(session: AsyncSession) -> T:
+        if "user_id" in await session:
             return user_id_cls(session["user_id"])  # type: ignore
         raise ResponseException(forbidden_response)
 
-    def optional_user_id_factory(session: AsyncSession) -> T | None:
-        if "user_id" in session:
+    async def optional_user_id_factory(session: AsyncSession) -> T | None:
+        if "user_id" in await session:
             return user_id_cls(session["user_id"])  # type: ignore
         return None
 
@@ -84,3 +117,53 @@ def configure_async_login(
         async_login_session_factory,
     )
     return AsyncLoginManager(redis_session_store)
+
+
+def configure_sync_login(
+    app: App,
+    user_id_cls: type[T],
+    session_store: SyncRedisSessionStore,
+    forbidden_response: BaseResponse = Forbidden(None),
+) -> SyncLoginManager[T]:
+    """Configure a sync app, like a Flask or Django app, for handling login sessions.
+
+    This is the sync counterpart of `configure_async_login`, using sessions
+    configured by `uapi.sessions.redis.configure_sync_sessions`. Handlers may
+    declare `current_user_id` and `login_session: SyncLoginSession[user_id_cls]`
+    parameters.
+
+    :param user_id_cls: The class of the user ID. Handlers will need to annotate the
+        `current_user_id` parameter with this class or `user_id_cls | None`.
+    """
+
+    def user_id_factory(session: SyncSession) -> T:
+        if "user_id" in session:
+            return user_id_cls(session["user_id"])  # type: ignore
+        raise ResponseException(forbidden_response)
+
+    def optional_user_id_factory(session: SyncSession) -> T | None:
+        if "user_id" in session:
+            return user_id_cls(session["user_id"])  # type: ignore
+        return None
+
+    def sync_login_session_factory(
+        current_user_id: user_id_cls | None, session: SyncSession  # type: ignore
+    ) -> SyncLoginSession[T]:
+        return SyncLoginSession(current_user_id, session)
+
+    app.incant.register_hook(
+        lambda p: p.name == "current_user_id"
+        and p.annotation == user_id_cls
+        and p.default is Signature.empty,
+        user_id_factory,
+    )
+    app.incant.register_hook(
+        lambda p: p.name == "current_user_id" and p.annotation == user_id_cls | None,
+        optional_user_id_factory,
+    )
+    app.incant.register_hook(
+        lambda p: p.name == "login_session"
+        and p.annotation == SyncLoginSession[user_id_cls],  # type: ignore
+        sync_login_session_factory,
+    )
+    return SyncLoginManager(session_store)
@@ -0,0 +1,268 @@
+"""Per-route request metrics, exposed in the Prometheus text format."""
+from asyncio import CancelledError
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Iterator
+from functools import partial
+from threading import Lock, Thread, current_thread, local
+from time import perf_counter
+from typing import Any, Final, Generic, Protocol, Self, TypeVar
+
+from attrs import Factory, define, field
+
+from .types import Method, RouteName
+
+__all__ = ["DEFAULT_BUCKETS", "Metrics", "RouteMetrics"]
+
+R = TypeVar("R")
+
+#: The default request duration histogram buckets, in seconds.
+DEFAULT_BUCKETS: Final = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+#: The content type of the Prometheus text exposition format.
+PROMETHEUS_CONTENT_TYPE: Final = "text/plain; version=0.0.4; charset=utf-8"
+
+#: The status code recorded for requests cancelled before producing a response,
+#: usually due to the client disconnecting.
+CLIENT_CLOSED_REQUEST: Final = 499
+
+
+@define
+class RouteMetrics:
+    """Request metrics of a route and method."""
+
+    #: The upper bounds of the duration histogram buckets, in seconds.
+    buckets: tuple[float, ...]
+    #: The number of requests being processed.
+    in_flight: int = 0
+    #: The number of processed requests, by response status code.
+    responses: dict[int, int] = Factory(dict)
+    #: The number of processed requests by duration bucket. The last bucket is
+    #: unbounded.
+    duration_counts: list[int] = field(
+        default=Factory(lambda self: [0] * (len(self.buckets) + 1), takes_self=True)
+    )
+    #: The total duration of the processed requests, in seconds.
+    duration_sum: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        """The number of processed requests."""
+        return sum(self.responses.values())
+
+    def observe(self, status: int, duration: float) -> None:
+        """Record a processed request."""
+        self.responses[status] = self.responses.get(status, 0) + 1
+        self.duration_counts[bisect_left(self.buckets, duration)] += 1
+        self.duration_sum += duration
+
+    def merge(self, other: "RouteMetrics") -> None:
+        """Add the metrics of `other` to these."""
+        self.in_flight += other.in_flight
+        for status, count in other.responses.copy().items():
+            self.responses[status] = self.responses.get(status, 0) + count
+        for ix, count in enumerate(other.duration_counts):
+            self.duration_counts[ix] += count
+        self.duration_sum += other.duration_sum
+
+
+class _Mergeable(Protocol):
+    def merge(self, other: Self) -> None:
+        ...
+
+
+K = TypeVar("K")
+V = TypeVar("V", bound=_Mergeable)
+
+
+@define
+class ThreadShards(Generic[K, V]):
+    """A mapping with a shard per thread, for recording without locks.
+
+    Every thread only writes to its own shard; readers merge the shards. The
+    shards of finished threads are folded into a base shard when read, so servers
+    running a thread per request don't pile up shards.
+    """
+
+    factory: Callable[[], V]
+    #: The shards of the threads still running, or not read since they finished.
+    _shards: dict[Thread, dict[K, V]] = Factory(dict)
+    #: The values of finished threads, merged. Values are replaced rather than
+    #: mutated, so readers can use them without locking.
+    _base: dict[K, V] = Factory(dict)
+    _local: local = Factory(local)
+    #: Serializes folding shards into the base shard.
+    _lock: Lock = Factory(Lock)
+
+    def get(self, key: K) -> V:
+        """The value at `key` in the shard of the current thread."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            self._shards[current_thread()] = shard
+        if (res := shard.get(key)) is None:
+            res = shard[key] = self.factory()
+        return res
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """The items of all shards, including duplicate keys."""
+        with self._lock:
+            for thread, shard in list(self._shards.items()):
+                if not thread.is_alive():
+                    # The thread is done writing to its shard.
+                    del self._shards[thread]
+                    for key, value in shard.items():
+                        if (base := self._base.get(key)) is not None:
+                            merged = self.factory()
+                            merged.merge(base)
+                            merged.merge(value)
+                            value = merged
+                        self._base[key] = value
+            shards = [self._base.copy(), *self._shards.values()]
+        for shard in shards:
+            yield from shard.copy().items()
+
+
+@define
+class Metrics:
+    """Request metrics, by route name and method.
+
+    Every thread records into metrics of its own, merged when collected, so
+    recording needs no locks.
+    """
+
+    #: The upper bounds of the duration histogram buckets, in seconds.
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    _shards: ThreadShards[tuple[RouteName, Method], RouteMetrics] = field(
+        default=Factory(
+            lambda self: ThreadShards(partial(RouteMetrics, self.buckets)),
+            takes_self=True,
+        ),
+        init=False,
+    )
+
+    def route_metrics(self, name: RouteName, method: Method) -> RouteMetrics:
+        """The metrics of a route, as recorded by the current thread."""
+        return self._shards.get((name, method))
+
+    def collect(self) -> dict[tuple[RouteName, Method], RouteMetrics]:
+        """Merge the metrics recorded by all threads."""
+        res: dict[tuple[RouteName, Method], RouteMetrics] = {}
+        for key, route_metrics in self._shards.items():
+            if (merged := res.get(key)) is None:
+                merged = res[key] = RouteMetrics(self.buckets)
+            merged.merge(route_metrics)
+        return res
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        collected = sorted(self.collect().items())
+        lines = [
+            "# HELP uapi_requests_total Processed requests.",
+            "# TYPE uapi_requests_total counter",
+        ]
+        for (name, method), m in collected:
+            labels = route_labels(name, method)
+            for status, count in sorted(m.responses.items()):
+                lines.append(
+                    f'uapi_requests_total{{{labels},status="{status}"}} {count}'
+                )
+        lines += [
+            "# HELP uapi_requests_in_flight Requests being processed.",
+            "# TYPE uapi_requests_in_flight gauge",
+        ]
+        for (name, method), m in collected:
+            lines.append(
+                f"uapi_requests_in_flight{{{route_labels(name, method)}}} {m.in_flight}"
+            )
+        lines += [
+            "# HELP uapi_request_duration_seconds Request processing duration.",
+            "# TYPE uapi_request_duration_seconds histogram",
+        ]
+        for (name, method), m in collected:
+            labels = route_labels(name, method)
+            cumulative = 0
+            for bound, count in zip(
+                (*(repr(float(b)) for b in self.buckets), "+Inf"),
+                m.duration_counts,
+                strict=True,
+            ):
+                cumulative += count
+                lines.append(
+                    f'uapi_request_duration_seconds_bucket{{{labels},le="{bound}"}}'
+                    f" {cumulative}"
+                )
+            lines.append(
+                f"uapi_request_duration_seconds_sum{{{labels}}} {m.duration_sum!r}"
+            )
+            lines.append(
+                f"uapi_request_duration_seconds_count{{{labels}}} {cumulative}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(label_value: str) -> str:
+    return label_value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def route_labels(name: RouteName, method: Method) -> str:
+    return f'route="{escape_label(name)}",method="{escape_label(method)}"'
+
+
+def instrument_async(
+    handler: Callable[..., Awaitable[R]],
+    metrics: Metrics,
+    name: RouteName,
+    method: Method,
+    response_status: Callable[[R], int],
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted async handler to record metrics.
+
+    Requests raising errors are recorded as 500s, and cancelled requests as 499s.
+    """
+
+    async def instrumented(*args: Any, **kwargs: Any) -> R:
+        route_metrics = metrics.route_metrics(name, method)
+        route_metrics.in_flight += 1
+        status = 500
+        start = perf_counter()
+        try:
+            res = await handler(*args, **kwargs)
+            status = response_status(res)
+            return res
+        except CancelledError:
+            status = CLIENT_CLOSED_REQUEST
+            raise
+        finally:
+            route_metrics.in_flight -= 1
+            route_metrics.observe(status, perf_counter() - start)
+
+    return instrumented
+
+
+def instrument_sync(
+    handler: Callable[..., R],
+    metrics: Metrics,
+    name: RouteName,
+    method: Method,
+    response_status: Callable[[R], int],
+) -> Callable[..., R]:
+    """Wrap an adapted sync handler to record metrics.
+
+    Requests raising errors are recorded as 500s.
+    """
+
+    def instrumented(*args: Any, **kwargs: Any) -> R:
+        route_metrics = metrics.route_metrics(name, method)
+        route_metrics.in_flight += 1
+        status = 500
+        start = perf_counter()
+        try:
+            res = handler(*args, **kwargs)
+            status = response_status(res)
+            return res
+        finally:
+            route_metrics.in_flight -= 1
+            route_metrics.observe(status, perf_counter() - start)
+
+    return instrumented
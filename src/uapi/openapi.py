@@ -185,7 +185,14 @@ class SchemaBuilder:
     build_rules: list[tuple[Predicate, BuildHook]] = Factory(
         lambda self: self.default_build_rules(), takes_self=True
     )
-    _build_queue: list[type] = field(factory=list, init=False)
+    #: Types waiting to be built, in order. A dict for fast membership tests.
+    _build_queue: dict[type, None] = field(factory=dict, init=False)
+    _taken_names: set[str] = field(
+        default=Factory(lambda self: set(self.names.values()), takes_self=True),
+        init=False,
+    )
+    #: The next counter to try when deduplicating a name.
+    _name_counters: dict[str, int] = field(factory=dict, init=False)
 
     def build_schema_from_rules(self, type: Any) -> AnySchema:
         for pred, hook in self.build_rules:  # noqa: B007
@@ -196,8 +203,7 @@ class SchemaBuilder:
 
         name = self._name_for(type)
         self.components[name] = (r := hook(type, self))
-        if type in self._build_queue:
-            self._build_queue.remove(type)
+        self._build_queue.pop(type, None)
         return r
 
     def get_schema_for_type(
@@ -238,17 +244,19 @@ class SchemaBuilder:
 
         name = self._name_for(type)
         if name not in self.components and type not in self._build_queue:
-            self._build_queue.append(type)
+            self._build_queue[type] = None
         return Reference(f"#/components/schemas/{name}")
 
     def _name_for(self, type: Any) -> str:
         if type not in self.names:
             name = type.__name__ if not is_generic(type) else _make_generic_name(type)
-            counter = 2
-            while name in self.names.values():
-                name = f"{type.__name__}{counter}"
-                counter += 1
+            if name in self._taken_names:
+                counter = self._name_counters.get(type.__name__, 2)
+                while (name := f"{type.__name__}{counter}") in self._taken_names:
+                    counter += 1
+                self._name_counters[type.__name__] = counter + 1
             self.names[type] = name
+            self._taken_names.add(name)
         return self.names[type]
 
     @classmethod
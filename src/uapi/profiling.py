@@ -0,0 +1,167 @@
+"""Sampled memory profiling of request processing, using `tracemalloc`."""
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from random import random
+from threading import Lock
+from typing import Any, TypeVar
+
+from attrs import Factory, define, field
+
+from .types import Method, RouteName
+
+__all__ = ["MemoryProfiler", "RouteMemory"]
+
+R = TypeVar("R")
+
+
+@define
+class RouteMemory:
+    """Memory usage of the profiled requests of a route and method."""
+
+    #: The number of profiled requests.
+    samples: int = 0
+    #: The total memory allocated by the profiled requests and still in use when
+    #: they finished, in bytes. Memory freed by requests makes this smaller.
+    retained: int = 0
+    #: The most memory retained by a single profiled request, in bytes.
+    max_retained: int = 0
+    #: The number of profiled requests with a measured peak. Peaks aren't measured
+    #: while something else is using `tracemalloc`.
+    peak_samples: int = 0
+    #: The total peak memory allocated by the profiled requests, in bytes.
+    peak: int = 0
+    #: The highest peak memory allocated by a single profiled request, in bytes.
+    max_peak: int = 0
+
+    def record(self, retained: int, peak: int | None) -> None:
+        """Record the memory usage of a profiled request."""
+        self.samples += 1
+        self.retained += retained
+        self.max_retained = max(self.max_retained, retained)
+        if peak is not None:
+            self.peak_samples += 1
+            self.peak += peak
+            self.max_peak = max(self.max_peak, peak)
+
+    def report(self) -> dict[str, int]:
+        """The memory usage as a JSON-compatible dictionary."""
+        return {
+            "samples": self.samples,
+            "mean_retained": self.retained // self.samples if self.samples else 0,
+            "max_retained": self.max_retained,
+            "mean_peak": self.peak // self.peak_samples if self.peak_samples else 0,
+            "max_peak": self.max_peak,
+        }
+
+
+@define
+class MemoryProfiler:
+    """Memory profiling of request processing, for a sample of requests.
+
+    For profiled requests, `tracemalloc` traces the memory allocated while the
+    request is processed: loading the request body, running the dependencies and
+    the handler, and serializing the response. The peak shows large temporary
+    objects, and the retained memory shows objects outliving the request, like
+    caches and leaks.
+
+    `tracemalloc` is only tracing while a request is being profiled, so other
+    requests don't pay its overhead. Since tracing is process-wide, only one
+    request is profiled at a time, and allocations by other requests processed
+    concurrently (by other threads, or other tasks when the profiled request is
+    waiting) are attributed to the profiled request. In async apps, that's every
+    request running while the profiled request awaits. This is meant for
+    debugging and canary deployments.
+
+    If something else is already using `tracemalloc`, profiled requests only
+    record their retained memory, and the peak is left to its owner.
+    """
+
+    #: The fraction of requests to profile, between 0 and 1.
+    sample_rate: float = 0.01
+    _routes: dict[tuple[RouteName, Method], RouteMemory] = field(
+        factory=dict, init=False
+    )
+    _lock: Lock = field(default=Factory(Lock), init=False)
+
+    def route_memory(self, name: RouteName, method: Method) -> RouteMemory:
+        """The memory usage of a route."""
+        if (res := self._routes.get((name, method))) is None:
+            res = self._routes.setdefault((name, method), RouteMemory())
+        return res
+
+    def report(self) -> list[dict[str, Any]]:
+        """The memory usage of every profiled route, as JSON-compatible
+        dictionaries, starting with the highest peak."""
+        return sorted(
+            (
+                {"name": name, "method": method, **memory.report()}
+                for (name, method), memory in list(self._routes.items())
+            ),
+            key=lambda r: (-r["max_peak"], r["name"], r["method"]),
+        )
+
+    def _start(self) -> tuple[bool, int] | None:
+        """Start profiling a request, if sampled and no other request is profiled.
+
+        :return: Whether `tracemalloc` was started, and the traced memory before
+            the request.
+        """
+        if random() >= self.sample_rate:  # noqa: S311
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        if tracemalloc.is_tracing():
+            # Someone else is tracing; measure relative to the current memory, and
+            # leave their peak alone.
+            before, _ = tracemalloc.get_traced_memory()
+            return False, before
+        tracemalloc.start()
+        return True, 0
+
+    def _finish(
+        self, name: RouteName, method: Method, started: bool, before: int
+    ) -> None:
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            self.route_memory(name, method).record(
+                current - before, peak if started else None
+            )
+        finally:
+            self._lock.release()
+
+
+def profile_memory_async(
+    handler: Callable[..., Awaitable[R]],
+    profiler: MemoryProfiler,
+    name: RouteName,
+    method: Method,
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted async handler to profile the memory of sampled requests."""
+
+    async def profiled(*args: Any, **kwargs: Any) -> R:
+        if (profiling := profiler._start()) is None:
+            return await handler(*args, **kwargs)
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            profiler._finish(name, method, *profiling)
+
+    return profiled
+
+
+def profile_memory_sync(
+    handler: Callable[..., R], profiler: MemoryProfiler, name: RouteName, method: Method
+) -> Callable[..., R]:
+    """Wrap an adapted sync handler to profile the memory of sampled requests."""
+
+    def profiled(*args: Any, **kwargs: Any) -> R:
+        if (profiling := profiler._start()) is None:
+            return handler(*args, **kwargs)
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            profiler._finish(name, method, *profiling)
+
+    return profiled
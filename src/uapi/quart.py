@@ -3,6 +3,7 @@ from collections.abc import Callable, Coroutine
 from contextlib import suppress
 from functools import partial
 from inspect import Signature, signature
+from socket import socket
 from typing import Any, ClassVar, Generic, TypeAlias, TypeVar
 
 from attrs import Factory, define
@@ -14,6 +15,7 @@ from quart import Quart, request
 from quart import Response as FrameworkResponse
 
 from . import ResponseException
+from ._workers import supervise
 from .base import AsyncApp as BaseApp
 from .path import (
     angle_to_curly,
@@ -36,7 +38,7 @@ from .requests import (
 from .responses import dict_to_headers, make_exception_adapter, make_response_adapter
 from .shorthands import ResponseShorthand, T_co
 from .status import BadRequest, BaseResponse, get_status_code
-from .types import Method, RouteName
+from .types import ClientAddress, Method, RouteName
 
 __all__ = ["App", "QuartApp"]
 
@@ -69,7 +71,10 @@ class QuartApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
     def to_framework_app(self, import_name: str) -> Quart:
         q = Quart(import_name)
+        q.before_serving(self.startup)
+        q.after_serving(self.shutdown)
         exc_adapter = make_exception_adapter(self.converter)
+        return_adapter = self._capture_response(_framework_return_adapter)
 
         for (method, path), (handler, name, _) in self._route_map.items():
             ra = make_response_adapter(
@@ -81,7 +86,7 @@ class QuartApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
             path_params = parse_angle_path_params(path)
             hooks = [Hook.for_name(p, None) for p in path_params]
 
-            base_handler = self.incant.compose(handler, is_async=True)
+            base_handler = self._compose_handler(handler, name, is_async=True)
             # Detect required content-types here, based on the registered
             # request loaders.
             base_sig = signature(base_handler)
@@ -103,7 +108,7 @@ class QuartApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                 def o0(
                     handler=adapted,
                     _req_ct=req_ct,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ea=exc_adapter,
                     _rn=name,
                     _rm=method,
@@ -129,7 +134,7 @@ class QuartApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
                 def o1(
                     handler=adapted,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ra=ra,
                     _req_ct=req_ct,
                     _ea=exc_adapter,
@@ -153,6 +158,15 @@ class QuartApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
                 adapted = o1()
 
+            adapted = self._wrap_route(
+                adapted,
+                method,
+                path,
+                name,
+                return_adapter,
+                request_header=lambda _, header: request.headers.get(header),
+            )
+
             q.route(
                 path,
                 methods=[method],
@@ -168,13 +182,41 @@ class QuartApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
         port: int = 8000,
         handle_signals: bool = True,
         log_level: str | int | None = None,
+        workers: int = 1,
+        reuse_port: bool = False,
     ) -> None:
         """Start serving this app using uvicorn.
 
         Cancel the task running this to shut down uvicorn.
+
+        :param workers: The number of worker processes. With more than one, this
+            process forks the workers and supervises them, restarting crashed
+            workers and shutting them down gracefully. Requires a POSIX system.
+        :param reuse_port: With multiple workers, give every worker a socket of its
+            own using `SO_REUSEPORT`, instead of sharing a single socket.
         """
         from uvicorn import Config, Server
 
+        if workers > 1:
+
+            async def serve_worker(sock: socket) -> None:
+                config = Config(
+                    self.to_framework_app(import_name),
+                    access_log=False,
+                    log_level=log_level,
+                )
+                await Server(config=config).serve(sockets=[sock])
+
+            await supervise(
+                serve_worker,
+                workers,
+                host,
+                port,
+                reuse_port=reuse_port,
+                handle_signals=handle_signals,
+            )
+            return
+
         config = Config(
             self.to_framework_app(import_name),
             host=host,
@@ -245,6 +287,11 @@ def _make_quart_incanter(converter: Converter) -> Incanter:
 
     res.register_hook(lambda p: p.annotation is ReqBytes, request_bytes)
 
+    def client_address() -> ClientAddress:
+        return ClientAddress(request.remote_addr or "")
+
+    res.register_hook(lambda p: p.annotation is ClientAddress, client_address)
+
     res.register_hook_factory(
         is_req_body_attrs, partial(attrs_body_factory, converter=converter)
     )
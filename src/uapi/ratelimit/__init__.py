@@ -0,0 +1,247 @@
+"""Token bucket rate limits."""
+from collections import OrderedDict
+from collections.abc import Callable, Collection
+from datetime import timedelta
+from inspect import Parameter, Signature
+from math import ceil
+from time import monotonic
+from typing import Annotated, Protocol, TypeVar
+
+from attrs import Factory, define, evolve, frozen
+from incant import Hook
+
+from ..base import AsyncApp, RouteDependency
+from ..openapi import Response
+from ..requests import HeaderSpec
+from ..responses import ResponseException
+from ..status import BaseResponse, TooManyRequests
+from ..types import ClientAddress, RouteName
+
+__all__ = [
+    "AsyncRateLimiter",
+    "InMemoryRateLimitBackend",
+    "RateLimit",
+    "RateLimitBackend",
+    "by_client_address",
+    "by_header",
+    "by_route",
+    "by_user_id",
+    "configure_async_rate_limit",
+]
+
+T = TypeVar("T")
+
+
+@frozen
+class RateLimit:
+    """A token bucket.
+
+    Every request takes a token from the bucket, and requests finding the bucket
+    empty are rejected. The bucket holds up to `burst` tokens, and is refilled at
+    `rate` tokens per second.
+    """
+
+    #: Tokens added to the bucket per second.
+    rate: float
+    #: The capacity of the bucket.
+    burst: int
+
+    @classmethod
+    def per(
+        cls, requests: int, period: timedelta, burst: int | None = None
+    ) -> "RateLimit":
+        """Allow `requests` requests per `period`, on average.
+
+        :param burst: The number of requests allowed in quick succession. Defaults to
+            `requests`.
+        """
+        return cls(
+            requests / period.total_seconds(), burst if burst is not None else requests
+        )
+
+    def describe(self) -> str:
+        return f"{self.rate:g} requests per second, bursting to {self.burst}"
+
+
+class RateLimitBackend(Protocol):
+    async def consume(self, key: str, limit: RateLimit) -> float:
+        """Take a token from the bucket at `key`.
+
+        :return: 0 if a token was taken, otherwise the number of seconds until a
+            token becomes available.
+        """
+        ...
+
+
+@define
+class InMemoryRateLimitBackend:
+    """A rate limit backend keeping the buckets in process memory.
+
+    Buckets are not shared between processes, so every worker process enforces its
+    own limits.
+
+    Updating a bucket is O(1). The least recently used buckets are evicted once
+    there are more than `max_buckets`; an evicted bucket starts over as full.
+    """
+
+    max_buckets: int = 100_000
+    #: The buckets, as lists of the token count and the time of the last update.
+    _buckets: OrderedDict[str, list[float]] = Factory(OrderedDict)
+
+    async def consume(self, key: str, limit: RateLimit) -> float:
+        now = monotonic()
+        buckets = self._buckets
+        if (bucket := buckets.get(key)) is None:
+            buckets[key] = [limit.burst - 1, now]
+            if len(buckets) > self.max_buckets:
+                buckets.popitem(last=False)
+            return 0
+        buckets.move_to_end(key)
+        tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0
+        bucket[0] = tokens
+        return (1 - tokens) / limit.rate
+
+
+@frozen
+class AsyncRateLimiter:
+    """A rate limit configured on an app, by `configure_async_rate_limit`."""
+
+    #: The rate limit being enforced.
+    limit: RateLimit
+    #: The backend storing the buckets.
+    backend: RateLimitBackend
+    #: The routes the limit applies to. `None` means all routes.
+    routes: frozenset[RouteName] | None
+
+
+def by_route() -> str:
+    """Share a single bucket between all clients of a route."""
+    return ""
+
+
+def by_client_address(client_address: ClientAddress) -> str:
+    """Use a bucket per client address."""
+    return client_address
+
+
+def by_header(name: str) -> Callable[..., str]:
+    """Use a bucket per value of the header `name`, like an API key.
+
+    Requests without the header share a bucket.
+    """
+
+    def header_key(header: str | None) -> str:
+        return header or ""
+
+    # Parameters are merged by name during composition, so every header gets a
+    # parameter name of its own.
+    header_key.__signature__ = Signature(  # type: ignore[attr-defined]
+        [
+            Parameter(
+                f"_rate_limit_{name.lower().replace('-', '_')}",
+                Parameter.POSITIONAL_OR_KEYWORD,
+                default=None,
+                annotation=Annotated[str | None, HeaderSpec(name)],
+            )
+        ],
+        return_annotation=str,
+    )
+    return header_key
+
+
+def by_user_id(user_id_cls: type[T]) -> Callable[..., str]:
+    """Use a bucket per user ID, as set up by `uapi.login.configure_async_login`.
+
+    Anonymous requests use a bucket per client address.
+    """
+
+    def user_id_key(
+        current_user_id: user_id_cls | None, client_address: ClientAddress  # type: ignore
+    ) -> str:
+        if current_user_id is None:
+            return f"anon:{client_address}"
+        return f"user:{current_user_id}"
+
+    return user_id_key
+
+
+def configure_async_rate_limit(
+    app: AsyncApp,
+    limit: RateLimit,
+    key: Callable[..., str] = by_client_address,
+    backend: RateLimitBackend | None = None,
+    routes: Collection[str] | None = None,
+    rejected_response: BaseResponse = TooManyRequests(None),
+    key_prefix: str = "",
+) -> AsyncRateLimiter:
+    """
+    Configure a token bucket rate limit for an app.
+
+    Every request to a limited route is checked before the handler runs, and is
+    rejected with `rejected_response` if over the limit. The rejection includes a
+    `Retry-After` header.
+
+    Buckets are per route, and further keyed by the result of `key`. `key` is a
+    dependency, so it can use anything a handler can (headers, cookies, the current
+    user ID...). Use `by_route`, `by_client_address`, `by_header` or `by_user_id`,
+    or provide your own.
+
+    This function can be called multiple times to apply several limits. When
+    several limits apply to the same routes with the same `key`, they need
+    different `key_prefix` values.
+
+    The limits are documented in the OpenAPI spec of the app.
+
+    :param backend: The backend storing the buckets. Defaults to a new
+        `InMemoryRateLimitBackend`.
+    :param routes: The names of the routes to limit. `None` means all routes.
+    :param rejected_response: The response for requests over the limit.
+    :param key_prefix: The prefix of the bucket keys.
+    """
+    if backend is None:
+        backend = InMemoryRateLimitBackend()
+    route_names = (
+        frozenset(RouteName(r) for r in routes) if routes is not None else None
+    )
+
+    # Rejections are rendered once per `Retry-After` value.
+    rejections: dict[int, BaseResponse] = {}
+
+    def rejected(wait: float) -> ResponseException:
+        retry_after = max(1, ceil(wait))
+        if (response := rejections.get(retry_after)) is None:
+            response = rejections[retry_after] = evolve(
+                rejected_response,
+                headers=rejected_response.headers | {"retry-after": str(retry_after)},
+            )
+        return ResponseException(response)
+
+    def dependency_factory(route_name: RouteName) -> Callable | None:
+        if route_names is not None and route_name not in route_names:
+            return None
+        bucket_prefix = f"{key_prefix}{route_name}:"
+
+        async def check_rate_limit(_rate_limit_key: str) -> None:
+            if wait := await backend.consume(bucket_prefix + _rate_limit_key, limit):
+                raise rejected(wait)
+
+        return app.incant.compose(
+            check_rate_limit, [Hook.for_name("_rate_limit_key", key)], is_async=True
+        )
+
+    app._route_dependencies.append(
+        RouteDependency(
+            dependency_factory,
+            {
+                str(rejected_response.status_code()): Response(
+                    f"Too Many Requests (limit: {limit.describe()})"
+                )
+            },
+        )
+    )
+
+    return AsyncRateLimiter(limit, backend, route_names)
@@ -0,0 +1,58 @@
+"""Redis backends for rate limits."""
+from typing import TYPE_CHECKING, Final
+
+from attrs import frozen
+
+from .._redis import Script
+from . import RateLimit
+
+if TYPE_CHECKING:
+    from aioredis import Redis
+
+__all__ = ["AsyncRedisRateLimitBackend"]
+
+#: Refills and takes a token from the bucket at `KEYS[1]`, using the Redis clock.
+#: `ARGV` holds the rate and the burst. Returns the wait until a token is
+#: available, as a string since Lua numbers are truncated to integers in replies.
+BUCKET_SCRIPT: Final = """
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+_BUCKET: Final = Script(BUCKET_SCRIPT)
+
+
+@frozen
+class AsyncRedisRateLimitBackend:
+    """A rate limit backend keeping the buckets in Redis, shared between processes.
+
+    Every check is a single atomic round trip, running a script cached by Redis.
+    Buckets expire once they would be full again.
+
+    This backend requires an [aioredis 1.3](https://pypi.org/project/aioredis/1.3.1/)
+    connection pool.
+    """
+
+    _redis: "Redis"
+    _key_prefix: str = "rl:"
+
+    async def consume(self, key: str, limit: RateLimit) -> float:
+        res = await _BUCKET.run_aioredis(
+            self._redis, [self._key_prefix + key], [limit.rate, limit.burst]
+        )
+        return float(res)
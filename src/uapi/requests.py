@@ -1,4 +1,5 @@
 from collections.abc import Callable
+from functools import partial
 from inspect import Parameter
 from typing import Annotated, Any, NewType, TypeAlias, TypeVar
 
@@ -7,8 +8,9 @@ from cattrs import Converter
 from cattrs._compat import get_args, is_annotated
 from orjson import loads
 
-from . import Cookie
+from . import Cookie, timing
 from .status import BadRequest, BaseResponse, ResponseException
+from .timing import load_and_structure
 
 T = TypeVar("T")
 RequestLoaderPredicate: TypeAlias = Callable[[Parameter], bool]
@@ -109,10 +111,13 @@ def attrs_body_factory(
     parameter: Parameter, converter: Converter
 ) -> Callable[[ReqBytes], Any]:
     attrs_cls, loader = get_req_body_attrs(parameter)
+    structure = partial(converter.structure, cl=attrs_cls)
 
     def structure_body(body: ReqBytes) -> Any:
         try:
-            return converter.structure(loads(body), attrs_cls)
+            if not timing._recorder_pushed:
+                return converter.structure(loads(body), attrs_cls)
+            return load_and_structure(body, structure)
         except Exception as exc:
             raise ResponseException(loader.error_handler(exc, body)) from exc
 
@@ -7,10 +7,10 @@ from attrs import has
 from cattrs import Converter
 from cattrs._compat import is_union_type
 from incant import is_subclass
-from orjson import dumps
 
 from .shorthands import ResponseShorthand, can_shorthand_handle
 from .status import BaseResponse, Headers, ResponseException
+from .timing import unstructure_and_dump
 
 empty_dict: Mapping[str, str] = MappingProxyType({})
 
@@ -42,7 +42,9 @@ def make_response_adapter(
         inner := return_type.__args__[0]
     ):
         return lambda r: return_type(
-            dumps(converter.unstructure(r.ret, unstructure_as=inner)),
+            unstructure_and_dump(
+                r.ret, lambda v: converter.unstructure(v, unstructure_as=inner)
+            ),
             r.headers | {"content-type": "application/json"},
         )
 
@@ -74,7 +76,9 @@ def _make_union_response_adapter(
     if not shorthand_checks:
         # No shorthands, it's all BaseResponses.
         return lambda val: val.__class__(
-            ret=dumps(converter.unstructure(val.ret)) if val.ret is not None else None,
+            ret=unstructure_and_dump(val.ret, converter.unstructure)
+            if val.ret is not None
+            else None,
             headers=val.headers | {"content-type": "application/json"},
         )
 
@@ -83,7 +87,9 @@ def _make_union_response_adapter(
             if is_union_member(val):
                 return ra(val)
         return val.__class__(
-            dumps(converter.unstructure(val.ret)) if val.ret is not None else None,
+            unstructure_and_dump(val.ret, converter.unstructure)
+            if val.ret is not None
+            else None,
             val.headers | {"content-type": "application/json"},
         )
 
@@ -103,7 +109,7 @@ def make_exception_adapter(
         if isinstance(exc.response.ret, str | bytes | None):
             return exc.response
         return exc.response.__class__(
-            dumps(converter.unstructure(exc.response.ret)),
+            unstructure_and_dump(exc.response.ret, converter.unstructure),
             {"content-type": "application/json"} | exc.response.headers,
         )
 
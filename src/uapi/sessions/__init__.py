@@ -1,7 +1,18 @@
-from collections.abc import Callable
-from typing import Annotated, TypeVar
+import zlib
+from asyncio import gather, sleep
+from bisect import bisect
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from hashlib import blake2b
+from math import ceil
+from threading import Lock
+from time import monotonic, time
+from typing import Annotated, Any, Generic, Protocol, TypeVar, runtime_checkable
 
-from itsdangerous import BadSignature, URLSafeTimedSerializer
+from attrs import Factory, define, frozen
+from itsdangerous import SignatureExpired, URLSafeTimedSerializer
+from itsdangerous.encoding import base64_encode
+from itsdangerous.url_safe import URLSafeSerializerMixin
 
 from .. import Cookie
 from ..base import App, AsyncApp
@@ -11,11 +22,489 @@ from ..status import Headers
 T1 = TypeVar("T1")
 T2 = TypeVar("T2")
 
+#: A session key: the namespace and the session ID.
+_Key = tuple[str, str]
+
+
+@runtime_checkable
+class AsyncSessionBackend(Protocol):
+    """Storage for server-side sessions.
+
+    Sessions are payloads stored by namespace and ID, expiring after a TTL.
+    Namespaces group sessions, so they can be removed together.
+    """
+
+    async def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        """Fetch a session.
+
+        :param with_ttl: Whether to fetch the remaining TTL of the session too.
+        :return: The payload, or `None` if the session does not exist, and the
+            remaining TTL in seconds if requested, otherwise `None`.
+        """
+        ...
+
+    async def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        """Store a session, keeping the remaining TTL of existing sessions.
+
+        :param payload: The payload, or `None` to only refresh the TTL of an
+            existing session.
+        :param ttl: The TTL of new sessions, in seconds.
+        :param reset_ttl: Whether to reset the TTL of existing sessions to `ttl`.
+        :return: Whether the session was stored. Refreshing a missing session fails.
+        """
+        ...
+
+    async def delete_session(self, namespace: str, id: str) -> None:
+        ...
+
+    async def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        """Remove all sessions in a namespace, `chunk_size` sessions at a time."""
+        ...
+
+    async def sweep(self, batch_size: int = 100) -> int:
+        """Remove expired sessions from their namespaces.
+
+        :return: The number of expired sessions removed.
+        """
+        ...
+
+
+@runtime_checkable
+class SyncSessionBackend(Protocol):
+    """Like `AsyncSessionBackend`, but synchronous, for sync apps.
+
+    Backends need to be thread-safe.
+    """
+
+    def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        ...
+
+    def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        ...
+
+    def delete_session(self, namespace: str, id: str) -> None:
+        ...
+
+    def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        ...
+
+    def sweep(self, batch_size: int = 100) -> int:
+        ...
+
+
+@define
+class _InMemorySessions:
+    """The in-memory session storage, shared by the async and sync backends."""
+
+    max_sessions: int = 100_000
+    #: The number of slots of the timer wheel. Sessions expiring further in the
+    #: future stay in their slot for multiple rotations.
+    wheel_slots: int = 4096
+    #: The monotonic clock expiry times are measured on, in seconds.
+    clock: Callable[[], float] = monotonic
+    #: The payloads and expiry times of the sessions, least recently used first.
+    _sessions: OrderedDict[_Key, tuple[str | bytes, float]] = Factory(OrderedDict)
+    #: The session IDs by namespace.
+    _namespaces: dict[str, set[str]] = Factory(dict)
+    _wheel: list[set[_Key]] = Factory(
+        lambda self: [set() for _ in range(self.wheel_slots)], takes_self=True
+    )
+    #: The last second the wheel was advanced to.
+    _wheel_second: int = Factory(lambda self: int(self.clock()), takes_self=True)
+
+    def _advance(self, now: float) -> int:
+        """Advance the wheel to `now`, removing expired sessions."""
+        second = int(now)
+        start = self._wheel_second
+        if second <= start:
+            return 0
+        self._wheel_second = second
+        slots = self.wheel_slots
+        removed = 0
+        # The slot of the last second is checked again, for sessions that expired
+        # later during that second.
+        for tick in range(max(start, second - slots + 1), second + 1):
+            slot = self._wheel[tick % slots]
+            for key in [k for k in slot if self._sessions[k][1] <= now]:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def _schedule(self, key: _Key, expires_at: float) -> None:
+        self._wheel[int(expires_at) % self.wheel_slots].add(key)
+
+    def _remove(self, key: _Key) -> None:
+        _, expires_at = self._sessions.pop(key)
+        self._wheel[int(expires_at) % self.wheel_slots].discard(key)
+        namespace, id = key
+        ids = self._namespaces[namespace]
+        ids.discard(id)
+        if not ids:
+            del self._namespaces[namespace]
+
+    def _load(
+        self, namespace: str, id: str, with_ttl: bool
+    ) -> tuple[str | bytes | None, int | None]:
+        now = self.clock()
+        self._advance(now)
+        key = (namespace, id)
+        if (session := self._sessions.get(key)) is None or session[1] <= now:
+            return None, None
+        self._sessions.move_to_end(key)
+        return session[0], ceil(session[1] - now) if with_ttl else None
+
+    def _save(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool,
+    ) -> bool:
+        now = self.clock()
+        self._advance(now)
+        key = (namespace, id)
+        if (existing := self._sessions.get(key)) is not None:
+            if existing[1] <= now:
+                self._remove(key)
+                existing = None
+            else:
+                self._wheel[int(existing[1]) % self.wheel_slots].discard(key)
+        if existing is None:
+            if payload is None:
+                return False
+            expires_at = now + ttl
+        else:
+            expires_at = now + ttl if reset_ttl else existing[1]
+            if payload is None:
+                payload = existing[0]
+        self._sessions[key] = (payload, expires_at)
+        self._sessions.move_to_end(key)
+        self._schedule(key, expires_at)
+        self._namespaces.setdefault(namespace, set()).add(id)
+        while len(self._sessions) > self.max_sessions:
+            self._remove(next(iter(self._sessions)))
+        return True
+
+    def _delete(self, namespace: str, id: str) -> None:
+        if (namespace, id) in self._sessions:
+            self._remove((namespace, id))
+
+    def _namespace_chunks(self, namespace: str, chunk_size: int) -> list[list[str]]:
+        ids = list(self._namespaces.get(namespace, ()))
+        return [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+
+@define
+class InMemorySessionBackend(_InMemorySessions):
+    """A session backend keeping sessions in process memory.
+
+    Sessions are not shared between processes, so this backend is suited for
+    single-process deployments and tests.
+
+    The least recently used sessions are evicted once there are more than
+    `max_sessions`. Expired sessions are removed by a hashed timer wheel with
+    one-second slots, advanced on every operation, so expiring sessions costs
+    O(1) per session.
+    """
+
+    async def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        return self._load(namespace, id, with_ttl)
+
+    async def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        return self._save(namespace, id, payload, ttl, reset_ttl)
+
+    async def delete_session(self, namespace: str, id: str) -> None:
+        self._delete(namespace, id)
+
+    async def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        for chunk in self._namespace_chunks(namespace, chunk_size):
+            for id in chunk:
+                self._delete(namespace, id)
+            # Let other tasks run between chunks.
+            await sleep(0)
+
+    async def sweep(self, batch_size: int = 100) -> int:
+        return self._advance(self.clock())
+
+
+@define
+class SyncInMemorySessionBackend(_InMemorySessions):
+    """Like `InMemorySessionBackend`, but synchronous, for sync apps.
+
+    Operations are serialized using a lock, so the backend can be shared by the
+    threads of the server.
+    """
+
+    _lock: Lock = Factory(Lock)
+
+    def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        with self._lock:
+            return self._load(namespace, id, with_ttl)
+
+    def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        with self._lock:
+            return self._save(namespace, id, payload, ttl, reset_ttl)
+
+    def delete_session(self, namespace: str, id: str) -> None:
+        with self._lock:
+            self._delete(namespace, id)
+
+    def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        with self._lock:
+            chunks = self._namespace_chunks(namespace, chunk_size)
+        for chunk in chunks:
+            # Other threads get the lock between chunks.
+            with self._lock:
+                for id in chunk:
+                    self._delete(namespace, id)
+
+    def sweep(self, batch_size: int = 100) -> int:
+        with self._lock:
+            return self._advance(self.clock())
+
+
+def _ring_hash(key: str) -> int:
+    # Stable across processes, unlike `hash()`.
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+@frozen
+class _HashRing(Generic[T1]):
+    """A consistent hash ring, assigning keys to named nodes.
+
+    Every node is placed on the ring `replicas` times, by name. Adding or removing
+    a node only moves the keys of that node.
+    """
+
+    _points: list[int]
+    _nodes: list[T1]
+
+    @classmethod
+    def of(cls, nodes: Mapping[str, T1], replicas: int) -> "_HashRing[T1]":
+        if not nodes:
+            raise ValueError("At least one node is required.")
+        ring = sorted(
+            (_ring_hash(f"{name}#{i}"), name) for name in nodes for i in range(replicas)
+        )
+        return cls([point for point, _ in ring], [nodes[name] for _, name in ring])
+
+    def get(self, key: str) -> T1:
+        i = bisect(self._points, _ring_hash(key))
+        return self._nodes[i % len(self._nodes)]
+
+
+@define
+class _Shards(Generic[T1]):
+    #: The shards, by name. The names place the shards on the hash ring, so they
+    #: need to stay the same across deployments.
+    shards: Mapping[str, T1]
+    #: The number of points of every shard on the hash ring. More points spread
+    #: the namespaces more evenly.
+    replicas: int = 100
+    _ring: _HashRing[T1] = Factory(
+        lambda self: _HashRing.of(self.shards, self.replicas), takes_self=True
+    )
+
+    def get_shard(self, namespace: str) -> T1:
+        """The shard holding the sessions of a non-empty namespace."""
+        return self._ring.get(namespace)
+
+    def get_session_shard(self, namespace: str, id: str) -> T1:
+        """The shard holding a session.
+
+        Sessions without a namespace, like those of anonymous users, are spread
+        over the shards by ID instead of all landing on a single shard.
+        """
+        return self._ring.get(namespace or id)
+
+
+@define
+class ShardedSessionBackend(_Shards[AsyncSessionBackend]):
+    """A session backend spreading sessions over several backends, like
+    independent Redis nodes.
+
+    Namespaces are assigned to shards using consistent hashing on the client, so
+    all sessions of a namespace live on the same shard, and adding or removing a
+    shard only moves the namespaces of that shard. Sessions without a namespace
+    are assigned by session ID instead. Moved sessions are lost.
+    """
+
+    async def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        shard = self.get_session_shard(namespace, id)
+        return await shard.load_session(namespace, id, with_ttl)
+
+    async def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        return await self.get_session_shard(namespace, id).save_session(
+            namespace, id, payload, ttl, reset_ttl
+        )
+
+    async def delete_session(self, namespace: str, id: str) -> None:
+        await self.get_session_shard(namespace, id).delete_session(namespace, id)
+
+    async def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        if namespace:
+            await self.get_shard(namespace).remove_namespace(namespace, chunk_size)
+        else:
+            await gather(
+                *[
+                    s.remove_namespace(namespace, chunk_size)
+                    for s in self.shards.values()
+                ]
+            )
+
+    async def sweep(self, batch_size: int = 100) -> int:
+        """Sweep all shards concurrently."""
+        return sum(await gather(*[s.sweep(batch_size) for s in self.shards.values()]))
+
+
+@define
+class SyncShardedSessionBackend(_Shards[SyncSessionBackend]):
+    """Like `ShardedSessionBackend`, but synchronous, for sync apps."""
+
+    def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        shard = self.get_session_shard(namespace, id)
+        return shard.load_session(namespace, id, with_ttl)
+
+    def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        return self.get_session_shard(namespace, id).save_session(
+            namespace, id, payload, ttl, reset_ttl
+        )
+
+    def delete_session(self, namespace: str, id: str) -> None:
+        self.get_session_shard(namespace, id).delete_session(namespace, id)
+
+    def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        if namespace:
+            self.get_shard(namespace).remove_namespace(namespace, chunk_size)
+        else:
+            for shard in self.shards.values():
+                shard.remove_namespace(namespace, chunk_size)
+
+    def sweep(self, batch_size: int = 100) -> int:
+        return sum(s.sweep(batch_size) for s in self.shards.values())
+
+
+class _SessionSerializer(URLSafeTimedSerializer):
+    """Compresses payloads of at least `compress_threshold` bytes, if it makes them
+    smaller.
+
+    The stock serializer tries compressing every payload.
+    """
+
+    compress_threshold: int | None = 256
+
+    def dump_payload(self, obj: Any) -> bytes:
+        # Skipping the compression of `URLSafeSerializerMixin`.
+        json = super(URLSafeSerializerMixin, self).dump_payload(obj)
+        if self.compress_threshold is not None and len(json) >= self.compress_threshold:
+            compressed = zlib.compress(json)
+            if len(compressed) < len(json) - 1:
+                return b"." + base64_encode(compressed)
+        return base64_encode(json)
+
+
+@define
+class _VerifiedCookies:
+    """A bounded LRU of verified session cookies, to their data and expiry times."""
+
+    max_size: int
+    #: The data and expiry time of cookies, least recently used first.
+    _cookies: OrderedDict[str, tuple[dict[str, str], float | None]] = Factory(
+        OrderedDict
+    )
+    # Sync apps serve requests from multiple threads.
+    _lock: Lock = Factory(Lock)
+
+    def get(self, cookie: str) -> dict[str, str] | None:
+        with self._lock:
+            if (entry := self._cookies.get(cookie)) is None:
+                return None
+            data, expires_at = entry
+            if expires_at is not None and expires_at <= time():
+                del self._cookies[cookie]
+                return None
+            self._cookies.move_to_end(cookie)
+            return data
+
+    def add(self, cookie: str, data: dict[str, str], expires_at: float | None) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._cookies[cookie] = (data, expires_at)
+            self._cookies.move_to_end(cookie)
+            while len(self._cookies) > self.max_size:
+                self._cookies.popitem(last=False)
+
 
 class Session(dict[str, str]):
     _serialize: Callable
+    #: The data as loaded or last updated, to skip updating unchanged sessions.
+    _unchanged: dict[str, str]
 
     def update_session(self) -> Headers:
+        """Sign the session into a cookie.
+
+        :return: The headers setting the session cookie, to be returned with the
+            response. Empty if the session is unchanged, keeping the current cookie.
+        """
+        if self == self._unchanged:
+            return {}
+        self._unchanged = dict(self)
         name, val, *settings = self._serialize(self)
         return set_cookie(name, val, settings=CookieSettings(*settings))
 
@@ -26,39 +515,66 @@ def configure_secure_sessions(
     cookie_name: str = "session",
     salt: str = "cookie-session",
     settings: CookieSettings = CookieSettings(max_age=2678400),
+    cache_size: int = 1024,
+    compress_threshold: int | None = 256,
 ):
-    s = URLSafeTimedSerializer(secret_key=secret_key, salt=salt)
+    """Configure sessions stored in signed cookies.
+
+    Verified cookies are cached, so requests repeating a cookie don't verify and
+    decode it again. Sessions expire after `settings.max_age`.
+
+    :param cache_size: The maximum number of verified cookies cached. 0 disables
+        the cache.
+    :param compress_threshold: The minimum size of the JSON payload, in bytes, for
+        compressing it using zlib. `None` disables compression.
+    """
+    s = _SessionSerializer(secret_key=secret_key, salt=salt)
+    s.compress_threshold = compress_threshold
+    cache = _VerifiedCookies(cache_size)
+    max_age = settings.max_age
 
     def _serialize(self):
+        if not self:
+            return (cookie_name, None)
+        cookie = s.dumps(self)
+        cache.add(
+            cookie, dict(self), int(time()) + max_age if max_age is not None else None
+        )
         return (
-            (
-                cookie_name,
-                s.dumps(self),
-                settings.max_age,
-                settings.http_only,
-                settings.secure,
-                settings.path,
-                settings.domain,
-                settings.same_site,
-            )
-            if self
-            else (cookie_name, None)
+            cookie_name,
+            cookie,
+            settings.max_age,
+            settings.http_only,
+            settings.secure,
+            settings.path,
+            settings.domain,
+            settings.same_site,
         )
 
     def get_session(
         session: Annotated[str | None, Cookie(cookie_name)] = None
     ) -> Session:
         if session is None:
-            res = Session()
-            res._serialize = _serialize
-            return res
-        try:
-            data = s.loads(session)
-        except BadSignature:
-            raise
+            data: dict[str, str] = {}
+        elif (cached := cache.get(session)) is not None:
+            data = cached
+        else:
+            try:
+                data, signed_at = s.loads(
+                    session, max_age=max_age, return_timestamp=True
+                )
+            except SignatureExpired:
+                data = {}
+            else:
+                cache.add(
+                    session,
+                    data,
+                    signed_at.timestamp() + max_age if max_age is not None else None,
+                )
 
         res = Session(data)
         res._serialize = _serialize
+        res._unchanged = data
         return res
 
     app.incant.register_hook(
@@ -1,95 +1,1110 @@
-"""Redis backends for sessions."""
+"""Server-side sessions, and Redis backends for them."""
+from abc import ABC, abstractmethod
+from asyncio import CancelledError, Task, create_task, sleep
+from collections.abc import (
+    AsyncIterator,
+    Callable,
+    Generator,
+    Iterator,
+    MutableMapping,
+    Sequence,
+)
+from contextlib import (
+    AbstractAsyncContextManager,
+    AbstractContextManager,
+    asynccontextmanager,
+    contextmanager,
+    suppress,
+)
 from datetime import timedelta
-from json import dumps, loads
+from logging import getLogger
 from secrets import token_hex
+from threading import Event, Thread
 from time import time
-from typing import TYPE_CHECKING, Annotated, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    ClassVar,
+    Final,
+    Generic,
+    Protocol,
+    TypeVar,
+    get_args,
+    get_origin,
+)
 
-from attrs import frozen
+from attrs import Factory, define, field, frozen
+from cattrs import Converter
+from orjson import dumps, loads
 
-from .. import Cookie, Headers
-from ..base import AsyncApp, OpenAPISecuritySpec
+from .. import Cookie, Headers, ResponseException
+from .._redis import Script
+from ..base import App, AsyncApp, OpenAPISecuritySpec
 from ..cookies import CookieSettings, set_cookie
 from ..openapi import ApiKeySecurityScheme
+from . import AsyncSessionBackend, SyncSessionBackend
 
 if TYPE_CHECKING:
     from aioredis import Redis
+    from redis import Redis as SyncRedis
+
+__all__ = [
+    "AioredisSessionBackend",
+    "AsyncRedisSessionStore",
+    "AsyncSession",
+    "AsyncSessionSweeper",
+    "RedisSessionBackend",
+    "SyncRedisSessionBackend",
+    "SyncRedisSessionStore",
+    "SyncSession",
+    "SyncSessionSweeper",
+    "TypedAsyncSession",
+    "TypedSyncSession",
+    "configure_async_sessions",
+    "configure_sync_sessions",
+]
 
 T1 = TypeVar("T1")
 T2 = TypeVar("T2")
+T = TypeVar("T")
+B = TypeVar("B", AsyncSessionBackend, SyncSessionBackend)
+D = TypeVar("D")
+
+#: Stores the session payload at `KEYS[1]` and registers the session in the
+#: namespace sorted set at `KEYS[2]` if given, keeping the remaining TTL of
+#: existing sessions. Expired sessions are removed from the namespace. The
+#: namespace is added to the registry set at `KEYS[3]`, if given. `ARGV` holds the payload, the
+#: TTL of new sessions, the session ID, the current time, `1` to reset the TTL of
+#: existing sessions too and the namespace. An empty payload only refreshes the
+#: TTL of an existing session. Returns the TTL used, or -2 if there was no session
+#: to refresh, and 1 if the namespace sorted set was created without being
+#: registered.
+UPDATE_SESSION_SCRIPT: Final = """
+local ttl = redis.call('TTL', KEYS[1])
+if ttl <= 0 or ARGV[5] == '1' then
+    ttl = tonumber(ARGV[2])
+end
+if ARGV[1] == '' then
+    if redis.call('EXPIRE', KEYS[1], ttl) == 0 then
+        return {-2, 0}
+    end
+else
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ttl)
+end
+local created = false
+if KEYS[2] then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], 0, ARGV[4])
+    created = redis.call('EXISTS', KEYS[2]) == 0
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[4]) + ttl, ARGV[3])
+    if ttl > redis.call('TTL', KEYS[2]) then
+        redis.call('EXPIRE', KEYS[2], ttl)
+    end
+    if KEYS[3] then
+        redis.call('SADD', KEYS[3], ARGV[6])
+        created = false
+    end
+end
+return {ttl, created and 1 or 0}
+"""
+_UPDATE_SESSION: Final = Script(UPDATE_SESSION_SCRIPT)
+
+#: Removes up to `ARGV[2]` sessions expired at `ARGV[1]` from the namespace
+#: sorted set at `KEYS[1]`. Once the sorted set is gone, the namespace `ARGV[3]`
+#: is removed from the registry set at `KEYS[2]`, if given. Returns the number of
+#: sessions removed, and 1 if the namespace is gone but still registered.
+SWEEP_NAMESPACE_SCRIPT: Final = """
+local removed = 0
+if redis.call('TYPE', KEYS[1]).ok == 'zset' then
+    local ids = redis.call(
+        'ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2]
+    )
+    if #ids > 0 then
+        redis.call('ZREM', KEYS[1], unpack(ids))
+    end
+    removed = #ids
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return {removed, 0}
+end
+if KEYS[2] then
+    redis.call('SREM', KEYS[2], ARGV[3])
+    return {removed, 0}
+end
+return {removed, 1}
+"""
+_SWEEP_NAMESPACE: Final = Script(SWEEP_NAMESPACE_SCRIPT)
+
+logger: Final = getLogger("uapi.sessions")
+
+
+@define
+class _RedisKeys:
+    """The Redis key layout of sessions, independent of the client library.
+
+    A session is stored at `{key_prefix}{namespace}:s:{id}`, and registered in the
+    sorted set of its namespace at `{key_prefix}{namespace}:s`, scored by its
+    expiry time. Namespaces are registered in the set at `{key_prefix}namespaces`
+    while they have sessions, so sweeping only touches the keys of this layout.
+
+    With `hash_tags`, the keys are `{key_prefix}{{namespace}:s}:{id}` and
+    `{key_prefix}{{namespace}:s}` instead. The hash tag puts all the keys of a
+    namespace into the same Redis Cluster slot, so pipelines and scripts touching
+    them run on a single node. Sessions without a namespace, usually the most
+    common, are tagged by ID instead, at `{key_prefix}:s:{{id}}`, so they spread
+    over the cluster. They aren't registered in a sorted set, which would put
+    them back into a single slot, and only expire on their own.
+    """
+
+    _redis: Any
+    #: The prefix of the Redis keys.
+    key_prefix: str = ""
+    #: Whether to hash-tag the keys by namespace, for Redis Cluster.
+    hash_tags: bool = False
+
+    def _namespace_key(self, namespace: str) -> str:
+        if self.hash_tags:
+            return f"{self.key_prefix}{{{namespace}:s}}"
+        return f"{self.key_prefix}{namespace}:s"
+
+    def _indexed(self, namespace: str) -> bool:
+        """Whether the sessions of the namespace are registered in a sorted set."""
+        return bool(namespace) or not self.hash_tags
+
+    def _session_key(self, namespace: str, id: str) -> str:
+        if not self._indexed(namespace):
+            return f"{self.key_prefix}:s:{{{id}}}"
+        return f"{self._namespace_key(namespace)}:{id}"
+
+    @property
+    def _registry_key(self) -> str:
+        return f"{self.key_prefix}namespaces"
+
+    def _script_keys(self, *keys: str) -> list[str]:
+        """The keys of a script, and the registry if the script can update it."""
+        if self.hash_tags:
+            # Scripts on Redis Cluster can only touch keys in one slot, so the
+            # registry is updated separately.
+            return list(keys)
+        return [*keys, self._registry_key]
+
+    def _update_session_keys(self, namespace: str, id: str) -> list[str]:
+        """The keys of `UPDATE_SESSION_SCRIPT`."""
+        key = self._session_key(namespace, id)
+        if not self._indexed(namespace):
+            return [key]
+        return self._script_keys(key, self._namespace_key(namespace))
+
+    def _check_indexed(self, namespace: str) -> None:
+        if not self._indexed(namespace):
+            raise ValueError(
+                "Sessions without a namespace are not indexed with hash tags, and"
+                " cannot be removed."
+            )
+
+
+@define
+class _RedisSessionBackend(_RedisKeys, ABC):
+    """The async Redis session backend, independent of the client library."""
+
+    @abstractmethod
+    async def _run_script(
+        self, script: Script, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        """Run a script, loading it if Redis doesn't have it cached."""
+
+    async def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        key = self._session_key(namespace, id)
+        if not with_ttl:
+            return await self._redis.get(key), None
+        pipeline = self._redis.pipeline()
+        pipeline.get(key)
+        pipeline.ttl(key)
+        payload, remaining = await pipeline.execute()
+        # Negative TTLs mean missing keys, or keys without expiry.
+        return payload, remaining if remaining >= 0 else None
+
+    async def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        # A single round trip, atomically.
+        res, unregistered = await self._run_script(
+            _UPDATE_SESSION,
+            self._update_session_keys(namespace, id),
+            [payload or "", ttl, id, time(), "1" if reset_ttl else "", namespace],
+        )
+        if unregistered:
+            await self._redis.sadd(self._registry_key, namespace)
+        return res != -2
+
+    async def delete_session(self, namespace: str, id: str) -> None:
+        if not self._indexed(namespace):
+            await self._redis.delete(self._session_key(namespace, id))
+            return
+        ns_key = self._namespace_key(namespace)
+        pipeline = self._redis.pipeline()
+        pipeline.delete(f"{ns_key}:{id}")
+        pipeline.zrem(ns_key, id)
+        await pipeline.execute()
+
+    async def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        """Remove all sessions in a namespace.
+
+        Sessions are removed in chunks, using `UNLINK` so Redis frees the memory in
+        the background, to avoid blocking Redis on namespaces with many sessions.
+
+        :raises ValueError: For the empty namespace, with `hash_tags`.
+        """
+        self._check_indexed(namespace)
+        ns_key = self._namespace_key(namespace)
+        while session_ids := await self._redis.zrange(ns_key, 0, chunk_size - 1):
+            pipeline = self._redis.pipeline()
+            pipeline.unlink(
+                *[
+                    f"{ns_key}:{i.decode() if isinstance(i, bytes) else i}"
+                    for i in session_ids
+                ]
+            )
+            pipeline.zrem(ns_key, *session_ids)
+            await pipeline.execute()
+        await self._redis.unlink(ns_key)
+        await self._redis.srem(self._registry_key, namespace)
+
+    async def sweep(self, batch_size: int = 100) -> int:
+        """Remove expired sessions from their namespaces.
+
+        The registered namespaces are scanned incrementally using `SSCAN`, and
+        expired sessions are removed from each in batches, every batch an atomic
+        script call.
+        """
+        removed = 0
+        async for member in self._scan_namespaces(batch_size):
+            namespace = member.decode() if isinstance(member, bytes) else member
+            key = self._namespace_key(namespace)
+            while True:
+                batch, gone = await self._run_script(
+                    _SWEEP_NAMESPACE,
+                    self._script_keys(key),
+                    [time(), batch_size, namespace],
+                )
+                removed += batch
+                if gone:
+                    await self._redis.srem(self._registry_key, namespace)
+                    # A session may have been saved into it in the meantime.
+                    if await self._redis.exists(key):
+                        await self._redis.sadd(self._registry_key, namespace)
+                if gone or batch < batch_size:
+                    break
+        return removed
+
+    async def _scan_namespaces(self, count: int) -> AsyncIterator[Any]:
+        cursor = 0
+        while True:
+            cursor, namespaces = await self._redis.sscan(
+                self._registry_key, cursor, count=count
+            )
+            for namespace in namespaces:
+                yield namespace
+            if not cursor:
+                break
+
+
+@define
+class AioredisSessionBackend(_RedisSessionBackend):
+    """A session backend using an
+    [aioredis 1.3](https://pypi.org/project/aioredis/1.3.1/) connection pool."""
+
+    async def _run_script(
+        self, script: Script, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        return await script.run_aioredis(self._redis, keys, args)
+
+
+@define
+class RedisSessionBackend(_RedisSessionBackend):
+    """A session backend using a
+    [redis-py](https://pypi.org/project/redis/) asyncio client.
+
+    The client manages a pool of connections; use `from_url` to configure it.
+
+    Redis Cluster is supported using a `redis.asyncio.RedisCluster` client, with
+    `hash_tags` enabled.
+    """
+
+    @classmethod
+    def from_url(
+        cls, url: str, key_prefix: str = "", hash_tags: bool = False, **kwargs: Any
+    ) -> "RedisSessionBackend":
+        """Create a backend with a client connecting to `url`.
+
+        :param kwargs: Passed to `redis.asyncio.from_url`, for example
+            `max_connections` to size the connection pool.
+        """
+        from redis.asyncio import from_url
+
+        return cls(from_url(url, **kwargs), key_prefix, hash_tags)
+
+    async def _run_script(
+        self, script: Script, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        return await script.run_async(self._redis, keys, args)
+
+
+@define
+class SyncRedisSessionBackend(_RedisKeys):
+    """A session backend using a [redis-py](https://pypi.org/project/redis/) client,
+    for sync apps.
+
+    redis-py clients are thread-safe, and manage a pool of connections; use
+    `from_url` to configure it. Redis Cluster is supported using a
+    `redis.RedisCluster` client, with `hash_tags` enabled.
+    """
+
+    @classmethod
+    def from_url(
+        cls, url: str, key_prefix: str = "", hash_tags: bool = False, **kwargs: Any
+    ) -> "SyncRedisSessionBackend":
+        """Create a backend with a client connecting to `url`.
+
+        :param kwargs: Passed to `redis.from_url`, for example `max_connections` to
+            size the connection pool.
+        """
+        from redis import from_url
+
+        return cls(from_url(url, **kwargs), key_prefix, hash_tags)
+
+    def load_session(
+        self, namespace: str, id: str, with_ttl: bool = False
+    ) -> tuple[str | bytes | None, int | None]:
+        key = self._session_key(namespace, id)
+        if not with_ttl:
+            return self._redis.get(key), None
+        pipeline = self._redis.pipeline()
+        pipeline.get(key)
+        pipeline.ttl(key)
+        payload, remaining = pipeline.execute()
+        return payload, remaining if remaining >= 0 else None
+
+    def save_session(
+        self,
+        namespace: str,
+        id: str,
+        payload: str | bytes | None,
+        ttl: int,
+        reset_ttl: bool = False,
+    ) -> bool:
+        res, unregistered = _UPDATE_SESSION.run_sync(
+            self._redis,
+            self._update_session_keys(namespace, id),
+            [payload or "", ttl, id, time(), "1" if reset_ttl else "", namespace],
+        )
+        if unregistered:
+            self._redis.sadd(self._registry_key, namespace)
+        return res != -2
+
+    def delete_session(self, namespace: str, id: str) -> None:
+        if not self._indexed(namespace):
+            self._redis.delete(self._session_key(namespace, id))
+            return
+        ns_key = self._namespace_key(namespace)
+        pipeline = self._redis.pipeline()
+        pipeline.delete(f"{ns_key}:{id}")
+        pipeline.zrem(ns_key, id)
+        pipeline.execute()
 
+    def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        self._check_indexed(namespace)
+        ns_key = self._namespace_key(namespace)
+        while session_ids := self._redis.zrange(ns_key, 0, chunk_size - 1):
+            pipeline = self._redis.pipeline()
+            pipeline.unlink(
+                *[
+                    f"{ns_key}:{i.decode() if isinstance(i, bytes) else i}"
+                    for i in session_ids
+                ]
+            )
+            pipeline.zrem(ns_key, *session_ids)
+            pipeline.execute()
+        self._redis.unlink(ns_key)
+        self._redis.srem(self._registry_key, namespace)
 
-class AsyncSession(dict[str, str]):
+    def sweep(self, batch_size: int = 100) -> int:
+        removed = 0
+        for member in self._redis.sscan_iter(self._registry_key, count=batch_size):
+            namespace = member.decode() if isinstance(member, bytes) else member
+            key = self._namespace_key(namespace)
+            while True:
+                batch, gone = _SWEEP_NAMESPACE.run_sync(
+                    self._redis, self._script_keys(key), [time(), batch_size, namespace]
+                )
+                removed += batch
+                if gone:
+                    self._redis.srem(self._registry_key, namespace)
+                    # A session may have been saved into it in the meantime.
+                    if self._redis.exists(key):
+                        self._redis.sadd(self._registry_key, namespace)
+                if gone or batch < batch_size:
+                    break
+        return removed
+
+
+class _SessionCodec(Protocol[D]):
+    """Converts session data to and from payloads."""
+
+    #: Whether changes are detected by comparing payloads, instead of tracking
+    #: mutations.
+    compare_payloads: ClassVar[bool]
+
+    def new(self) -> D:
+        ...
+
+    def decode(self, payload: str | bytes) -> D:
+        ...
+
+    def encode(self, data: D) -> bytes:
+        ...
+
+
+@frozen
+class _MappingCodec:
+    """Stores mapping sessions as JSON objects."""
+
+    compare_payloads: ClassVar[bool] = False
+
+    def new(self) -> dict[str, str]:
+        return {}
+
+    def decode(self, payload: str | bytes) -> dict[str, str]:
+        return loads(payload)
+
+    def encode(self, data: dict[str, str]) -> bytes:
+        return dumps(data)
+
+
+@frozen
+class _AttrsCodec(Generic[T]):
+    """Stores typed sessions, unstructured using a converter, as JSON."""
+
+    compare_payloads: ClassVar[bool] = True
+
+    cls: type[T]
+    converter: Converter
+
+    def new(self) -> T:
+        return self.cls()
+
+    def decode(self, payload: str | bytes) -> T:
+        return self.converter.structure(loads(payload), self.cls)
+
+    def encode(self, data: T) -> bytes:
+        return dumps(self.converter.unstructure(data, self.cls))
+
+
+_MAPPING_CODEC: Final = _MappingCodec()
+
+
+@define(eq=False)
+class _BaseSession(Generic[B, D], ABC):
+    """The state of a server-side session, shared by all sessions."""
+
+    _backend: B
     _cookie_name: str
     _cookie_settings: CookieSettings
-    _aioredis: "Redis"
+    _ttl: int
     _namespace: str
     _id: str
-    _ttl: int
-    _key_prefix: str
+    #: The session data, `None` until loaded.
+    _data: D | None = None
+    #: With sliding expiry, the minimum delay between TTL refreshes.
+    _refresh_interval: int | None = None
+    #: Whether the data was mutated since it was loaded or written. Only tracked
+    #: by mapping sessions.
+    _dirty: bool = False
+    #: The namespace to write the session into, if the session needs writing.
+    _pending_namespace: str | None = None
+    _needs_refresh: bool = False
+    _codec: _SessionCodec[D] = _MAPPING_CODEC  # type: ignore[assignment]
+    #: The payload last loaded or written, for codecs comparing payloads.
+    _payload: bytes | None = None
 
-    async def update_session(self, *, namespace: str | None = None) -> Headers:
-        namespace = namespace or self._namespace
-        if namespace is None:
-            raise Exception("The namespace must be set for new sessions.")
-        now = time()
-        ns_key = f"{self._key_prefix}{namespace}:s"
-        key = f"{ns_key}:{self._id}"
-        existing_id_ttl = await self._aioredis.ttl(key)
-        existing_namespace_ttl = await self._aioredis.ttl(ns_key)
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
 
-        if existing_id_ttl < 0:  # Means key not found.
-            existing_id_ttl = self._ttl
+    def _set_loaded(self, payload: str | bytes | None, remaining: int | None) -> None:
+        """Set the data fetched from the backend.
 
-        pipeline = self._aioredis.pipeline()
+        If the session data has expired, the session is replaced by a new, empty
+        session.
+        """
+        if payload is None:
+            self._id = token_hex()
+            self._namespace = ""
+            self._data = self._codec.new()
+        else:
+            self._data = self._codec.decode(payload)
+            if self._codec.compare_payloads:
+                self._payload = (
+                    payload.encode() if isinstance(payload, str) else payload
+                )
+            self._needs_refresh = (
+                remaining is not None
+                and self._refresh_interval is not None
+                and self._ttl - remaining >= self._refresh_interval
+            )
 
-        pipeline.set(key, dumps(self, separators=(",", ":")), expire=existing_id_ttl)
-        pipeline.zadd(ns_key, now + existing_id_ttl, self._id)
-        if existing_id_ttl > existing_namespace_ttl:
-            pipeline.expire(ns_key, existing_id_ttl)
+    @property
+    @abstractmethod
+    def _loaded_data(self) -> D:
+        """The session data, loading it if needed."""
 
-        await pipeline.execute()
+    def __repr__(self) -> str:
+        data = "<not loaded>" if self._data is None else repr(self._data)
+        return f"{self.__class__.__name__}({data})"
+
+    def _mark_for_update(self, namespace: str | None) -> Headers:
+        namespace = namespace or self._pending_namespace or self._namespace
+        self._pending_namespace = namespace
 
         return set_cookie(
             self._cookie_name, f"{namespace}:{self._id}", settings=self._cookie_settings
         )
 
-    async def clear_session(self) -> Headers:
-        self.clear()
-        if self._namespace is not None:
-            pipeline = self._aioredis.pipeline()
-            pipeline.delete(f"{self._namespace}:s:{self._id}")
-            pipeline.zrem(f"{self._namespace}:s", self._id)
-            await pipeline.execute()
+    def _pending_write(self) -> tuple[str, bytes | None] | None:
+        """The namespace and payload to write, if any.
+
+        A `None` payload only refreshes the TTL.
+        """
+        if (namespace := self._pending_namespace) is not None:
+            if self._codec.compare_payloads:
+                payload = self._codec.encode(self._loaded_data)
+                if payload != self._payload or namespace != self._namespace:
+                    return namespace, payload
+            elif self._dirty or namespace != self._namespace:
+                return namespace, self._codec.encode(self._loaded_data)
+        if self._needs_refresh:
+            return self._namespace, None
+        self._pending_namespace = None
+        return None
+
+    def _set_written(self, namespace: str, payload: bytes | None) -> None:
+        self._namespace = namespace
+        self._pending_namespace = None
+        self._dirty = self._needs_refresh = False
+        if payload is not None and self._codec.compare_payloads:
+            self._payload = payload
+
+    def _set_cleared(self) -> Headers:
+        self._data = self._codec.new()
+        self._dirty = self._needs_refresh = False
+        self._pending_namespace = None
+        self._payload = None
         return set_cookie(self._cookie_name, None)
 
 
+class _SessionMapping(MutableMapping[str, str]):
+    """The mapping interface of string sessions, tracking mutations."""
+
+    __slots__ = ()
+
+    _dirty: bool
+
+    @property
+    @abstractmethod
+    def _loaded_data(self) -> dict[str, str]:
+        """The session data, loading it if needed."""
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the session data changed since it was loaded or written."""
+        return self._dirty
+
+    def __getitem__(self, key: str) -> str:
+        return self._loaded_data[key]
+
+    def __setitem__(self, key: str, value: str) -> None:
+        data = self._loaded_data
+        if key not in data or data[key] != value:
+            data[key] = value
+            self._dirty = True
+
+    def __delitem__(self, key: str) -> None:
+        del self._loaded_data[key]
+        self._dirty = True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaded_data)
+
+    def __len__(self) -> int:
+        return len(self._loaded_data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._loaded_data
+
+
+@define(eq=False, repr=False)
+class _AsyncSessionBase(_BaseSession[AsyncSessionBackend, D]):
+    """Loading and writing sessions using an async backend."""
+
+    async def _load(self) -> None:
+        if self._data is None:
+            self._set_loaded(
+                *await self._backend.load_session(
+                    self._namespace,
+                    self._id,
+                    with_ttl=self._refresh_interval is not None,
+                )
+            )
+
+    @property
+    def _loaded_data(self) -> D:
+        if self._data is None:
+            raise RuntimeError("The session must be awaited before use.")
+        return self._data
+
+    async def update_session(self, *, namespace: str | None = None) -> Headers:
+        """Mark the session for writing to the backend, optionally into a new
+        namespace.
+
+        The session is written at the end of the request, once, and only if its
+        data or namespace changed.
+
+        :return: The headers setting the session cookie, to be returned with the
+            response.
+        """
+        await self._load()
+        return self._mark_for_update(namespace)
+
+    async def flush(self) -> None:
+        """Write the session to the backend if it has pending changes, or refresh
+        its TTL if due.
+
+        This is done automatically at the end of the request.
+        """
+        if (write := self._pending_write()) is None:
+            return
+        namespace, payload = write
+        await self._backend.save_session(
+            namespace,
+            self._id,
+            payload,
+            self._ttl,
+            reset_ttl=self._refresh_interval is not None,
+        )
+        self._set_written(namespace, payload)
+
+    async def clear_session(self) -> Headers:
+        """Clear the session, removing it from the backend. Loading is not
+        required."""
+        headers = self._set_cleared()
+        await self._backend.delete_session(self._namespace, self._id)
+        return headers
+
+
+@define(eq=False, repr=False)
+class AsyncSession(_AsyncSessionBase[dict[str, str]], _SessionMapping):
+    """A mapping of strings to strings, stored in a session backend.
+
+    Sessions are loaded lazily: a session needs to be awaited (or loaded using
+    `load()`) before being used as a mapping, which fetches it from the backend at
+    most once. Handlers not awaiting the session do not touch the backend.
+
+    Writes are deferred: `update_session()` marks the session for writing, and the
+    write happens once, at the end of the request, and only if the session changed.
+    """
+
+    async def load(self) -> "AsyncSession":
+        """Fetch the session from the backend, if not already loaded.
+
+        If the session data has expired, the session is replaced by a new, empty
+        session.
+        """
+        await self._load()
+        return self
+
+    def __await__(self) -> Generator[Any, None, "AsyncSession"]:
+        return self.load().__await__()
+
+
+@define(eq=False, repr=False)
+class TypedAsyncSession(_AsyncSessionBase[T]):
+    """A session holding an instance of an _attrs_ class, stored in a session
+    backend.
+
+    The instance is (un)structured using the app converter, and stored as JSON.
+    Awaiting the session loads it, and produces the instance. New and expired
+    sessions start with an instance created with no arguments, so all fields
+    need defaults.
+
+    The instance may be mutated in place, or replaced by setting `data`. Like with
+    `AsyncSession`, `update_session()` marks the session for writing, and the
+    write happens once, at the end of the request, and only if the stored payload
+    changed.
+    """
+
+    async def load(self) -> T:
+        """Fetch the session from the backend, if not already loaded.
+
+        :return: The session data.
+        """
+        await self._load()
+        return self._loaded_data
+
+    def __await__(self) -> Generator[Any, None, T]:
+        return self.load().__await__()
+
+    @property
+    def data(self) -> T:
+        """The session data. The session must be loaded first."""
+        return self._loaded_data
+
+    @data.setter
+    def data(self, value: T) -> None:
+        if self._data is None:
+            raise RuntimeError("The session must be awaited before use.")
+        self._data = value
+
+
+@define(eq=False, repr=False)
+class _SyncSessionBase(_BaseSession[SyncSessionBackend, D]):
+    """Loading and writing sessions using a sync backend."""
+
+    def _load(self) -> None:
+        if self._data is None:
+            self._set_loaded(
+                *self._backend.load_session(
+                    self._namespace,
+                    self._id,
+                    with_ttl=self._refresh_interval is not None,
+                )
+            )
+
+    @property
+    def _loaded_data(self) -> D:
+        if self._data is None:
+            self._load()
+        return self._data  # type: ignore[return-value]
+
+    def update_session(self, *, namespace: str | None = None) -> Headers:
+        """Mark the session for writing to the backend, optionally into a new
+        namespace.
+
+        :return: The headers setting the session cookie, to be returned with the
+            response.
+        """
+        self._load()
+        return self._mark_for_update(namespace)
+
+    def flush(self) -> None:
+        """Write the session to the backend if it has pending changes, or refresh
+        its TTL if due.
+
+        This is done automatically at the end of the request.
+        """
+        if (write := self._pending_write()) is None:
+            return
+        namespace, payload = write
+        self._backend.save_session(
+            namespace,
+            self._id,
+            payload,
+            self._ttl,
+            reset_ttl=self._refresh_interval is not None,
+        )
+        self._set_written(namespace, payload)
+
+    def clear_session(self) -> Headers:
+        """Clear the session, removing it from the backend. Loading is not
+        required."""
+        headers = self._set_cleared()
+        self._backend.delete_session(self._namespace, self._id)
+        return headers
+
+
+@define(eq=False, repr=False)
+class SyncSession(_SyncSessionBase[dict[str, str]], _SessionMapping):
+    """Like `AsyncSession`, but for sync apps.
+
+    Sessions are loaded lazily, on first use as a mapping, so handlers not using
+    the session do not touch the backend.
+    """
+
+    def load(self) -> "SyncSession":
+        """Fetch the session from the backend, if not already loaded."""
+        self._load()
+        return self
+
+
+@define(eq=False, repr=False)
+class TypedSyncSession(_SyncSessionBase[T]):
+    """Like `TypedAsyncSession`, but for sync apps.
+
+    The session is loaded on first access to `data`.
+    """
+
+    @property
+    def data(self) -> T:
+        """The session data, loaded on first access."""
+        return self._loaded_data
+
+    @data.setter
+    def data(self, value: T) -> None:
+        self._load()
+        self._data = value
+
+
+S = TypeVar("S", bound=_BaseSession)
+
+
+def _make_session(
+    cls: type[S],
+    backend: Any,
+    cookie: str | None,
+    cookie_name: str,
+    cookie_settings: CookieSettings,
+    ttl: int,
+    refresh_interval: int | None,
+    codec: _SessionCodec[Any],
+) -> S:
+    """Create the session of a request, given its cookie."""
+    if cookie is not None:
+        namespace, id = cookie.split(":")
+        return cls(
+            backend,
+            cookie_name,
+            cookie_settings,
+            ttl,
+            namespace,
+            id,
+            refresh_interval=refresh_interval,
+            codec=codec,
+        )
+    # No need to load a new session.
+    return cls(
+        backend,
+        cookie_name,
+        cookie_settings,
+        ttl,
+        "",
+        token_hex(),
+        codec.new(),
+        refresh_interval,
+        codec=codec,
+    )
+
+
+@define
+class AsyncSessionSweeper:
+    """Removes expired sessions from their namespaces, in the background."""
+
+    _backend: AsyncSessionBackend
+    #: The delay between sweeps, in seconds.
+    interval: float = 60.0
+    #: The maximum number of sessions removed by a single backend call.
+    batch_size: int = 100
+    #: The number of expired sessions removed so far.
+    removed: int = 0
+    #: The number of sweeps completed so far.
+    sweeps: int = 0
+    _task: Task | None = None
+
+    async def sweep(self) -> int:
+        """Sweep all namespaces once.
+
+        :return: The number of expired sessions removed.
+        """
+        removed = await self._backend.sweep(self.batch_size)
+        self.removed += removed
+        self.sweeps += 1
+        return removed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Sweeping expired sessions failed.")
+            await sleep(self.interval)
+
+    def start(self) -> None:
+        """Start sweeping in a background task."""
+        if self._task is None:
+            self._task = create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sweeping, cancelling a sweep in progress."""
+        if (task := self._task) is not None:
+            self._task = None
+            task.cancel()
+            with suppress(CancelledError):
+                await task
+
+
 @frozen
 class AsyncRedisSessionStore:
-    _redis: "Redis"
-    _key_prefix: str
+    """Manages the sessions of a backend outside of requests.
+
+    Despite the name, works with any session backend.
+    """
+
+    _backend: AsyncSessionBackend
     _cookie_name: str
     _cookie_settings: CookieSettings
+    _background_tasks: set[Task] = field(factory=set, eq=False)
 
-    async def remove_namespace(self, namespace: str) -> None:
-        """Remove all sessions in a particular namespace."""
-        ns_key = f"{self._key_prefix}{namespace}:s"
-        session_ids = await self._redis.zrangebyscore(ns_key, time(), float("inf"))
-        pipeline = self._redis.pipeline()
-        for session_id in session_ids:
-            pipeline.delete(f"{ns_key}:{session_id}")
-        pipeline.delete(ns_key)
-        await pipeline.execute()
+    async def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        """Remove all sessions in a particular namespace.
+
+        Sessions are removed in chunks, to avoid blocking the backend on namespaces
+        with many sessions. The Redis backends use `UNLINK`, so Redis frees the
+        memory in the background.
+
+        :param chunk_size: The maximum number of sessions removed by a single round
+            trip.
+        """
+        await self._backend.remove_namespace(namespace, chunk_size)
+
+    def remove_namespace_in_background(
+        self, namespace: str, chunk_size: int = 500
+    ) -> "Task[None]":
+        """Like `remove_namespace`, but in a background task.
+
+        Errors are logged to the `uapi.sessions` logger.
+
+        :return: The task, which does not need to be awaited.
+        """
+        task = create_task(self.remove_namespace(namespace, chunk_size))
+        # The event loop only keeps weak references to tasks.
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_task_done)
+        return task
+
+    def _background_task_done(self, task: "Task[None]") -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            logger.error("Removing a session namespace failed.", exc_info=exc)
+
+    def sweep_in_background(
+        self, app: AsyncApp, interval: float = 60.0, batch_size: int = 100
+    ) -> AsyncSessionSweeper:
+        """Remove expired sessions from their namespaces in a background task,
+        running from app startup to app shutdown.
+
+        With the Redis backends, expired sessions are otherwise only removed from
+        their namespace when another session in the same namespace is updated.
+        Namespaces are scanned incrementally using `SCAN`.
+
+        :param interval: The delay between sweeps, in seconds.
+        :param batch_size: The maximum number of sessions removed from a namespace
+            by a single Redis call, and the `COUNT` hint of `SCAN`.
+        :return: The sweeper, for inspecting the number of sessions removed.
+        """
+        sweeper = AsyncSessionSweeper(self._backend, interval, batch_size)
+        app.on_startup(sweeper.start)
+        app.on_shutdown(sweeper.stop)
+        return sweeper
+
+
+@define
+class SyncSessionSweeper:
+    """Like `AsyncSessionSweeper`, but sweeping in a background thread."""
+
+    _backend: SyncSessionBackend
+    #: The delay between sweeps, in seconds.
+    interval: float = 60.0
+    #: The maximum number of sessions removed by a single backend call.
+    batch_size: int = 100
+    #: The number of expired sessions removed so far.
+    removed: int = 0
+    #: The number of sweeps completed so far.
+    sweeps: int = 0
+    _thread: Thread | None = None
+    _stopping: Event = Factory(Event)
+
+    def sweep(self) -> int:
+        """Sweep all namespaces once.
+
+        :return: The number of expired sessions removed.
+        """
+        removed = self._backend.sweep(self.batch_size)
+        self.removed += removed
+        self.sweeps += 1
+        return removed
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Sweeping expired sessions failed.")
+            self._stopping.wait(self.interval)
+
+    def start(self) -> None:
+        """Start sweeping in a daemon thread."""
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = Thread(
+                target=self._run, name="uapi-session-sweeper", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sweeping, waiting for a sweep in progress to finish."""
+        if (thread := self._thread) is not None:
+            self._thread = None
+            self._stopping.set()
+            thread.join()
+
+
+@frozen
+class SyncRedisSessionStore:
+    """Like `AsyncRedisSessionStore`, but for sync apps."""
+
+    _backend: SyncSessionBackend
+    _cookie_name: str
+    _cookie_settings: CookieSettings
+
+    def remove_namespace(self, namespace: str, chunk_size: int = 500) -> None:
+        """Remove all sessions in a particular namespace, in chunks.
+
+        :param chunk_size: The maximum number of sessions removed by a single round
+            trip.
+        """
+        self._backend.remove_namespace(namespace, chunk_size)
+
+    def sweep_in_background(
+        self, app: App, interval: float = 60.0, batch_size: int = 100
+    ) -> SyncSessionSweeper:
+        """Remove expired sessions from their namespaces in a background thread,
+        running from app startup to app shutdown.
+
+        :param interval: The delay between sweeps, in seconds.
+        :param batch_size: The maximum number of sessions removed from a namespace
+            by a single Redis call, and the `COUNT` hint of `SCAN`.
+        :return: The sweeper, for inspecting the number of sessions removed.
+        """
+        sweeper = SyncSessionSweeper(self._backend, interval, batch_size)
+        app.on_startup(sweeper.start)
+        app.on_shutdown(sweeper.stop)
+        return sweeper
 
 
 def configure_async_sessions(
     app: AsyncApp,
-    aioredis: "Redis",
+    aioredis: "Redis | AsyncSessionBackend",
     max_age: timedelta = timedelta(days=14),
     cookie_name: str = "session_id",
     cookie_settings: CookieSettings = CookieSettings(),
     redis_key_prefix: str = "",
     session_arg_param_name: str = "session",
+    refresh_interval: timedelta | None = None,
 ) -> AsyncRedisSessionStore:
     """
     Configure an instance of async sessions for an app.
@@ -101,6 +1116,11 @@ def configure_async_sessions(
     (defaults to `session`) and type `AsyncSession`. AsyncSessions are mappings of
     strings to strings, and can be used to store data using the
     `AsyncSession.update_session()` and `AsyncSession.clear_session()` coroutines.
+    Sessions are fetched from the backend lazily, and need to be awaited before being
+    read or modified.
+    Handlers may also declare a parameter of type `TypedAsyncSession[T]`, for
+    sessions holding an instance of the _attrs_ class `T` instead, (un)structured
+    using the app converter.
 
     If the cookie is missing or the session data has expired, a new empty session will
     be transparently created.
@@ -108,61 +1128,149 @@ def configure_async_sessions(
     Sessions have optional namespaces. Namespaces are useful for logically grouping
     sessions, for example by user ID, so that multiple sessions can be cleared at once.
 
+    Changes are written to the backend once, at the end of the request, and only if
+    `AsyncSession.update_session()` was called and the session changed.
+
     Fresh sessions start with no namespace set. To set a namespace, pass it to
     `AsyncSession.update_session()`.
 
     An `AsyncRedisSessionStore` is produced at configuration time and can be used to
     clean up namespaces even outside the context of a request.
 
+    :param aioredis: The session backend, or an aioredis 1.3 connection pool to use
+        with an `AioredisSessionBackend`.
     :param max_age: The maximum age of a session. When this expires, the session is
-        cleaned up from Redis.
+        cleaned up from the backend. With sliding expiry, this is the maximum time
+        between requests using the session instead.
     :param cookie_name: The name of the cookie to use for the session id.
     :param cookie_settings: The settings for the cookie.
-    :param redis_key_prefix: The prefix to use for redis keys.
+    :param redis_key_prefix: The prefix to use for redis keys, when given an aioredis
+        connection pool.
     :param session_arg_param_name: The name of the handler parameter that will be
         available for dependency injection.
+    :param refresh_interval: If set, enables sliding expiry: the TTL of sessions
+        used by a request is reset to `max_age`, at most once per this interval.
     """
+    backend = (
+        aioredis
+        if isinstance(aioredis, AsyncSessionBackend)
+        else AioredisSessionBackend(aioredis, redis_key_prefix)
+    )
     ttl = int(max_age.total_seconds())
+    refresh = (
+        int(refresh_interval.total_seconds()) if refresh_interval is not None else None
+    )
 
-    async def session_factory(
-        cookie: Annotated[str | None, Cookie(cookie_name)] = None
-    ) -> AsyncSession:
-        if cookie is not None:
-            namespace, id = cookie.split(":")
-            pipeline = aioredis.pipeline()
-            pipeline.get(f"{redis_key_prefix}{namespace}:s:{id}")
-            pipeline.zremrangebyscore(f"{redis_key_prefix}{namespace}:s", 0, time())
-            payload, _ = await pipeline.execute()
-            if payload is not None:
-                res = AsyncSession(loads(payload))
-                res._namespace = namespace
-            else:
-                res = None
-        else:
-            res = None
-
-        if res is None:
-            id = token_hex()
-            res = AsyncSession()
-            res._namespace = ""
+    def make_session_factory(
+        cls: type[_AsyncSessionBase], codec: _SessionCodec[Any]
+    ) -> Callable[..., AbstractAsyncContextManager]:
+        @asynccontextmanager
+        async def session_factory(
+            cookie: Annotated[str | None, Cookie(cookie_name)] = None
+        ) -> AsyncIterator[_AsyncSessionBase]:
+            session = _make_session(
+                cls, backend, cookie, cookie_name, cookie_settings, ttl, refresh, codec
+            )
+            try:
+                yield session
+            except ResponseException:
+                await session.flush()
+                raise
+            await session.flush()
 
-        res._cookie_name = cookie_name
-        res._cookie_settings = cookie_settings
-        res._aioredis = aioredis
-        res._ttl = ttl
-        res._id = id
-        res._key_prefix = redis_key_prefix
-        return res
+        return session_factory
 
     app.incant.register_hook(
         lambda p: p.name == session_arg_param_name and p.annotation is AsyncSession,
-        session_factory,
+        make_session_factory(AsyncSession, _MAPPING_CODEC),
+        is_ctx_manager="async",
+    )
+    app.incant.register_hook_factory(
+        lambda p: p.name == session_arg_param_name
+        and get_origin(p.annotation) is TypedAsyncSession,
+        lambda p: make_session_factory(
+            TypedAsyncSession, _AttrsCodec(get_args(p.annotation)[0], app.converter)
+        ),
+        is_ctx_manager="async",
     )
 
     app._openapi_security.append(
         OpenAPISecuritySpec(ApiKeySecurityScheme(cookie_name, "cookie"))
     )
 
-    return AsyncRedisSessionStore(
-        aioredis, redis_key_prefix, cookie_name, cookie_settings
+    return AsyncRedisSessionStore(backend, cookie_name, cookie_settings)
+
+
+def configure_sync_sessions(
+    app: App,
+    redis: "SyncRedis | SyncSessionBackend",
+    max_age: timedelta = timedelta(days=14),
+    cookie_name: str = "session_id",
+    cookie_settings: CookieSettings = CookieSettings(),
+    redis_key_prefix: str = "",
+    session_arg_param_name: str = "session",
+    refresh_interval: timedelta | None = None,
+) -> SyncRedisSessionStore:
+    """
+    Configure an instance of server-side sessions for a sync app, like Flask and
+    Django apps.
+
+    This is the sync counterpart of `configure_async_sessions`, with the same
+    parameters, session semantics and storage layout. Handlers may declare a
+    parameter of type `SyncSession` or `TypedSyncSession[T]`. Sync sessions are
+    loaded lazily, on first use, and don't need to be awaited.
+
+    :param redis: The session backend, or a redis-py client to use with a
+        `SyncRedisSessionBackend`. redis-py clients are thread-safe, and manage a
+        pool of connections.
+    :param redis_key_prefix: The prefix to use for redis keys, when given a redis-py
+        client.
+    """
+    backend = (
+        redis
+        if isinstance(redis, SyncSessionBackend)
+        else SyncRedisSessionBackend(redis, redis_key_prefix)
+    )
+    ttl = int(max_age.total_seconds())
+    refresh = (
+        int(refresh_interval.total_seconds()) if refresh_interval is not None else None
+    )
+
+    def make_session_factory(
+        cls: type[_SyncSessionBase], codec: _SessionCodec[Any]
+    ) -> Callable[..., AbstractContextManager]:
+        @contextmanager
+        def session_factory(
+            cookie: Annotated[str | None, Cookie(cookie_name)] = None
+        ) -> Iterator[_SyncSessionBase]:
+            session = _make_session(
+                cls, backend, cookie, cookie_name, cookie_settings, ttl, refresh, codec
+            )
+            try:
+                yield session
+            except ResponseException:
+                session.flush()
+                raise
+            session.flush()
+
+        return session_factory
+
+    app.incant.register_hook(
+        lambda p: p.name == session_arg_param_name and p.annotation is SyncSession,
+        make_session_factory(SyncSession, _MAPPING_CODEC),
+        is_ctx_manager="sync",
+    )
+    app.incant.register_hook_factory(
+        lambda p: p.name == session_arg_param_name
+        and get_origin(p.annotation) is TypedSyncSession,
+        lambda p: make_session_factory(
+            TypedSyncSession, _AttrsCodec(get_args(p.annotation)[0], app.converter)
+        ),
+        is_ctx_manager="sync",
     )
+
+    app._openapi_security.append(
+        OpenAPISecuritySpec(ApiKeySecurityScheme(cookie_name, "cookie"))
+    )
+
+    return SyncRedisSessionStore(backend, cookie_name, cookie_settings)
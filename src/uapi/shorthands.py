@@ -5,10 +5,10 @@ from typing import Any, Literal, Protocol, TypeAlias, TypeVar, get_origin
 from attrs import AttrsInstance, has
 from cattrs import Converter
 from incant import is_subclass
-from orjson import dumps
 
 from .openapi import MediaType, Response, SchemaBuilder
 from .status import BaseResponse, NoContent, Ok
+from .timing import unstructure_and_dump
 
 __all__ = [
     "ResponseShorthand",
@@ -149,7 +149,7 @@ def make_attrs_shorthand(
             def response_adapter(
                 value: AttrsInstance, _h=hook, _hs=headers
             ) -> Ok[bytes]:
-                return Ok(dumps(_h(value)), _hs)
+                return Ok(unstructure_and_dump(value, _h), _hs)
 
             return response_adapter
 
@@ -0,0 +1,330 @@
+"""Logging slow requests, with stack samples captured while they run."""
+import os
+import re
+import sys
+from asyncio import Task, current_task
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction, signature
+from logging import Logger, getLogger
+from queue import Empty, SimpleQueue
+from reprlib import Repr
+from threading import Lock, Thread, get_ident
+from time import perf_counter, sleep
+from traceback import StackSummary, format_stack
+from types import FrameType
+from typing import Any, Final, TypeVar
+from weakref import WeakValueDictionary
+
+from attrs import Factory, define, field
+
+from .timing import pop_phase_recorder, push_phase_recorder, summing_recorder
+from .types import Method, RouteName
+
+__all__ = ["SlowRequestLog"]
+
+R = TypeVar("R")
+
+#: Parameters with names matching this are redacted. Words are matched between
+#: underscores, so `api_key` matches but `monkey` doesn't.
+SENSITIVE_PARAMETER: Final = re.compile(
+    r"(?:^|_)(?:pass(?:word|wd|phrase)?|secrets?|tokens?|auth(?:orization)?|"
+    r"cookies?|sessions?|(?:api)?keys?|credentials?)(?:_|$)",
+    re.IGNORECASE,
+)
+REDACTED: Final = "<redacted>"
+
+_repr = Repr()
+_repr.maxstring = 100
+_repr.maxother = 100
+
+
+def _awaited_frames(task: Task) -> Iterator[tuple[FrameType, int]]:
+    """The frames of a task, following the chain of awaited coroutines.
+
+    `Task.get_stack` only returns the outermost frame of suspended tasks.
+    """
+    awaitable: Any = task.get_coro()
+    while awaitable is not None:
+        if isinstance(awaitable, Task):
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(
+            awaitable, "gi_frame", None
+        )
+        if frame is None:
+            return
+        yield frame, frame.f_lineno
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(
+            awaitable, "gi_yieldfrom", None
+        )
+
+
+@define(eq=False)
+class _InFlight:
+    """A request being watched."""
+
+    name: RouteName
+    method: Method
+    start: float
+    threshold: float
+    thread_id: int
+    #: The task running the handler, for async apps. With deadlines, this is a
+    #: child of the task running the request.
+    task: Task | None
+    phases: dict[str, float] = Factory(dict)
+    parameter_names: tuple[str, ...] = ()
+    arguments: tuple[Any, ...] = ()
+    keyword_arguments: dict[str, Any] = Factory(dict)
+    #: The stack sample, once captured.
+    stack: str | None = None
+    #: When the stack sample was captured, relative to the start.
+    stack_delay: float = 0.0
+    duration: float = 0.0
+
+    def capture_stack(self) -> None:
+        delay = perf_counter() - self.start
+        if self.task is not None:
+            self.stack = "".join(
+                StackSummary.extract(_awaited_frames(self.task)).format()
+            )
+        elif (frame := sys._current_frames().get(self.thread_id)) is not None:
+            self.stack = "".join(format_stack(frame))
+        else:
+            return
+        self.stack_delay = delay
+
+
+_current: ContextVar[_InFlight | None] = ContextVar("uapi_slow_request", default=None)
+
+
+def sanitize_parameters(
+    names: tuple[str, ...], args: tuple[Any, ...], kwargs: Mapping[str, Any]
+) -> dict[str, str]:
+    """Render handler arguments for logging, redacting sensitive ones."""
+    res = {}
+    for name, value in (*zip(names, args, strict=False), *kwargs.items()):
+        res[name] = REDACTED if SENSITIVE_PARAMETER.search(name) else _repr.repr(value)
+    return res
+
+
+@define
+class SlowRequestLog:
+    """Log requests over a latency threshold.
+
+    Slow requests are logged with their phase timings, sanitized handler arguments
+    and a stack sample, captured by a watchdog thread once the request goes over
+    its threshold.
+
+    The log records are emitted from the watchdog thread, so logging does not
+    block requests, and are rate limited using a token bucket. Requests over the
+    rate limit are counted, and the count is included in the next record.
+    """
+
+    #: The default threshold, in seconds.
+    threshold: float = 1.0
+    #: Thresholds by route name, overriding the default. `None` disables logging
+    #: for a route.
+    thresholds: Mapping[str, float | None] = Factory(dict)
+    #: The logger to use. Records are logged at the `WARNING` level.
+    logger: Logger = Factory(lambda: getLogger("uapi.slow"))
+    #: The number of records allowed per second, on average.
+    rate: float = 1.0
+    #: The number of records allowed in quick succession.
+    burst: int = 10
+    _in_flight: dict[int, _InFlight] = field(factory=dict, init=False)
+    _finished: SimpleQueue[_InFlight] = field(factory=SimpleQueue, init=False)
+    _interval: float = field(default=1.0, init=False)
+    _watchdog: Thread | None = field(default=None, init=False)
+    _watchdog_lock: Lock = field(factory=Lock, init=False)
+    _tokens: float = field(default=0.0, init=False)
+    _tokens_updated: float = field(default=0.0, init=False)
+    #: The number of slow requests not logged due to the rate limit.
+    dropped: int = field(default=0, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self._tokens = self.burst
+        self._tokens_updated = perf_counter()
+        _logs[id(self)] = self
+
+    def threshold_for(self, name: RouteName) -> float | None:
+        """The threshold of a route, in seconds, if logging is enabled for it."""
+        return self.thresholds.get(name, self.threshold)
+
+    def _reset_watchdog(self) -> None:
+        self._watchdog = None
+        self._watchdog_lock = Lock()
+
+    def _start(self, request: _InFlight) -> None:
+        if self._watchdog is None:
+            with self._watchdog_lock:
+                if self._watchdog is None:
+                    self._interval = min(max(request.threshold / 4, 0.005), 1.0)
+                    self._watchdog = Thread(
+                        target=self._watch, name="uapi-slow-requests", daemon=True
+                    )
+                    self._watchdog.start()
+        self._interval = min(self._interval, max(request.threshold / 4, 0.005))
+        self._in_flight[id(request)] = request
+
+    def _finish(self, request: _InFlight) -> None:
+        del self._in_flight[id(request)]
+        request.duration = perf_counter() - request.start
+        if request.duration >= request.threshold:
+            self._finished.put(request)
+
+    def _watch(self) -> None:
+        while True:
+            sleep(self._interval)
+            now = perf_counter()
+            for request in list(self._in_flight.values()):
+                if request.stack is None and now - request.start >= request.threshold:
+                    request.capture_stack()
+            self._emit_finished()
+
+    def _emit_finished(self) -> None:
+        while True:
+            try:
+                request = self._finished.get_nowait()
+            except Empty:
+                return
+            now = perf_counter()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._tokens_updated) * self.rate
+            )
+            self._tokens_updated = now
+            if self._tokens < 1:
+                self.dropped += 1
+                continue
+            self._tokens -= 1
+            self._emit(request)
+
+    def _emit(self, request: _InFlight) -> None:
+        parameters = sanitize_parameters(
+            request.parameter_names, request.arguments, request.keyword_arguments
+        )
+        lines = [
+            "Slow request to %s (%s) took %.3fs, over the %.3fs threshold.",
+            "Phases: "
+            + (
+                ", ".join(f"{p}={d:.3f}s" for p, d in request.phases.items())
+                or "none recorded"
+            ),
+            "Parameters: "
+            + (", ".join(f"{n}={v}" for n, v in parameters.items()) or "none"),
+        ]
+        if request.stack is not None:
+            lines.append(
+                f"Stack sample, captured after {request.stack_delay:.3f}s:\n"
+                + request.stack.rstrip("\n")
+            )
+        else:
+            lines.append("Stack sample: not captured, the request finished first.")
+        dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.append(f"{dropped} slow requests were not logged due to rate limits.")
+        self.logger.warning(
+            "\n".join(lines),
+            request.name,
+            request.method,
+            request.duration,
+            request.threshold,
+            extra={
+                "route_name": request.name,
+                "method": request.method,
+                "duration": request.duration,
+                "phases": request.phases,
+                "parameters": parameters,
+            },
+        )
+
+
+_logs: Final[WeakValueDictionary[int, SlowRequestLog]] = WeakValueDictionary()
+
+
+def _reset_watchdogs() -> None:
+    # Threads do not survive forks.
+    for log in _logs.values():
+        log._reset_watchdog()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_watchdogs)
+
+
+def capture_arguments(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a handler to make its arguments available to the slow request log."""
+    names = tuple(signature(handler).parameters)
+
+    if iscoroutinefunction(handler):
+
+        @wraps(handler)
+        async def capturing_async_handler(*args: Any, **kwargs: Any) -> Any:
+            if (request := _current.get()) is not None:
+                request.task = current_task()
+                request.parameter_names = names
+                request.arguments = args
+                request.keyword_arguments = kwargs
+            return await handler(*args, **kwargs)
+
+        return capturing_async_handler
+
+    @wraps(handler)
+    def capturing_handler(*args: Any, **kwargs: Any) -> Any:
+        if (request := _current.get()) is not None:
+            request.parameter_names = names
+            request.arguments = args
+            request.keyword_arguments = kwargs
+        return handler(*args, **kwargs)
+
+    return capturing_handler
+
+
+def watch_async(
+    handler: Callable[..., Awaitable[R]],
+    log: SlowRequestLog,
+    name: RouteName,
+    method: Method,
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted async handler to log slow requests."""
+    if (threshold := log.threshold_for(name)) is None:
+        return handler
+
+    async def watched(*args: Any, **kwargs: Any) -> R:
+        request = _InFlight(
+            name, method, perf_counter(), threshold, get_ident(), current_task()
+        )
+        log._start(request)
+        token = _current.set(request)
+        recorder_token = push_phase_recorder(summing_recorder(request.phases))
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            pop_phase_recorder(recorder_token)
+            _current.reset(token)
+            log._finish(request)
+
+    return watched
+
+
+def watch_sync(
+    handler: Callable[..., R], log: SlowRequestLog, name: RouteName, method: Method
+) -> Callable[..., R]:
+    """Wrap an adapted sync handler to log slow requests."""
+    if (threshold := log.threshold_for(name)) is None:
+        return handler
+
+    def watched(*args: Any, **kwargs: Any) -> R:
+        request = _InFlight(name, method, perf_counter(), threshold, get_ident(), None)
+        log._start(request)
+        token = _current.set(request)
+        recorder_token = push_phase_recorder(summing_recorder(request.phases))
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            pop_phase_recorder(recorder_token)
+            _current.reset(token)
+            log._finish(request)
+
+    return watched
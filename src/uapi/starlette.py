@@ -1,10 +1,13 @@
 from asyncio import create_task, sleep
-from collections.abc import Callable, Coroutine
-from contextlib import suppress
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Coroutine
+from contextlib import asynccontextmanager, suppress
 from functools import partial
 from inspect import Parameter, Signature, signature
-from typing import Any, ClassVar, Generic, TypeAlias, TypeVar
+from socket import socket
+from typing import Any, ClassVar, Final, Generic, TypeAlias, TypeVar
 
+from anyio import CancelScope
 from attrs import Factory, define
 from cattrs import Converter
 from incant import Hook, Incanter
@@ -12,8 +15,10 @@ from incant import Hook, Incanter
 from starlette.applications import Starlette
 from starlette.requests import Request as FrameworkRequest
 from starlette.responses import Response as FrameworkResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from . import ResponseException
+from ._workers import supervise
 from .base import AsyncApp as BaseApp
 from .path import parse_curly_path_params
 from .requests import (
@@ -31,7 +36,7 @@ from .requests import (
 from .responses import make_exception_adapter, make_response_adapter
 from .shorthands import ResponseShorthand, T_co
 from .status import BadRequest, BaseResponse, Headers, get_status_code
-from .types import Method, RouteName
+from .types import ClientAddress, Method, RouteName
 
 __all__ = ["App", "StarletteApp"]
 
@@ -64,8 +69,9 @@ class StarletteApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
         return self  # type: ignore
 
     def to_framework_app(self) -> Starlette:
-        s = Starlette()
+        s = Starlette(lifespan=self._framework_lifespan)
         exc_adapter = make_exception_adapter(self.converter)
+        return_adapter = self._capture_response(_framework_return_adapter)
 
         for (method, path), (handler, name, _) in self._route_map.items():
             ra = make_response_adapter(
@@ -77,7 +83,7 @@ class StarletteApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
             path_params = parse_curly_path_params(path)
             hooks = [Hook.for_name(p, None) for p in path_params]
 
-            base_handler = self.incant.compose(handler, is_async=True)
+            base_handler = self._compose_handler(handler, name, is_async=True)
             # Detect required content-types here, based on the registered
             # request loaders.
             base_sig = signature(base_handler)
@@ -103,7 +109,7 @@ class StarletteApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
 
                 async def adapted(
                     request: FrameworkRequest,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ea=exc_adapter,
                     _handler=adapted,
                     _path_params=path_params,
@@ -140,7 +146,7 @@ class StarletteApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                 async def adapted(
                     request: FrameworkRequest,
                     _ra=ra,
-                    _fra=_framework_return_adapter,
+                    _fra=return_adapter,
                     _ea=exc_adapter,
                     _prepared=adapted,
                     _path_params=path_params,
@@ -172,23 +178,70 @@ class StarletteApp(Generic[C_contra], BaseApp[C_contra | FrameworkResponse]):
                     except ResponseException as exc:
                         return _fra(_ea(exc))
 
+            adapted = self._wrap_route(
+                adapted,
+                method,
+                path,
+                name,
+                return_adapter,
+                _is_disconnected,
+                request_header=lambda args, header: args[0].headers.get(header),
+            )
+
             s.add_route(path, adapted, name=name, methods=[method])
 
+        if any(o.cancel_on_disconnect for o in self._route_options.values()):
+            s.add_middleware(_ReceiveBufferMiddleware)
+
         return s
 
+    @asynccontextmanager
+    async def _framework_lifespan(self, _: Starlette) -> AsyncIterator[None]:
+        await self.startup()
+        try:
+            yield
+        finally:
+            await self.shutdown()
+
     async def run(
         self,
         host: str = "127.0.0.1",
         port: int = 8000,
         handle_signals: bool = True,
         log_level: str | int | None = None,
+        workers: int = 1,
+        reuse_port: bool = False,
     ) -> None:
         """Start serving this app using uvicorn.
 
         Cancel the task running this to shut down uvicorn.
+
+        :param workers: The number of worker processes. With more than one, this
+            process forks the workers and supervises them, restarting crashed
+            workers and shutting them down gracefully. Requires a POSIX system.
+        :param reuse_port: With multiple workers, give every worker a socket of its
+            own using `SO_REUSEPORT`, instead of sharing a single socket.
         """
         from uvicorn import Config, Server
 
+        if workers > 1:
+
+            async def serve_worker(sock: socket) -> None:
+                config = Config(
+                    self.to_framework_app(), access_log=False, log_level=log_level
+                )
+                await Server(config=config).serve(sockets=[sock])
+
+            await supervise(
+                serve_worker,
+                workers,
+                host,
+                port,
+                reuse_port=reuse_port,
+                handle_signals=handle_signals,
+            )
+            return
+
         config = Config(
             self.to_framework_app(),
             host=host,
@@ -272,6 +325,11 @@ def _make_starlette_incanter(converter: Converter) -> Incanter:
 
     res.register_hook(lambda p: p.annotation is ReqBytes, request_bytes)
 
+    def client_address(_request: FrameworkRequest) -> ClientAddress:
+        return ClientAddress(_request.client.host if _request.client else "")
+
+    res.register_hook(lambda p: p.annotation is ClientAddress, client_address)
+
     res.register_hook_factory(
         is_req_body_attrs, partial(attrs_body_factory, converter=converter)
     )
@@ -365,6 +423,69 @@ def _make_form_dependency(
     return read_form
 
 
+_RECEIVE_BUFFER: Final = "uapi.receive_buffer"
+
+
+class _ReceiveBuffer:
+    """An ASGI receive channel that can be polled for disconnects without losing
+    request body messages.
+
+    Body messages received while polling are buffered, and handed to the request
+    on its next read.
+    """
+
+    __slots__ = ("_buffer", "_receive", "_receiving", "disconnected")
+
+    def __init__(self, receive: Receive) -> None:
+        self._receive = receive
+        self._buffer: deque[Message] = deque()
+        self._receiving = False
+        self.disconnected = False
+
+    async def __call__(self) -> Message:
+        if self._buffer:
+            return self._buffer.popleft()
+        self._receiving = True
+        try:
+            message = await self._receive()
+        finally:
+            self._receiving = False
+        if message["type"] == "http.disconnect":
+            self.disconnected = True
+        return message
+
+    async def poll(self) -> bool:
+        """Check for a disconnect without waiting for messages."""
+        # A pending read by the request sees the disconnect on its own.
+        if self.disconnected or self._receiving:
+            return self.disconnected
+        message: Message = {}
+        with CancelScope() as cs:
+            cs.cancel()
+            message = await self._receive()
+        if message.get("type") == "http.disconnect":
+            self.disconnected = True
+        elif message:
+            self._buffer.append(message)
+        return self.disconnected
+
+
+class _ReceiveBufferMiddleware:
+    """Buffers the receive channel of HTTP requests, for `_is_disconnected`."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            receive = scope[_RECEIVE_BUFFER] = _ReceiveBuffer(receive)
+        await self.app(scope, receive, send)
+
+
+async def _is_disconnected(request: FrameworkRequest) -> bool:
+    return await request.scope[_RECEIVE_BUFFER].poll()
+
+
 def _framework_return_adapter(resp: BaseResponse) -> FrameworkResponse:
     if resp.headers:
         headers, cookies = _extract_cookies(resp.headers)
@@ -13,7 +13,10 @@ __all__ = [
     "BadRequest",
     "Forbidden",
     "NotFound",
+    "TooManyRequests",
     "InternalServerError",
+    "ServiceUnavailable",
+    "GatewayTimeout",
     "BaseResponse",
     "R",
 ]
@@ -91,6 +94,21 @@ class NotFound(BaseResponse[Literal[404], R]):
     pass
 
 
+@define
+class TooManyRequests(BaseResponse[Literal[429], R]):
+    pass
+
+
 @define
 class InternalServerError(BaseResponse[Literal[500], R]):
     pass
+
+
+@define
+class ServiceUnavailable(BaseResponse[Literal[503], R]):
+    pass
+
+
+@define
+class GatewayTimeout(BaseResponse[Literal[504], R]):
+    pass
@@ -0,0 +1,283 @@
+"""Sampled timing of the phases of request processing."""
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar, Token
+from functools import wraps
+from inspect import iscoroutinefunction
+from random import random
+from time import perf_counter
+from typing import Any, Final, TypeAlias, TypeVar
+
+from attrs import Factory, define, field
+from orjson import dumps, loads
+
+from .metrics import ThreadShards, escape_label, route_labels
+from .types import Method, RouteName
+
+__all__ = ["PhaseTiming", "RoutePhases"]
+
+R = TypeVar("R")
+
+#: Decoding the JSON request body.
+PARSE: Final = "parse"
+#: Structuring the decoded request body into a model.
+STRUCTURE: Final = "structure"
+#: Running the handler itself.
+HANDLER: Final = "handler"
+#: Unstructuring the response model.
+UNSTRUCTURE: Final = "unstructure"
+#: Encoding the unstructured response to JSON.
+SERIALIZE: Final = "serialize"
+#: The whole request, as processed by _uapi_.
+TOTAL: Final = "total"
+
+#: Records a phase of a request, given the phase name and its start and end as
+#: `time.perf_counter` values.
+PhaseRecorder: TypeAlias = Callable[[str, float, float], None]
+
+#: Records the phases of the request being processed, if any.
+_recorder: ContextVar[PhaseRecorder | None] = ContextVar(
+    "uapi_phase_recorder", default=None
+)
+#: Whether a recorder was ever pushed in this process. Until then, no request
+#: records its phases, so the hottest paths skip looking up the recorder.
+_recorder_pushed = False
+
+
+@define
+class RoutePhases:
+    """Phase timings of the sampled requests of a route and method."""
+
+    #: The number of sampled requests.
+    samples: int = 0
+    #: The total duration of every phase across the sampled requests, in seconds.
+    durations: dict[str, float] = Factory(dict)
+
+    def record(self, durations: dict[str, float]) -> None:
+        """Record the phase durations of a sampled request."""
+        self.samples += 1
+        for phase, duration in durations.items():
+            self.durations[phase] = self.durations.get(phase, 0.0) + duration
+
+    def merge(self, other: "RoutePhases") -> None:
+        """Add the timings of `other` to these."""
+        self.samples += other.samples
+        for phase, duration in other.durations.copy().items():
+            self.durations[phase] = self.durations.get(phase, 0.0) + duration
+
+    def means(self) -> dict[str, float]:
+        """The mean duration of every phase, in seconds."""
+        if not self.samples:
+            return {}
+        return {phase: total / self.samples for phase, total in self.durations.items()}
+
+
+@define
+class PhaseTiming:
+    """Timing of the phases of request processing, for a sample of requests.
+
+    The timed phases are decoding the JSON request body (`parse`), structuring it
+    (`structure`), running the handler (`handler`), unstructuring the response
+    (`unstructure`) and encoding it (`serialize`). `total` covers the whole
+    request, so the difference between it and the other phases is time spent
+    in dependencies and _uapi_ itself.
+
+    Like metrics, timings are recorded per thread, without locks.
+    """
+
+    #: The fraction of requests to time, between 0 and 1.
+    sample_rate: float = 0.01
+    #: Whether to add a `Server-Timing` header to the responses of the sampled
+    #: requests.
+    server_timing: bool = False
+    _shards: ThreadShards[tuple[RouteName, Method], RoutePhases] = field(
+        default=Factory(lambda: ThreadShards(RoutePhases)), init=False
+    )
+
+    def route_phases(self, name: RouteName, method: Method) -> RoutePhases:
+        """The timings of a route, as recorded by the current thread."""
+        return self._shards.get((name, method))
+
+    def collect(self) -> dict[tuple[RouteName, Method], RoutePhases]:
+        """Merge the timings recorded by all threads."""
+        res: dict[tuple[RouteName, Method], RoutePhases] = {}
+        for key, route_phases in self._shards.items():
+            if (merged := res.get(key)) is None:
+                merged = res[key] = RoutePhases()
+            merged.merge(route_phases)
+        return res
+
+    def render(self) -> str:
+        """Render the timings in the Prometheus text exposition format."""
+        lines = [
+            (
+                "# HELP uapi_request_phase_seconds Request processing duration by"
+                " phase, for sampled requests."
+            ),
+            "# TYPE uapi_request_phase_seconds summary",
+        ]
+        for (name, method), phases in sorted(self.collect().items()):
+            labels = route_labels(name, method)
+            for phase, duration in sorted(phases.durations.items()):
+                phase_labels = f'{labels},phase="{escape_label(phase)}"'
+                lines.append(
+                    f"uapi_request_phase_seconds_sum{{{phase_labels}}} {duration!r}"
+                )
+                lines.append(
+                    f"uapi_request_phase_seconds_count{{{phase_labels}}}"
+                    f" {phases.samples}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def push_phase_recorder(recorder: PhaseRecorder) -> Token:
+    """Record the phases of the current request using `recorder`.
+
+    If a recorder is already active, both are used.
+
+    :return: A token for `pop_phase_recorder`.
+    """
+    global _recorder_pushed
+    _recorder_pushed = True
+    if (outer := _recorder.get()) is not None:
+
+        def both(phase: str, start: float, end: float) -> None:
+            outer(phase, start, end)
+            recorder(phase, start, end)
+
+        return _recorder.set(both)
+    return _recorder.set(recorder)
+
+
+def pop_phase_recorder(token: Token) -> None:
+    """Restore the recorder active before `push_phase_recorder`."""
+    _recorder.reset(token)
+
+
+def load_and_structure(body: bytes, structure: Callable[[Any], R]) -> R:
+    """Decode a JSON body and structure it, recording both if needed."""
+    if (record := _recorder.get()) is None:
+        return structure(loads(body))
+    start = perf_counter()
+    payload = loads(body)
+    parsed = perf_counter()
+    res = structure(payload)
+    record(PARSE, start, parsed)
+    record(STRUCTURE, parsed, perf_counter())
+    return res
+
+
+def unstructure_and_dump(value: Any, unstructure: Callable[[Any], Any]) -> bytes:
+    """Unstructure a value and encode it to JSON, recording both if needed."""
+    if (record := _recorder.get()) is None:
+        return dumps(unstructure(value))
+    start = perf_counter()
+    payload = unstructure(value)
+    unstructured = perf_counter()
+    res = dumps(payload)
+    record(UNSTRUCTURE, start, unstructured)
+    record(SERIALIZE, unstructured, perf_counter())
+    return res
+
+
+def time_handler(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a handler to record it as a phase if needed, keeping its signature."""
+    if iscoroutinefunction(handler):
+
+        @wraps(handler)
+        async def timed_async_handler(*args: Any, **kwargs: Any) -> Any:
+            if (record := _recorder.get()) is None:
+                return await handler(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                record(HANDLER, start, perf_counter())
+
+        return timed_async_handler
+
+    @wraps(handler)
+    def timed_handler(*args: Any, **kwargs: Any) -> Any:
+        if (record := _recorder.get()) is None:
+            return handler(*args, **kwargs)
+        start = perf_counter()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            record(HANDLER, start, perf_counter())
+
+    return timed_handler
+
+
+def summing_recorder(timings: dict[str, float]) -> PhaseRecorder:
+    """A recorder summing the durations of every phase into `timings`."""
+
+    def record(phase: str, start: float, end: float) -> None:
+        timings[phase] = timings.get(phase, 0.0) + end - start
+
+    return record
+
+
+def server_timing_header(timings: dict[str, float]) -> str:
+    """Render phase durations as a `Server-Timing` header value."""
+    return ", ".join(
+        f"{phase};dur={duration * 1000:.3f}" for phase, duration in timings.items()
+    )
+
+
+def _finish(
+    timing: PhaseTiming,
+    name: RouteName,
+    method: Method,
+    timings: dict[str, float],
+    response: Any,
+) -> None:
+    timing.route_phases(name, method).record(timings)
+    if timing.server_timing:
+        response.headers["server-timing"] = server_timing_header(timings)
+
+
+def time_phases_async(
+    handler: Callable[..., Awaitable[R]],
+    timing: PhaseTiming,
+    name: RouteName,
+    method: Method,
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted async handler to time the phases of sampled requests."""
+
+    async def sampled(*args: Any, **kwargs: Any) -> R:
+        if random() >= timing.sample_rate:  # noqa: S311
+            return await handler(*args, **kwargs)
+        timings: dict[str, float] = {}
+        token = push_phase_recorder(summing_recorder(timings))
+        start = perf_counter()
+        try:
+            res = await handler(*args, **kwargs)
+        finally:
+            pop_phase_recorder(token)
+        timings[TOTAL] = perf_counter() - start
+        _finish(timing, name, method, timings, res)
+        return res
+
+    return sampled
+
+
+def time_phases_sync(
+    handler: Callable[..., R], timing: PhaseTiming, name: RouteName, method: Method
+) -> Callable[..., R]:
+    """Wrap an adapted sync handler to time the phases of sampled requests."""
+
+    def sampled(*args: Any, **kwargs: Any) -> R:
+        if random() >= timing.sample_rate:  # noqa: S311
+            return handler(*args, **kwargs)
+        timings: dict[str, float] = {}
+        token = push_phase_recorder(summing_recorder(timings))
+        start = perf_counter()
+        try:
+            res = handler(*args, **kwargs)
+        finally:
+            pop_phase_recorder(token)
+        timings[TOTAL] = perf_counter() - start
+        _finish(timing, name, method, timings, res)
+        return res
+
+    return sampled
@@ -0,0 +1,343 @@
+"""Request tracing, following the OpenTelemetry data model.
+
+Every traced request produces a server span named after the route, with child
+spans for the dependencies of the handler, the handler itself and the
+(de)serialization phases.
+"""
+import re
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from random import getrandbits, random
+from time import perf_counter, time_ns
+from typing import Any, Final, Literal, Protocol, TypeAlias, TypeVar
+
+from attrs import Factory, define, frozen
+from incant import Hook, Incanter
+
+from .lifespan import Singleton
+from .timing import pop_phase_recorder, push_phase_recorder
+from .types import Method, RouteName
+
+__all__ = [
+    "InMemorySpanExporter",
+    "Span",
+    "SpanExporter",
+    "Tracer",
+    "current_traceparent",
+]
+
+R = TypeVar("R")
+
+AttributeValue: TypeAlias = str | int | float | bool
+
+_TRACEPARENT_RE: Final = re.compile(
+    r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?"
+)
+_INVALID_TRACE_ID: Final = "0" * 32
+_INVALID_SPAN_ID: Final = "0" * 16
+
+
+@frozen
+class Span:
+    """A finished span, following the OpenTelemetry data model."""
+
+    name: str
+    #: The trace ID, as 32 hex digits.
+    trace_id: str
+    #: The span ID, as 16 hex digits.
+    span_id: str
+    #: The ID of the parent span. For request spans, this is the span of the caller
+    #: propagated using the `traceparent` header, if any.
+    parent_span_id: str | None
+    kind: Literal["server", "internal"]
+    #: The start time, in nanoseconds since the epoch.
+    start_time: int
+    #: The end time, in nanoseconds since the epoch.
+    end_time: int
+    attributes: Mapping[str, AttributeValue] = Factory(dict)
+    status: Literal["unset", "error"] = "unset"
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: Sequence[Span]) -> None:
+        """Export the spans of a request, once it is processed.
+
+        This is called on the request path, so exporters doing I/O should queue the
+        spans and export them in the background.
+        """
+        ...
+
+
+@define
+class InMemorySpanExporter:
+    """An exporter keeping spans in memory, for tests."""
+
+    #: The exported spans, in order of export.
+    spans: list[Span] = Factory(list)
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+@define
+class Tracer:
+    """Request tracing configuration."""
+
+    exporter: SpanExporter
+    #: The fraction of requests without a sampled parent to trace, between 0 and 1.
+    #: Requests with a parent follow the sampling decision of the parent.
+    sample_rate: float = 1.0
+
+
+def _new_id(bits: int) -> str:
+    while not (res := getrandbits(bits)):
+        pass
+    return f"{res:0{bits // 4}x}"
+
+
+@define
+class _RequestTrace:
+    """The spans of a request being processed."""
+
+    start: float
+    start_ns: int
+    span_id: str = Factory(lambda: _new_id(64))
+    trace_id: str = Factory(lambda: _new_id(128))
+    parent_span_id: str | None = None
+    #: The finished child spans, as names and `perf_counter` starts and ends.
+    children: list[tuple[str, float, float]] = Factory(list)
+
+    def adopt(self, traceparent: str) -> bool:
+        """Continue the trace from a `traceparent` header.
+
+        :return: Whether the parent is sampled.
+        """
+        if (m := _TRACEPARENT_RE.fullmatch(traceparent.strip())) is None:
+            return True
+        version, trace_id, parent_id, flags, rest = m.groups()
+        if (
+            version == "ff"
+            or (version == "00" and rest)
+            or trace_id == _INVALID_TRACE_ID
+            or parent_id == _INVALID_SPAN_ID
+        ):
+            return True
+        self.trace_id = trace_id
+        self.parent_span_id = parent_id
+        return bool(int(flags, 16) & 1)
+
+    def record(self, name: str, start: float, end: float) -> None:
+        self.children.append((name, start, end))
+
+    def _ns(self, t: float) -> int:
+        return self.start_ns + int((t - self.start) * 1_000_000_000)
+
+    def spans(
+        self,
+        name: RouteName,
+        end: float,
+        attributes: dict[str, AttributeValue],
+        error: bool,
+    ) -> list[Span]:
+        res = [
+            Span(
+                child_name,
+                self.trace_id,
+                _new_id(64),
+                self.span_id,
+                "internal",
+                self._ns(child_start),
+                self._ns(child_end),
+            )
+            for child_name, child_start, child_end in self.children
+        ]
+        res.append(
+            Span(
+                name,
+                self.trace_id,
+                self.span_id,
+                self.parent_span_id,
+                "server",
+                self.start_ns,
+                self._ns(end),
+                attributes,
+                "error" if error else "unset",
+            )
+        )
+        return res
+
+
+_current_trace: ContextVar[_RequestTrace | None] = ContextVar(
+    "uapi_trace", default=None
+)
+
+
+def current_traceparent() -> str | None:
+    """The `traceparent` header for propagating the trace of the current request to
+    outgoing requests, if the request is traced."""
+    if (trace := _current_trace.get()) is None:
+        return None
+    return f"00-{trace.trace_id}-{trace.span_id}-01"
+
+
+def traced_dependency(dependency: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a dependency to record it as a span, keeping its signature."""
+    name = getattr(dependency, "__qualname__", None) or repr(dependency)
+
+    if iscoroutinefunction(dependency):
+
+        @wraps(dependency)
+        async def traced_async_dependency(*args: Any, **kwargs: Any) -> Any:
+            if (trace := _current_trace.get()) is None:
+                return await dependency(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return await dependency(*args, **kwargs)
+            finally:
+                trace.record(name, start, perf_counter())
+
+        return traced_async_dependency
+
+    @wraps(dependency)
+    def traced_sync_dependency(*args: Any, **kwargs: Any) -> Any:
+        if (trace := _current_trace.get()) is None:
+            return dependency(*args, **kwargs)
+        start = perf_counter()
+        try:
+            return dependency(*args, **kwargs)
+        finally:
+            trace.record(name, start, perf_counter())
+
+    return traced_sync_dependency
+
+
+def _is_singleton_getter(dependency: Callable) -> bool:
+    return isinstance(getattr(dependency, "__self__", None), Singleton)
+
+
+def traced_incanter(incanter: Incanter) -> Incanter:
+    """Copy an incanter, recording the dependencies it provides as spans.
+
+    Dependencies used as context managers and singletons are not recorded.
+    """
+    wrapped: dict[Callable, Callable] = {}
+
+    def wrap(dependency: Callable) -> Callable:
+        if _is_singleton_getter(dependency):
+            return dependency
+        if (res := wrapped.get(dependency)) is None:
+            res = wrapped[dependency] = traced_dependency(dependency)
+        return res
+
+    def traced_hook(hook: Hook) -> Hook:
+        if hook.factory is None or hook.factory[1] is not None:
+            return hook
+        make_dependency = hook.factory[0]
+        return Hook(hook.predicate, (lambda p: wrap(make_dependency(p)), None))
+
+    return Incanter([traced_hook(h) for h in incanter.hook_factory_registry])
+
+
+def _start_trace(
+    tracer: Tracer,
+    args: tuple[Any, ...],
+    request_header: Callable[[tuple[Any, ...], str], str | None] | None,
+) -> _RequestTrace | None:
+    """Start tracing a request, if sampled."""
+    traceparent = (
+        request_header(args, "traceparent") if request_header is not None else None
+    )
+    if traceparent is None and random() >= tracer.sample_rate:  # noqa: S311
+        return None
+    trace = _RequestTrace(perf_counter(), time_ns())
+    if traceparent is not None:
+        if not trace.adopt(traceparent):
+            return None
+        if (
+            trace.parent_span_id is None
+            and random() >= tracer.sample_rate  # noqa: S311
+        ):
+            # The header was invalid, so this is a new trace.
+            return None
+    return trace
+
+
+def trace_async(
+    handler: Callable[..., Awaitable[R]],
+    tracer: Tracer,
+    name: RouteName,
+    method: Method,
+    path: str,
+    response_status: Callable[[R], int],
+    request_header: Callable[[tuple[Any, ...], str], str | None] | None,
+) -> Callable[..., Awaitable[R]]:
+    """Wrap an adapted async handler to trace requests."""
+
+    async def traced(*args: Any, **kwargs: Any) -> R:
+        if (trace := _start_trace(tracer, args, request_header)) is None:
+            return await handler(*args, **kwargs)
+        attributes: dict[str, AttributeValue] = {
+            "http.request.method": method,
+            "http.route": path,
+        }
+        error = True
+        token = _current_trace.set(trace)
+        recorder_token = push_phase_recorder(trace.record)
+        try:
+            res = await handler(*args, **kwargs)
+            status = response_status(res)
+            attributes["http.response.status_code"] = status
+            error = status >= 500
+            return res
+        except BaseException as exc:
+            attributes["error.type"] = exc.__class__.__qualname__
+            raise
+        finally:
+            pop_phase_recorder(recorder_token)
+            _current_trace.reset(token)
+            tracer.exporter.export(trace.spans(name, perf_counter(), attributes, error))
+
+    return traced
+
+
+def trace_sync(
+    handler: Callable[..., R],
+    tracer: Tracer,
+    name: RouteName,
+    method: Method,
+    path: str,
+    response_status: Callable[[R], int],
+    request_header: Callable[[tuple[Any, ...], str], str | None] | None,
+) -> Callable[..., R]:
+    """Wrap an adapted sync handler to trace requests."""
+
+    def traced(*args: Any, **kwargs: Any) -> R:
+        if (trace := _start_trace(tracer, args, request_header)) is None:
+            return handler(*args, **kwargs)
+        attributes: dict[str, AttributeValue] = {
+            "http.request.method": method,
+            "http.route": path,
+        }
+        error = True
+        token = _current_trace.set(trace)
+        recorder_token = push_phase_recorder(trace.record)
+        try:
+            res = handler(*args, **kwargs)
+            status = response_status(res)
+            attributes["http.response.status_code"] = status
+            error = status >= 500
+            return res
+        except BaseException as exc:
+            attributes["error.type"] = exc.__class__.__qualname__
+            raise
+        finally:
+            pop_phase_recorder(recorder_token)
+            _current_trace.reset(token)
+            tracer.exporter.export(trace.spans(name, perf_counter(), attributes, error))
+
+    return traced
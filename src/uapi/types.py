@@ -7,6 +7,9 @@ CB = Callable[..., R]
 #: The route name.
 RouteName = NewType("RouteName", str)
 
+#: The network address of the client, usually an IP address. Empty if unknown.
+ClientAddress = NewType("ClientAddress", str)
+
 RouteTags: TypeAlias = Sequence[str]
 
 #: The HTTP request method.
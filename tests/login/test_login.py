@@ -9,8 +9,15 @@ from httpx import AsyncClient
 
 from tests.starlette import run_on_starlette as run_on_framework
 from uapi.cookies import CookieSettings
-from uapi.login import AsyncLoginSession, configure_async_login
-from uapi.sessions.redis import configure_async_sessions
+from uapi.flask import App as FlaskApp
+from uapi.login import (
+    AsyncLoginSession,
+    SyncLoginSession,
+    configure_async_login,
+    configure_sync_login,
+)
+from uapi.sessions import SyncInMemorySessionBackend
+from uapi.sessions.redis import configure_async_sessions, configure_sync_sessions
 from uapi.starlette import App as FrameworkApp
 from uapi.status import Created, NoContent
 
@@ -141,3 +148,47 @@ async def test_logging_out_others(login_app: int):
 
         resp = await client.get(f"http://localhost:{login_app}/")
         assert resp.text == "no user"
+
+
+def test_sync_login() -> None:
+    """Sync apps support logging in and out, and logging out others."""
+    app = FlaskApp()
+    store = configure_sync_sessions(
+        app, SyncInMemorySessionBackend(), cookie_settings=CookieSettings(secure=False)
+    )
+    login_manager = configure_sync_login(app, int, store)
+
+    @app.get("/")
+    def index(current_user_id: int | None) -> str:
+        if current_user_id is None:
+            return "no user"
+        return str(current_user_id)
+
+    @app.post("/login")
+    def login(user_id: int, login_session: SyncLoginSession[int]) -> Created[None]:
+        return Created(None, login_session.login_and_return(user_id))
+
+    @app.post("/logout")
+    def logout(login_session: SyncLoginSession[int]) -> NoContent:
+        return NoContent(login_session.logout_and_return())
+
+    @app.delete("/sessions/<int:user_id>")
+    def logout_other(current_user_id: int, user_id: int) -> str:
+        login_manager.logout(user_id)
+        return "OK"
+
+    flask_app = app.to_framework_app(__name__)
+    client = flask_app.test_client()
+    admin = flask_app.test_client()
+
+    assert client.get("/").text == "no user"
+    assert client.post("/login", query_string={"user_id": 10}).status_code == 201
+    assert client.get("/").text == "10"
+
+    assert admin.delete("/sessions/10").status_code == 403
+    admin.post("/login", query_string={"user_id": 11})
+    assert admin.delete("/sessions/10").status_code == 200
+    assert client.get("/").text == "no user"
+
+    assert admin.post("/logout").status_code == 204
+    assert admin.get("/").text == "no user"
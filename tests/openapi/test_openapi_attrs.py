@@ -15,6 +15,7 @@ from uapi.openapi import (
     Reference,
     RequestBody,
     Schema,
+    SchemaBuilder,
 )
 
 
@@ -562,6 +563,31 @@ def test_same_name_models() -> None:
     )
 
 
+def test_many_same_name_models() -> None:
+    """Names of models with the same name are numbered, skipping taken names."""
+    builder = SchemaBuilder()
+
+    def make_model() -> type:
+        @define
+        class Model:
+            a: int
+
+        return Model
+
+    @define
+    class Model3:
+        a: int
+
+    models = [make_model() for _ in range(4)]
+    builder.get_schema_for_type(models[0])
+    builder.get_schema_for_type(Model3)
+    for model in models[1:]:
+        builder.get_schema_for_type(model)
+
+    assert [builder.names[m] for m in models] == ["Model", "Model2", "Model4", "Model5"]
+    assert builder.names[Model3] == "Model3"
+
+
 def test_generic_dicts(app: App) -> None:
     spec: OpenAPI = app.make_openapi_spec()
 
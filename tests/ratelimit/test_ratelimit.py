@@ -0,0 +1,143 @@
+"""Tests for the in-memory rate limits."""
+from datetime import timedelta
+
+from httpx import ASGITransport, AsyncClient
+
+from uapi import Header
+from uapi.ratelimit import (
+    InMemoryRateLimitBackend,
+    RateLimit,
+    by_header,
+    by_route,
+    configure_async_rate_limit,
+)
+from uapi.starlette import App
+
+
+async def test_client_address_limit() -> None:
+    """Requests over the limit are rejected, per route."""
+    app = App()
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    @app.get("/other")
+    async def other() -> str:
+        return "other"
+
+    configure_async_rate_limit(app, RateLimit.per(2, timedelta(minutes=1)))
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        assert (await client.get("/")).status_code == 200
+        assert (await client.get("/")).status_code == 200
+
+        resp = await client.get("/")
+        assert resp.status_code == 429
+        assert resp.headers["retry-after"] == "30"
+
+        # Other routes have buckets of their own.
+        assert (await client.get("/other")).text == "other"
+
+
+async def test_header_limits() -> None:
+    """Limits can be keyed by headers, and stacked."""
+    app = App()
+
+    @app.get("/")
+    async def index(x_api_key: Header[str] = "") -> str:
+        return x_api_key
+
+    configure_async_rate_limit(app, RateLimit(0.1, 1), key=by_header("x-api-key"))
+    limiter = configure_async_rate_limit(
+        app, RateLimit(0.1, 3), key=by_route, routes={"index"}
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.get("/", headers={"x-api-key": "1"})
+        assert resp.text == "1"
+        assert (await client.get("/", headers={"x-api-key": "1"})).status_code == 429
+        assert (await client.get("/", headers={"x-api-key": "2"})).text == "2"
+        assert (await client.get("/")).text == ""
+
+        # The route-wide limit is now exhausted.
+        assert (await client.get("/", headers={"x-api-key": "3"})).status_code == 429
+
+    assert isinstance(limiter.backend, InMemoryRateLimitBackend)
+
+
+async def test_custom_key() -> None:
+    """Keys are dependencies, and limits can be restricted to routes."""
+    app = App()
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    @app.get("/unlimited")
+    async def unlimited() -> str:
+        return "unlimited"
+
+    def tenant_key(tenant: str) -> str:
+        return tenant
+
+    configure_async_rate_limit(app, RateLimit(0.1, 1), tenant_key, routes={"index"})
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        assert (await client.get("/?tenant=a")).status_code == 200
+        assert (await client.get("/?tenant=a")).status_code == 429
+        assert (await client.get("/?tenant=b")).status_code == 200
+        for _ in range(3):
+            assert (await client.get("/unlimited")).status_code == 200
+
+
+async def test_refill_and_eviction() -> None:
+    """Buckets refill over time, and the least recently used are evicted."""
+    backend = InMemoryRateLimitBackend(max_buckets=2)
+    limit = RateLimit(1000, 1)
+
+    assert await backend.consume("a", limit) == 0
+    assert 0 < await backend.consume("a", limit) <= 0.001
+
+    backend._buckets["a"][1] -= 1
+    assert await backend.consume("a", limit) == 0
+
+    await backend.consume("b", limit)
+    await backend.consume("c", limit)
+    assert list(backend._buckets) == ["b", "c"]
+
+
+def test_openapi() -> None:
+    """Rate limits are documented in the OpenAPI spec."""
+    app = App()
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    @app.get("/unlimited")
+    async def unlimited() -> str:
+        return "unlimited"
+
+    configure_async_rate_limit(
+        app, RateLimit(2, 10), key=by_header("x-api-key"), routes={"index"}
+    )
+
+    spec = app.make_openapi_spec()
+    op = spec.paths["/"].get
+    unlimited_op = spec.paths["/unlimited"].get
+    assert op is not None
+    assert unlimited_op is not None
+
+    assert op.responses["429"].description == (
+        "Too Many Requests (limit: 2 requests per second, bursting to 10)"
+    )
+    assert [p.name for p in op.parameters] == ["x-api-key"]
+    assert "429" not in unlimited_op.responses
+    assert not unlimited_op.parameters
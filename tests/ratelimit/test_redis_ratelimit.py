@@ -0,0 +1,57 @@
+"""Tests for the Redis rate limit backend."""
+import pytest
+from aioredis import create_redis_pool
+from aioredis.errors import ReplyError
+from httpx import ASGITransport, AsyncClient
+
+from uapi.ratelimit import RateLimit, configure_async_rate_limit
+from uapi.ratelimit.redis import AsyncRedisRateLimitBackend
+from uapi.starlette import App
+
+
+async def test_redis_limit() -> None:
+    """Buckets are shared through Redis, and survive script cache flushes."""
+    redis = await create_redis_pool("redis://")
+    app = App()
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    configure_async_rate_limit(
+        app, RateLimit(0.1, 2), backend=AsyncRedisRateLimitBackend(redis, "test-rl:")
+    )
+
+    try:
+        await redis.delete("test-rl:index:127.0.0.1")
+        await redis.script_flush()
+        async with AsyncClient(
+            transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+        ) as client:
+            assert (await client.get("/")).status_code == 200
+            assert (await client.get("/")).status_code == 200
+
+            resp = await client.get("/")
+            assert resp.status_code == 429
+            assert resp.headers["retry-after"] == "10"
+
+        assert 0 < await redis.pttl("test-rl:index:127.0.0.1") <= 20_000
+    finally:
+        await redis.delete("test-rl:index:127.0.0.1")
+        redis.close()
+        await redis.wait_closed()
+
+
+async def test_redis_errors() -> None:
+    """Redis errors other than a flushed script cache are raised."""
+    redis = await create_redis_pool("redis://")
+    backend = AsyncRedisRateLimitBackend(redis, "test-rl:")
+
+    try:
+        await redis.set("test-rl:string", "value")
+        with pytest.raises(ReplyError, match="WRONGTYPE"):
+            await backend.consume("string", RateLimit(1, 1))
+    finally:
+        await redis.delete("test-rl:string")
+        redis.close()
+        await redis.wait_closed()
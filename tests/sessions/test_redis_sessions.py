@@ -2,16 +2,30 @@ import contextlib
 from asyncio import CancelledError, create_task, sleep
 from collections.abc import Callable
 from datetime import timedelta
+from json import loads
+from time import time
+from typing import Any
 
 import pytest
 from aioredis import create_redis_pool
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from redis.crc import key_slot
 
 from tests.aiohttp import run_on_aiohttp
 from uapi.aiohttp import App as AiohttpApp
 from uapi.cookies import CookieSettings
+from uapi.flask import App as FlaskApp
 from uapi.openapi import ApiKeySecurityScheme
-from uapi.sessions.redis import AsyncSession, configure_async_sessions
+from uapi.sessions import ShardedSessionBackend
+from uapi.sessions.redis import (
+    AsyncSession,
+    RedisSessionBackend,
+    SyncRedisSessionBackend,
+    SyncSession,
+    configure_async_sessions,
+    configure_sync_sessions,
+)
+from uapi.starlette import App as StarletteApp
 from uapi.status import Created, NoContent
 
 
@@ -25,13 +39,13 @@ async def configure_redis_session_app(app: AiohttpApp) -> None:
 
     @app.get("/")
     async def index(session: AsyncSession) -> str:
-        if "user_id" not in session:
+        if "user_id" not in await session:
             return "naughty!"
         return session["user_id"]
 
     @app.post("/login")
     async def login(username: str, session: AsyncSession) -> Created[None]:
-        session["user_id"] = username
+        (await session)["user_id"] = username
         return Created(None, await session.update_session(namespace=username))
 
     @app.post("/logout")
@@ -106,6 +120,502 @@ async def test_session_expiry(redis_session_app: int) -> None:
         assert resp.text == "naughty!"
 
 
+async def test_update_session_script() -> None:
+    """Updates are done by a script, which keeps the TTL of existing sessions."""
+    redis = await create_redis_pool("redis://")
+    app = StarletteApp()
+    configure_async_sessions(
+        app,
+        redis,
+        cookie_settings=CookieSettings(secure=False),
+        max_age=timedelta(seconds=100),
+        redis_key_prefix="test-script:",
+    )
+
+    @app.post("/login")
+    async def login(username: str, session: AsyncSession) -> Created[None]:
+        (await session)["user_id"] = username
+        return Created(None, await session.update_session(namespace=username))
+
+    key = "test-script:user:s"
+    try:
+        await redis.script_flush()
+        async with AsyncClient(
+            transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+        ) as client:
+            resp = await client.post("/login", params={"username": "user"})
+            assert resp.status_code == 201
+            session_id = resp.cookies["session_id"].split(":")[1]
+            key = f"test-script:user:s:{session_id}"
+
+            assert await redis.get(key) == b'{"user_id":"user"}'
+            assert 0 < await redis.ttl(key) <= 100
+            assert 0 < await redis.ttl("test-script:user:s") <= 100
+            assert await redis.zscore("test-script:user:s", session_id)
+
+            await redis.expire(key, 50)
+            resp = await client.post("/login", params={"username": "user"})
+            assert resp.status_code == 201
+            assert 0 < await redis.ttl(key) <= 50
+    finally:
+        await redis.delete(key, "test-script:user:s")
+        redis.close()
+        await redis.wait_closed()
+
+
+async def test_lazy_loading() -> None:
+    """Sessions are only fetched from Redis when awaited."""
+
+    class RecordingRedis:
+        def __init__(self) -> None:
+            self.gets: list[str] = []
+
+        async def get(self, key: str) -> bytes | None:
+            self.gets.append(key)
+            return b'{"user_id":"user"}'
+
+    redis = RecordingRedis()
+    app = StarletteApp()
+    configure_async_sessions(app, redis, redis_key_prefix="p:")
+
+    @app.get("/")
+    async def index(session: AsyncSession) -> str:
+        return "index"
+
+    @app.get("/user")
+    async def user(session: AsyncSession) -> str:
+        with pytest.raises(RuntimeError):
+            session["user_id"]
+        assert not session.loaded
+        return (await session)["user_id"] + (await session.load())["user_id"]
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()),
+        base_url="http://test",
+        cookies={"session_id": "user:abc"},
+    ) as client:
+        assert (await client.get("/")).text == "index"
+        assert redis.gets == []
+
+        assert (await client.get("/user")).text == "useruser"
+        assert redis.gets == ["p:user:s:abc"]
+
+
+async def test_sweeper() -> None:
+    """The sweeper removes expired sessions from namespaces, in batches."""
+    redis = await create_redis_pool("redis://")
+    app = StarletteApp()
+    store = configure_async_sessions(app, redis, redis_key_prefix="test-sweep:")
+    sweeper = store.sweep_in_background(app, interval=0.01, batch_size=2)
+    assert app._lifespan.startup_hooks == [sweeper.start]
+    assert app._lifespan.shutdown_hooks == [sweeper.stop]
+
+    keys = ["test-sweep:a:s", "test-sweep:b:s", "test-sweep:c:s"]
+    now = time()
+    try:
+        await redis.sadd("test-sweep:namespaces", "a", "b", "c")
+        await redis.zadd(keys[0], now - 10, "1", now - 5, "2", now - 1, "3")
+        await redis.zadd(keys[0], now + 100, "4")
+        await redis.zadd(keys[1], now + 100, "5")
+        # Not a namespace.
+        await redis.set(keys[2], "value")
+
+        assert await sweeper.sweep() == 3
+        assert await redis.zrange(keys[0]) == [b"4"]
+        assert await redis.zrange(keys[1]) == [b"5"]
+        assert await redis.get(keys[2]) == b"value"
+        assert sweeper.removed == 3
+        assert sweeper.sweeps == 1
+
+        await redis.zadd(keys[1], now - 1, "6")
+        sweeper.start()
+        await sleep(0.1)
+        await sweeper.stop()
+        assert sweeper.removed == 4
+        assert sweeper.sweeps > 1
+        assert await redis.zrange(keys[1]) == [b"5"]
+    finally:
+        await redis.delete(*keys, "test-sweep:namespaces")
+        redis.close()
+        await redis.wait_closed()
+
+
+async def test_sweep_unregistered_keys() -> None:
+    """Sweeping leaves keys outside the registered namespaces alone."""
+    backend = RedisSessionBackend.from_url("redis://")
+    redis = backend._redis
+    now = time()
+    try:
+        assert await backend.save_session("user", "a", b"{}", 100)
+        await redis.zadd("user:s", {"expired": now - 1})
+        # Looks like a namespace, but isn't one.
+        await redis.zadd("leaderboard:s", {"player": now - 1})
+
+        assert await backend.sweep() == 1
+        assert await redis.zrange("leaderboard:s", 0, -1) == [b"player"]
+        assert await redis.sismember("namespaces", "user")
+    finally:
+        await backend.remove_namespace("user")
+        await redis.delete("leaderboard:s")
+        await redis.aclose()
+
+
+@pytest.mark.parametrize("hash_tags", [False, True])
+async def test_sweep_unregisters_namespaces(hash_tags: bool) -> None:
+    """Namespaces left without sessions are unregistered by sweeping."""
+    backend = RedisSessionBackend.from_url(
+        "redis://", key_prefix="test-unregister:", hash_tags=hash_tags
+    )
+    redis = backend._redis
+    try:
+        assert await backend.save_session("user1", "a", b"{}", 100)
+        assert await backend.save_session("user2", "b", b"{}", 100)
+        # The session expires.
+        await redis.zadd(backend._namespace_key("user1"), {"a": time() - 1})
+
+        assert await backend.sweep() == 1
+        assert await redis.smembers("test-unregister:namespaces") == {b"user2"}
+        assert await backend.sweep() == 0
+    finally:
+        if keys := await redis.keys("test-unregister:*"):
+            await redis.delete(*keys)
+        await redis.aclose()
+
+
+async def test_remove_namespace() -> None:
+    """Namespaces are removed in chunks, in the foreground or the background."""
+    redis = await create_redis_pool("redis://")
+    app = StarletteApp()
+    store = configure_async_sessions(app, redis, redis_key_prefix="test-rm:")
+    now = time()
+
+    try:
+        for namespace in ("a", "b"):
+            for i in range(7):
+                await redis.set(f"test-rm:{namespace}:s:{i}", "{}")
+                await redis.zadd(f"test-rm:{namespace}:s", now + 100 - 10 * i, str(i))
+        await redis.set("test-rm:c:s:0", "{}")
+        await redis.zadd("test-rm:c:s", now + 100, "0")
+
+        await store.remove_namespace("a", chunk_size=3)
+        assert await redis.keys("test-rm:a:*") == []
+
+        await store.remove_namespace_in_background("b", chunk_size=3)
+        assert await redis.keys("test-rm:b:*") == []
+        assert not store._background_tasks
+
+        assert await redis.exists("test-rm:c:s:0", "test-rm:c:s") == 2
+    finally:
+        await redis.delete("test-rm:c:s:0", "test-rm:c:s")
+        redis.close()
+        await redis.wait_closed()
+
+
+async def test_write_coalescing() -> None:
+    """Updates are written once at the end of the request, and only on changes."""
+    redis = await create_redis_pool("redis://")
+    writes = 0
+
+    class CountingRedis:
+        def __getattr__(self, name: str) -> Any:
+            return getattr(redis, name)
+
+        async def evalsha(self, *args: Any) -> Any:
+            nonlocal writes
+            writes += 1
+            return await redis.evalsha(*args)
+
+    app = StarletteApp()
+    configure_async_sessions(
+        app,
+        CountingRedis(),
+        cookie_settings=CookieSettings(secure=False),
+        redis_key_prefix="test-dirty:",
+    )
+
+    @app.post("/")
+    async def update(value: str, session: AsyncSession) -> Created[str]:
+        (await session)["value"] = value
+        headers = await session.update_session(namespace="ns")
+        session["other"] = "other"
+        await session.update_session()
+        return Created(str(session.dirty), headers)
+
+    key = "test-dirty:ns:s"
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+        ) as client:
+            resp = await client.post("/", params={"value": "1"})
+            assert resp.text == "True"
+            assert writes == 1
+            session_id = resp.cookies["session_id"].split(":")[1]
+            key = f"test-dirty:ns:s:{session_id}"
+            assert loads(await redis.get(key)) == {"value": "1", "other": "other"}
+
+            resp = await client.post("/", params={"value": "1"})
+            assert resp.text == "False"
+            assert writes == 1
+
+            resp = await client.post("/", params={"value": "2"})
+            assert writes == 2
+            assert loads(await redis.get(key)) == {"value": "2", "other": "other"}
+    finally:
+        await redis.delete(key, "test-dirty:ns:s")
+        redis.close()
+        await redis.wait_closed()
+
+
+async def test_sliding_expiry() -> None:
+    """With sliding expiry, the TTL is refreshed at most once per interval."""
+    redis = await create_redis_pool("redis://")
+    app = StarletteApp()
+    configure_async_sessions(
+        app,
+        redis,
+        max_age=timedelta(seconds=100),
+        cookie_settings=CookieSettings(secure=False),
+        redis_key_prefix="test-sliding:",
+        refresh_interval=timedelta(seconds=10),
+    )
+
+    @app.get("/")
+    async def index(session: AsyncSession) -> str:
+        return (await session).get("user_id", "")
+
+    @app.post("/login")
+    async def login(session: AsyncSession) -> Created[None]:
+        (await session)["user_id"] = "user"
+        return Created(None, await session.update_session(namespace="user"))
+
+    key = "test-sliding:user:s"
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+        ) as client:
+            resp = await client.post("/login")
+            session_id = resp.cookies["session_id"].split(":")[1]
+            key = f"test-sliding:user:s:{session_id}"
+
+            await redis.expire(key, 95)
+            assert (await client.get("/")).text == "user"
+            assert await redis.ttl(key) <= 95
+
+            await redis.expire(key, 50)
+            assert (await client.get("/")).text == "user"
+            assert await redis.ttl(key) > 95
+            assert await redis.zscore("test-sliding:user:s", session_id) > time() + 95
+
+            # Removed sessions are not refreshed back.
+            await redis.delete(key)
+            assert (await client.get("/")).text == ""
+            assert await redis.get(key) is None
+    finally:
+        await redis.delete(key, "test-sliding:user:s")
+        redis.close()
+        await redis.wait_closed()
+
+
+async def test_redis_py_backend() -> None:
+    """The redis-py backend works like the aioredis one."""
+    backend = RedisSessionBackend.from_url("redis://", key_prefix="test-redis-py:")
+    redis = backend._redis
+    app = StarletteApp()
+    store = configure_async_sessions(
+        app,
+        backend,
+        cookie_settings=CookieSettings(secure=False),
+        max_age=timedelta(seconds=100),
+        refresh_interval=timedelta(seconds=10),
+    )
+
+    @app.get("/")
+    async def index(session: AsyncSession) -> str:
+        return (await session).get("user_id", "")
+
+    @app.post("/login")
+    async def login(session: AsyncSession) -> Created[None]:
+        (await session)["user_id"] = "user"
+        return Created(None, await session.update_session(namespace="user"))
+
+    @app.post("/logout")
+    async def logout(session: AsyncSession) -> NoContent:
+        return NoContent(await session.clear_session())
+
+    try:
+        await redis.script_flush()
+        async with AsyncClient(
+            transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+        ) as client:
+            resp = await client.post("/login")
+            session_id = resp.cookies["session_id"].split(":")[1]
+            key = f"test-redis-py:user:s:{session_id}"
+            assert await redis.get(key) == b'{"user_id":"user"}'
+
+            await redis.expire(key, 50)
+            assert (await client.get("/")).text == "user"
+            assert await redis.ttl(key) > 95
+
+            await client.post("/logout")
+            assert await redis.get(key) is None
+            assert (await client.get("/")).text == ""
+
+            await client.post("/login")
+            await redis.zadd("test-redis-py:user:s", {"expired": time() - 1})
+            assert await backend.sweep() == 1
+
+            await store.remove_namespace("user")
+            assert await redis.keys("test-redis-py:*") == []
+            assert (await client.get("/")).text == ""
+    finally:
+        await redis.delete("test-redis-py:user:s")
+        await redis.aclose()
+
+
+def test_sync_sessions() -> None:
+    """Sync sessions use the same Redis layout as async sessions."""
+    backend = SyncRedisSessionBackend.from_url("redis://", key_prefix="test-sync:")
+    redis = backend._redis
+    app = FlaskApp()
+    store = configure_sync_sessions(
+        app,
+        backend,
+        cookie_settings=CookieSettings(secure=False),
+        max_age=timedelta(seconds=100),
+    )
+
+    @app.get("/")
+    def index(session: SyncSession) -> str:
+        return session.get("user_id", "")
+
+    @app.post("/login")
+    def login(session: SyncSession) -> Created[None]:
+        session["user_id"] = "user"
+        return Created(None, session.update_session(namespace="user"))
+
+    @app.post("/logout")
+    def logout(session: SyncSession) -> NoContent:
+        return NoContent(session.clear_session())
+
+    client = app.to_framework_app(__name__).test_client()
+    try:
+        resp = client.post("/login")
+        session_id = resp.headers["set-cookie"].split(";")[0].split(":")[1]
+        key = f"test-sync:user:s:{session_id}"
+        assert redis.get(key) == b'{"user_id":"user"}'
+        assert redis.zscore("test-sync:user:s", session_id) > time()
+        assert client.get("/").text == "user"
+
+        client.post("/logout")
+        assert redis.get(key) is None
+        assert client.get("/").text == ""
+
+        client.post("/login")
+        redis.zadd("test-sync:user:s", {"expired": time() - 1})
+        assert backend.sweep() == 1
+
+        store.remove_namespace("user")
+        assert redis.keys("test-sync:*") == []
+        assert client.get("/").text == ""
+    finally:
+        redis.delete("test-sync:user:s")
+        redis.close()
+
+
+@pytest.mark.parametrize("hash_tags", [False, True])
+def test_sync_sweep_unregisters_namespaces(hash_tags: bool) -> None:
+    """Sync sweeping unregisters namespaces left without sessions too."""
+    backend = SyncRedisSessionBackend.from_url(
+        "redis://", key_prefix="test-sync-unregister:", hash_tags=hash_tags
+    )
+    redis = backend._redis
+    try:
+        assert backend.save_session("user1", "a", b"{}", 100)
+        assert backend.save_session("user2", "b", b"{}", 100)
+        redis.zadd(backend._namespace_key("user1"), {"a": time() - 1})
+
+        assert backend.sweep() == 1
+        assert redis.smembers("test-sync-unregister:namespaces") == {b"user2"}
+        assert backend.sweep() == 0
+    finally:
+        if keys := redis.keys("test-sync-unregister:*"):
+            redis.delete(*keys)
+        redis.close()
+
+
+async def test_hash_tags() -> None:
+    """With hash tags, all keys of a namespace share a Redis Cluster slot."""
+    backend = RedisSessionBackend.from_url(
+        "redis://", key_prefix="test-tags:", hash_tags=True
+    )
+    redis = backend._redis
+    try:
+        assert await backend.save_session("user", "a", b"{}", 100)
+        assert await backend.save_session("", "b", b"{}", 100)
+        assert await redis.get("test-tags:{user:s}:a") == b"{}"
+        assert await redis.zscore("test-tags:{user:s}", "a") > time()
+        assert await redis.get("test-tags::s:{b}") == b"{}"
+        assert await redis.ttl("test-tags::s:{b}") > 95
+        assert await backend.load_session("user", "a") == (b"{}", None)
+        assert await backend.load_session("", "b") == (b"{}", None)
+
+        await redis.zadd("test-tags:{user:s}", {"expired": time() - 1})
+        assert await backend.sweep() == 1
+
+        await backend.remove_namespace("user")
+        with pytest.raises(ValueError):
+            await backend.remove_namespace("")
+        await backend.delete_session("", "b")
+        assert await redis.keys("test-tags:*") == []
+    finally:
+        if keys := await redis.keys("test-tags:*"):
+            await redis.delete(*keys)
+        await redis.aclose()
+
+
+def test_hash_tags_spread() -> None:
+    """Sessions without a namespace spread over the Redis Cluster slots."""
+    backend = SyncRedisSessionBackend(None, key_prefix="p:", hash_tags=True)
+    slots = {key_slot(backend._session_key("", f"id-{i}").encode()) for i in range(100)}
+    assert len(slots) > 90
+    assert {
+        key_slot(backend._session_key("user", f"id-{i}").encode()) for i in range(100)
+    } == {key_slot(b"user:s")}
+
+
+async def test_sharded_backend() -> None:
+    """Namespaces are spread over Redis servers, here databases of one server."""
+    shards = {
+        name: RedisSessionBackend.from_url(
+            f"redis://localhost/{db}", key_prefix="test-shards:"
+        )
+        for name, db in (("a", 1), ("b", 2))
+    }
+    backend = ShardedSessionBackend(shards)
+    try:
+        for i in range(20):
+            assert await backend.save_session(f"user-{i}", "s", b"{}", 100)
+        for shard in shards.values():
+            namespaces = await shard._redis.smembers("test-shards:namespaces")
+            assert 0 < len(namespaces) < 20
+            assert all(backend.get_shard(ns.decode()) is shard for ns in namespaces)
+        assert await backend.load_session("user-1", "s") == (b"{}", None)
+
+        [shard] = [s for s in shards.values() if backend.get_shard("user-1") is s]
+        await shard._redis.zadd("test-shards:user-1:s", {"expired": time() - 1})
+        assert await backend.sweep() == 1
+
+        for i in range(20):
+            await backend.remove_namespace(f"user-{i}")
+        for shard in shards.values():
+            assert await shard._redis.keys("test-shards:*") == []
+    finally:
+        for shard in shards.values():
+            if keys := await shard._redis.keys("test-shards:*"):
+                await shard._redis.delete(*keys)
+            await shard._redis.aclose()
+
+
 async def test_openapi_security() -> None:
     app = AiohttpApp()
     await configure_redis_session_app(app)
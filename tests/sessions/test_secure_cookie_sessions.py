@@ -1,6 +1,14 @@
 from asyncio import sleep
+from time import time
 
-from httpx import AsyncClient
+import pytest
+from httpx import ASGITransport, AsyncClient
+from itsdangerous import TimestampSigner, URLSafeTimedSerializer
+
+from uapi.cookies import CookieSettings
+from uapi.sessions import Session, _SessionSerializer, configure_secure_sessions
+from uapi.starlette import App
+from uapi.status import Created
 
 
 async def test_login_logout(secure_cookie_session_app: int) -> None:
@@ -59,3 +67,92 @@ async def test_session_expiry(secure_cookie_session_app: int):
 
         resp = await client.get(f"http://localhost:{secure_cookie_session_app}/")
         assert resp.text == "not-logged-in"
+
+
+def make_app(**kwargs) -> App:
+    app = App()
+    configure_secure_sessions(
+        app, "test", settings=CookieSettings(max_age=60, secure=False), **kwargs
+    )
+
+    @app.get("/")
+    async def index(session: Session) -> str:
+        return session.get("user_id", "")
+
+    @app.post("/login")
+    async def login(username: str, session: Session) -> Created[None]:
+        session["user_id"] = username
+        return Created(None, session.update_session())
+
+    return app
+
+
+def client_for(app: App) -> AsyncClient:
+    return AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    )
+
+
+async def test_verified_cookie_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verified cookies are cached, and unchanged sessions are not signed again."""
+    loads = []
+    original_loads = _SessionSerializer.loads
+
+    def counting_loads(self, *args, **kwargs):
+        loads.append(args[0])
+        return original_loads(self, *args, **kwargs)
+
+    monkeypatch.setattr(_SessionSerializer, "loads", counting_loads)
+
+    async with client_for(make_app()) as client:
+        resp = await client.post("/login", params={"username": "user"})
+        cookie = resp.cookies["session"]
+        assert (await client.get("/")).text == "user"
+        # Cookies signed by the app are known to be valid.
+        assert loads == []
+
+        resp = await client.post("/login", params={"username": "user"})
+        assert "set-cookie" not in resp.headers
+
+    async with client_for(make_app()) as client:
+        client.cookies["session"] = cookie
+        assert (await client.get("/")).text == "user"
+        assert (await client.get("/")).text == "user"
+        assert loads == [cookie]
+
+    async with client_for(make_app(cache_size=0)) as client:
+        client.cookies["session"] = cookie
+        assert (await client.get("/")).text == "user"
+        assert (await client.get("/")).text == "user"
+        assert loads == [cookie] * 3
+
+
+async def test_cookie_compression() -> None:
+    """Only large payloads are compressed."""
+    async with client_for(make_app()) as client:
+        resp = await client.post("/login", params={"username": "user"})
+        assert not resp.cookies["session"].startswith(".")
+
+        resp = await client.post("/login", params={"username": "user" * 100})
+        assert resp.cookies["session"].startswith(".")
+        assert (await client.get("/")).text == "user" * 100
+
+    async with client_for(make_app(compress_threshold=None)) as client:
+        resp = await client.post("/login", params={"username": "user" * 100})
+        assert not resp.cookies["session"].startswith(".")
+
+
+async def test_expired_cookie() -> None:
+    """Cookies older than the max age start new sessions."""
+
+    class PastSigner(TimestampSigner):
+        def get_timestamp(self) -> int:
+            return int(time()) - 120
+
+    cookie = URLSafeTimedSerializer(
+        "test", salt="cookie-session", signer=PastSigner
+    ).dumps({"user_id": "user"})
+
+    async with client_for(make_app()) as client:
+        client.cookies["session"] = cookie
+        assert (await client.get("/")).text == ""
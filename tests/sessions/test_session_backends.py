@@ -0,0 +1,355 @@
+"""Tests for the in-memory session backends."""
+from time import sleep
+
+from attrs import Factory, define
+from httpx import ASGITransport, AsyncClient
+
+from uapi.cookies import CookieSettings
+from uapi.flask import App as FlaskApp
+from uapi.sessions import (
+    AsyncSessionBackend,
+    InMemorySessionBackend,
+    ShardedSessionBackend,
+    SyncInMemorySessionBackend,
+    SyncSessionBackend,
+    SyncShardedSessionBackend,
+)
+from uapi.sessions.redis import (
+    AsyncSession,
+    SyncSession,
+    TypedAsyncSession,
+    TypedSyncSession,
+    configure_async_sessions,
+    configure_sync_sessions,
+)
+from uapi.starlette import App
+from uapi.status import Created, NoContent
+
+
+@define
+class Cart:
+    user_id: int | None = None
+    items: list[int] = Factory(list)
+
+
+@define
+class Clock:
+    """A clock for the in-memory backends, moved forward by tests."""
+
+    now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@define
+class CountingBackend(InMemorySessionBackend):
+    saves: int = 0
+
+    async def save_session(self, *args, **kwargs) -> bool:
+        self.saves += 1
+        return await super().save_session(*args, **kwargs)
+
+
+async def test_in_memory_backend() -> None:
+    backend = InMemorySessionBackend(max_sessions=3)
+    assert isinstance(backend, AsyncSessionBackend)
+
+    assert await backend.load_session("ns", "a") == (None, None)
+    assert not await backend.save_session("ns", "a", None, 100)
+
+    assert await backend.save_session("ns", "a", "{}", 100)
+    assert await backend.load_session("ns", "a") == ("{}", None)
+    assert await backend.load_session("ns", "a", with_ttl=True) == ("{}", 100)
+
+    # Existing sessions keep their TTL, unless reset.
+    assert await backend.save_session("ns", "a", "{1}", 200)
+    assert await backend.load_session("ns", "a", with_ttl=True) == ("{1}", 100)
+    assert await backend.save_session("ns", "a", None, 200, reset_ttl=True)
+    assert await backend.load_session("ns", "a", with_ttl=True) == ("{1}", 200)
+
+    await backend.save_session("ns", "b", "{}", 100)
+    await backend.save_session("other", "c", "{}", 100)
+    await backend.delete_session("ns", "b")
+    assert await backend.load_session("ns", "b") == (None, None)
+
+    # The least recently used session is evicted.
+    await backend.save_session("ns", "d", "{}", 100)
+    await backend.load_session("ns", "a")
+    await backend.save_session("ns", "e", "{}", 100)
+    assert list(backend._sessions) == [("ns", "d"), ("ns", "a"), ("ns", "e")]
+    assert backend._namespaces == {"ns": {"a", "d", "e"}}
+
+    await backend.remove_namespace("ns", chunk_size=2)
+    assert not backend._sessions
+    assert not backend._namespaces
+
+
+async def test_in_memory_expiry() -> None:
+    """Expired sessions are removed by the timer wheel."""
+    clock = Clock()
+    backend = InMemorySessionBackend(wheel_slots=4, clock=clock)
+    await backend.save_session("ns", "a", "{}", 1)
+    await backend.save_session("ns", "b", "{}", 1)
+    # Further in the future than the wheel rotation.
+    await backend.save_session("ns", "c", "{}", 10)
+
+    clock.now += 1.1
+
+    assert await backend.load_session("ns", "a") == (None, None)
+    assert await backend.sweep() == 0
+    assert list(backend._sessions) == [("ns", "c")]
+    assert backend._namespaces == {"ns": {"c"}}
+    assert sum(len(slot) for slot in backend._wheel) == 1
+
+
+async def test_in_memory_sessions() -> None:
+    """Apps work the same with the in-memory backend."""
+    app = App()
+    backend = InMemorySessionBackend()
+    store = configure_async_sessions(
+        app, backend, cookie_settings=CookieSettings(secure=False)
+    )
+
+    @app.get("/")
+    async def index(session: AsyncSession) -> str:
+        return (await session).get("user_id", "")
+
+    @app.post("/login")
+    async def login(username: str, session: AsyncSession) -> Created[None]:
+        (await session)["user_id"] = username
+        return Created(None, await session.update_session(namespace=username))
+
+    @app.post("/logout")
+    async def logout(session: AsyncSession) -> NoContent:
+        return NoContent(await session.clear_session())
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        assert (await client.get("/")).text == ""
+        await client.post("/login", params={"username": "user"})
+        assert (await client.get("/")).text == "user"
+        assert backend._namespaces.keys() == {"user"}
+
+        await client.post("/logout")
+        assert (await client.get("/")).text == ""
+        assert not backend._sessions
+
+        await client.post("/login", params={"username": "user"})
+        await store.remove_namespace("user")
+        assert (await client.get("/")).text == ""
+
+
+def test_sync_in_memory_sessions() -> None:
+    """Sync apps work the same with the sync in-memory backend."""
+    app = FlaskApp()
+    backend = SyncInMemorySessionBackend()
+    assert isinstance(backend, SyncSessionBackend)
+    store = configure_sync_sessions(
+        app, backend, cookie_settings=CookieSettings(secure=False)
+    )
+
+    @app.get("/")
+    def index(session: SyncSession) -> str:
+        return session.get("user_id", "")
+
+    @app.get("/unused")
+    def unused(session: SyncSession) -> str:
+        return str(session.loaded)
+
+    @app.post("/login")
+    def login(username: str, session: SyncSession) -> Created[None]:
+        session["user_id"] = username
+        return Created(None, session.update_session(namespace=username))
+
+    @app.post("/logout")
+    def logout(session: SyncSession) -> NoContent:
+        return NoContent(session.clear_session())
+
+    client = app.to_framework_app(__name__).test_client()
+    assert client.get("/").text == ""
+    client.post("/login", query_string={"username": "user"})
+    assert client.get("/").text == "user"
+    assert client.get("/unused").text == "False"
+    assert backend._namespaces.keys() == {"user"}
+
+    client.post("/logout")
+    assert client.get("/").text == ""
+    assert not backend._sessions
+
+    client.post("/login", query_string={"username": "user"})
+    store.remove_namespace("user")
+    assert client.get("/").text == ""
+
+
+def test_sync_sweeper() -> None:
+    """The sync sweeper runs in a thread from startup to shutdown."""
+    app = FlaskApp()
+    clock = Clock()
+    backend = SyncInMemorySessionBackend(clock=clock)
+    store = configure_sync_sessions(app, backend)
+    sweeper = store.sweep_in_background(app, interval=0.01)
+
+    backend.save_session("ns", "a", "{}", 1)
+    clock.now += 1.1
+    app.startup()
+    try:
+        sleep(0.1)
+    finally:
+        app.shutdown()
+
+    assert sweeper.removed == 1
+    assert sweeper.sweeps > 1
+    assert sweeper._thread is None
+    assert not backend._sessions
+
+
+async def test_typed_sessions() -> None:
+    """Typed sessions are stored using the app converter, as compact JSON."""
+    app = App()
+    backend = CountingBackend()
+    configure_async_sessions(app, backend, cookie_settings=CookieSettings(secure=False))
+
+    @app.get("/")
+    async def index(session: TypedAsyncSession[Cart]) -> str:
+        return repr(await session)
+
+    @app.post("/items")
+    async def add_item(item: int, session: TypedAsyncSession[Cart]) -> Created[None]:
+        (await session).items.append(item)
+        return Created(None, await session.update_session(namespace="cart"))
+
+    @app.put("/")
+    async def replace(session: TypedAsyncSession[Cart]) -> Created[None]:
+        await session
+        session.data = Cart(1, [2])
+        return Created(None, await session.update_session())
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        assert (await client.get("/")).text == "Cart(user_id=None, items=[])"
+
+        await client.post("/items", params={"item": "1"})
+        await client.post("/items", params={"item": "2"})
+        assert (await client.get("/")).text == "Cart(user_id=None, items=[1, 2])"
+        [(payload, _)] = backend._sessions.values()
+        assert payload == b'{"user_id":null,"items":[1,2]}'
+
+        await client.put("/")
+        assert (await client.get("/")).text == "Cart(user_id=1, items=[2])"
+        assert backend.saves == 3
+
+        # Unchanged payloads are not written.
+        await client.put("/")
+        assert backend.saves == 3
+
+
+def test_typed_sync_sessions() -> None:
+    """Sync apps support typed sessions too."""
+    app = FlaskApp()
+    backend = SyncInMemorySessionBackend()
+    configure_sync_sessions(app, backend, cookie_settings=CookieSettings(secure=False))
+
+    @app.get("/")
+    def index(session: TypedSyncSession[Cart]) -> str:
+        return repr(session.data)
+
+    @app.post("/items")
+    def add_item(item: int, session: TypedSyncSession[Cart]) -> Created[None]:
+        session.data.items.append(item)
+        return Created(None, session.update_session(namespace="cart"))
+
+    @app.post("/logout")
+    def logout(session: TypedSyncSession[Cart]) -> NoContent:
+        return NoContent(session.clear_session())
+
+    client = app.to_framework_app(__name__).test_client()
+    assert client.get("/").text == "Cart(user_id=None, items=[])"
+    client.post("/items", query_string={"item": 1})
+    assert client.get("/").text == "Cart(user_id=None, items=[1])"
+
+    client.post("/logout")
+    assert client.get("/").text == "Cart(user_id=None, items=[])"
+    assert not backend._sessions
+
+
+async def test_sharded_backend() -> None:
+    """Namespaces are spread over the shards, and stay on a single shard."""
+    clock = Clock()
+    shards = {name: InMemorySessionBackend(clock=clock) for name in ("a", "b", "c")}
+    backend = ShardedSessionBackend(shards)
+    assert isinstance(backend, AsyncSessionBackend)
+
+    for i in range(300):
+        await backend.save_session(f"user-{i}", "s1", "{}", 1)
+        await backend.save_session(f"user-{i}", "s2", "{}", 100)
+    for shard in shards.values():
+        assert 50 < len(shard._namespaces) < 150
+        for namespace, ids in shard._namespaces.items():
+            assert backend.get_shard(namespace) is shard
+            assert ids == {"s1", "s2"}
+
+    assert await backend.load_session("user-1", "s2") == ("{}", None)
+    await backend.delete_session("user-1", "s2")
+    assert await backend.load_session("user-1", "s2") == (None, None)
+    await backend.remove_namespace("user-2")
+    assert all("user-2" not in shard._namespaces for shard in shards.values())
+
+    clock.now += 1.1
+    assert await backend.sweep() == 299
+
+    # Adding a shard only moves namespaces to the new shard.
+    grown = ShardedSessionBackend({**shards, "d": InMemorySessionBackend()})
+    moved = [
+        f"user-{i}"
+        for i in range(300)
+        if grown.get_shard(f"user-{i}") is not backend.get_shard(f"user-{i}")
+    ]
+    assert 25 < len(moved) < 125
+    assert all(grown.get_shard(namespace) is grown.shards["d"] for namespace in moved)
+
+
+async def test_sharded_backend_without_namespace() -> None:
+    """Sessions without a namespace are spread over the shards by ID."""
+    shards = {name: InMemorySessionBackend() for name in ("a", "b", "c")}
+    backend = ShardedSessionBackend(shards)
+
+    for i in range(300):
+        await backend.save_session("", f"s{i}", "{}", 100)
+    for shard in shards.values():
+        assert 50 < len(shard._namespaces[""]) < 150
+
+    assert await backend.load_session("", "s1") == ("{}", None)
+    await backend.delete_session("", "s1")
+    assert await backend.load_session("", "s1") == (None, None)
+
+    await backend.remove_namespace("")
+    assert not any(shard._sessions for shard in shards.values())
+
+
+def test_sync_sharded_backend() -> None:
+    """The sync sharded backend places namespaces like the async one."""
+    shards = {name: SyncInMemorySessionBackend() for name in ("a", "b")}
+    backend = SyncShardedSessionBackend(shards)
+    assert isinstance(backend, SyncSessionBackend)
+    async_shards = {name: InMemorySessionBackend() for name in ("a", "b")}
+    async_backend = ShardedSessionBackend(async_shards)
+
+    for i in range(20):
+        namespace = f"user-{i}"
+        backend.save_session(namespace, "s", "{}", 100)
+        [name] = [n for n, s in shards.items() if namespace in s._namespaces]
+        assert async_backend.get_shard(namespace) is async_shards[name]
+
+    assert backend.load_session("user-1", "s") == ("{}", None)
+    backend.remove_namespace("user-1")
+    assert backend.load_session("user-1", "s") == (None, None)
+    assert backend.sweep() == 0
+
+    for i in range(20):
+        backend.save_session("", f"s{i}", "{}", 100)
+    assert all(shard._namespaces[""] for shard in shards.values())
+    backend.remove_namespace("")
+    assert not any(shard._namespaces.get("") for shard in shards.values())
@@ -0,0 +1,53 @@
+"""Tests for the load generator."""
+from asyncio import CancelledError, create_task
+from contextlib import suppress
+
+from httpx import AsyncClient
+
+from uapi.bench import Workload, generate_load, make_app
+from uapi.bench.load import percentile
+
+from .test_lifespan import get_when_up
+
+
+def test_percentile() -> None:
+    """Percentiles use the nearest rank."""
+    values = list(range(1, 1001))
+    assert percentile(values, 50) == 500
+    assert percentile(values, 99.9) == 999
+    assert percentile(values, 100) == 1000
+    assert percentile([7], 50) == 7
+    assert percentile([], 50) == 0
+
+
+async def test_generate_load(unused_tcp_port: int) -> None:
+    """Load is generated according to the workload mix."""
+    app = make_app("starlette")
+    t = create_task(app.run(port=unused_tcp_port, handle_signals=False))
+    try:
+        async with AsyncClient() as client:
+            await get_when_up(client, f"http://localhost:{unused_tcp_port}/")
+        report = await generate_load(
+            "127.0.0.1",
+            unused_tcp_port,
+            Workload(
+                concurrency=4,
+                duration=0.3,
+                warmup=0.1,
+                mix={"hello": 1, "path": 1, "query": 1, "echo": 1},
+                payload_sizes=(1, 100),
+            ),
+            "starlette",
+        )
+    finally:
+        t.cancel()
+        with suppress(CancelledError):
+            await t
+
+    assert set(report.endpoints) == {"hello", "path", "query", "echo"}
+    assert report.total.requests == sum(r.requests for r in report.endpoints.values())
+    assert report.total.requests > 0
+    assert report.total.errors == 0
+    p50, p90, p99, p999 = report.total.percentiles_ms.values()
+    assert 0 < p50 <= p90 <= p99 <= p999
+    assert report.to_json()["workload"]["payload_sizes"] == [1, 100]
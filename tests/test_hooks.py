@@ -0,0 +1,125 @@
+"""Tests for request lifecycle hooks."""
+from asyncio import CancelledError
+from typing import Any
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from uapi.flask import App as FlaskApp
+from uapi.hooks import LifecycleHooks, apply_hooks_async, apply_hooks_sync
+from uapi.starlette import App
+from uapi.status import BaseResponse, NotFound
+from uapi.types import Method, RouteName
+
+
+async def test_async_hooks() -> None:
+    """Sync and async hooks see the lifecycle of requests."""
+    app = App()
+    events: list[Any] = []
+
+    @app.on_request_start
+    def start(name: RouteName, method: Method) -> None:
+        events.append(("start", name, method))
+
+    @app.on_response
+    async def response(
+        name: RouteName, method: Method, duration: float, resp: BaseResponse | None
+    ) -> None:
+        assert duration >= 0
+        events.append(("response", name, resp))
+
+    @app.on_exception
+    async def exception(
+        name: RouteName, method: Method, duration: float, exc: Exception
+    ) -> None:
+        events.append(("exception", name, str(exc)))
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    @app.get("/missing")
+    async def missing() -> NotFound[None]:
+        return NotFound(None)
+
+    @app.get("/error")
+    async def error() -> str:
+        raise Exception("error")
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app(), raise_app_exceptions=False),
+        base_url="http://test",
+    ) as client:
+        assert (await client.get("/")).text == "index"
+        assert (await client.get("/missing")).status_code == 404
+        assert (await client.get("/error")).status_code == 500
+
+    assert events[:2] == [
+        ("start", "index", "GET"),
+        ("response", "index", events[1][2]),
+    ]
+    assert events[1][2].ret == "index"
+    assert events[3][2] == NotFound(None)
+    assert events[4:] == [("start", "error", "GET"), ("exception", "error", "error")]
+
+
+def test_sync_hooks() -> None:
+    """Sync apps support sync hooks."""
+    app = FlaskApp()
+    responses: list[BaseResponse | None] = []
+
+    @app.on_response
+    def response(
+        name: RouteName, method: Method, duration: float, resp: BaseResponse | None
+    ) -> None:
+        responses.append(resp)
+
+    @app.get("/")
+    def index() -> NotFound[str]:
+        return NotFound("nope")
+
+    client = app.to_framework_app(__name__).test_client()
+    client.get("/")
+
+    assert responses == [NotFound("nope")]
+
+
+def test_sync_apps_reject_async_hooks() -> None:
+    """Async hooks cannot run in sync apps."""
+    app = FlaskApp()
+
+    @app.on_request_start
+    async def start(name: RouteName, method: Method) -> None:
+        pass
+
+    @app.get("/")
+    def index() -> str:
+        return ""
+
+    with pytest.raises(Exception, match="sync hooks"):
+        app.to_framework_app(__name__)
+
+
+async def test_exception_hooks_skip_cancellations() -> None:
+    """Exception hooks see exceptions, not cancellations, in async and sync apps."""
+    seen: list[BaseException] = []
+    hooks = LifecycleHooks(exception=[lambda *args: seen.append(args[-1])])
+
+    async def cancelled() -> None:
+        raise CancelledError()
+
+    async def failing() -> None:
+        raise ValueError()
+
+    def interrupted() -> None:
+        raise KeyboardInterrupt()
+
+    with pytest.raises(CancelledError):
+        await apply_hooks_async(cancelled, hooks, RouteName("r"), "GET")()
+    with pytest.raises(KeyboardInterrupt):
+        apply_hooks_sync(interrupted, hooks, RouteName("r"), "GET")()
+    assert seen == []
+
+    with pytest.raises(ValueError):
+        await apply_hooks_async(failing, hooks, RouteName("r"), "GET")()
+    assert [type(exc) for exc in seen] == [ValueError]
@@ -0,0 +1,132 @@
+"""Tests for app lifespans and singleton dependencies."""
+from asyncio import CancelledError, create_task, sleep
+from collections.abc import AsyncIterator, Iterator
+from contextlib import suppress
+
+import pytest
+from httpx import AsyncClient, ConnectError, Response
+
+from uapi.aiohttp import AiohttpApp
+from uapi.flask import App as FlaskApp
+from uapi.quart import QuartApp
+from uapi.starlette import App, StarletteApp
+
+from .aiohttp import run_on_aiohttp
+from .quart import run_on_quart
+from .starlette import run_on_starlette
+
+
+class Pool:
+    def __init__(self) -> None:
+        self.closed = False
+
+
+async def get_when_up(client: AsyncClient, url: str) -> Response:
+    for _ in range(50):
+        with suppress(ConnectError):
+            return await client.get(url)
+        await sleep(0.1)
+    raise Exception("Server did not start")
+
+
+@pytest.mark.parametrize("app_type", [AiohttpApp, QuartApp, StarletteApp])
+async def test_async_lifespan(
+    unused_tcp_port: int,
+    app_type: type[AiohttpApp] | type[QuartApp] | type[StarletteApp],
+) -> None:
+    """Singletons and hooks are tied to the server lifecycle."""
+    app = app_type()
+    events = []
+    pools = []
+
+    @app.singleton
+    async def make_pool() -> AsyncIterator[Pool]:
+        pools.append(pool := Pool())
+        yield pool
+        pool.closed = True
+
+    @app.on_startup
+    async def startup() -> None:
+        events.append("startup")
+
+    @app.on_shutdown
+    def shutdown() -> None:
+        events.append("shutdown")
+
+    @app.get("/")
+    async def handler(pool: Pool) -> str:
+        return str(pools.index(pool))
+
+    if isinstance(app, AiohttpApp):
+        t = create_task(run_on_aiohttp(app, unused_tcp_port))
+    elif isinstance(app, QuartApp):
+        t = create_task(run_on_quart(app, unused_tcp_port))
+    else:
+        t = create_task(run_on_starlette(app, unused_tcp_port))
+
+    try:
+        async with AsyncClient() as client:
+            resp = await get_when_up(client, f"http://localhost:{unused_tcp_port}/")
+            assert resp.text == "0"
+            resp = await client.get(f"http://localhost:{unused_tcp_port}/")
+            assert resp.text == "0"
+        assert events == ["startup"]
+    finally:
+        t.cancel()
+        with suppress(CancelledError):
+            await t
+
+    assert events == ["startup", "shutdown"]
+    assert len(pools) == 1
+    assert pools[0].closed
+
+
+def test_sync_lifespan() -> None:
+    """Sync apps start on their first request."""
+    app = FlaskApp()
+    pools = []
+    closed = []
+
+    @app.singleton
+    def make_pool() -> Iterator[Pool]:
+        pools.append(pool := Pool())
+        yield pool
+        closed.append(pool)
+
+    @app.get("/")
+    def handler(pool: Pool) -> str:
+        return str(id(pool))
+
+    client = app.to_framework_app(__name__).test_client()
+    # Preforking servers create the framework app before forking the workers.
+    assert not pools
+
+    first = client.get("/").text
+    assert client.get("/").text == first
+    assert len(pools) == 1
+
+    app.shutdown()
+    assert len(closed) == 1
+    assert str(id(closed[0])) == first
+
+    # The app starts again on the next request.
+    assert client.get("/").text != first
+    assert len(pools) == 2
+    app.shutdown()
+
+
+async def test_singleton_before_startup() -> None:
+    """Requesting a singleton before startup is an error."""
+    app = App()
+
+    def make_pool() -> Pool:
+        return Pool()
+
+    app.singleton(make_pool)
+
+    with pytest.raises(Exception, match="before app startup"):
+        app._lifespan.singletons[0].get()
+
+    await app.startup()
+    assert isinstance(app._lifespan.singletons[0].get(), Pool)
+    await app.shutdown()
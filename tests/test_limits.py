@@ -0,0 +1,293 @@
+"""Tests for route concurrency limits and deadlines."""
+from asyncio import CancelledError, Event, create_task, gather, sleep
+from contextlib import suppress
+from typing import Any
+
+import pytest
+from httpx import ASGITransport, AsyncClient, ReadTimeout
+
+from uapi import ReqBytes, RouteName
+from uapi.aiohttp import AiohttpApp
+from uapi.starlette import App, StarletteApp, _ReceiveBuffer
+
+from .aiohttp import run_on_aiohttp
+from .starlette import run_on_starlette
+from .test_lifespan import get_when_up
+
+
+async def test_route_concurrency_limit() -> None:
+    """Requests over the route limit and queue are shed."""
+    app = App()
+    release = Event()
+
+    @app.get("/slow", max_concurrency=1, max_queue=1)
+    async def slow() -> str:
+        await release.wait()
+        return "slow"
+
+    @app.get("/fast")
+    async def fast() -> str:
+        return "fast"
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        first = create_task(client.get("/slow"))
+        second = create_task(client.get("/slow"))
+        await sleep(0.01)
+
+        limiter = app.concurrency_limiters[RouteName("slow")]
+        assert limiter.in_flight == 1
+        assert limiter.queued == 1
+
+        resp = await client.get("/slow")
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "1"
+        assert limiter.shed == 1
+
+        # Other routes are unaffected.
+        assert (await client.get("/fast")).text == "fast"
+
+        release.set()
+        assert [r.text for r in await gather(first, second)] == ["slow", "slow"]
+
+    assert limiter.in_flight == 0
+    assert limiter.queued == 0
+
+
+async def test_app_concurrency_limit() -> None:
+    """The app-wide limit applies across routes."""
+    app = App(max_concurrency=1)
+    release = Event()
+
+    @app.get("/slow")
+    async def slow() -> str:
+        await release.wait()
+        return "slow"
+
+    @app.get("/fast")
+    async def fast() -> str:
+        return "fast"
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        first = create_task(client.get("/slow"))
+        await sleep(0.01)
+
+        resp = await client.get("/fast")
+        assert resp.status_code == 503
+
+        release.set()
+        assert (await first).text == "slow"
+        assert (await client.get("/fast")).text == "fast"
+
+    assert app.app_concurrency_limiter is not None
+    assert app.app_concurrency_limiter.shed == 1
+
+
+async def test_queued_cancellation() -> None:
+    """Cancelled waiters give up their place in the queue."""
+    app = App()
+    release = Event()
+
+    @app.get("/slow", max_concurrency=1, max_queue=1)
+    async def slow() -> str:
+        await release.wait()
+        return "slow"
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        first = create_task(client.get("/slow"))
+        await sleep(0.01)
+        second = create_task(client.get("/slow"))
+        await sleep(0.01)
+        second.cancel()
+        await sleep(0.01)
+
+        limiter = app.concurrency_limiters[RouteName("slow")]
+        assert limiter.queued == 0
+
+        release.set()
+        assert (await first).text == "slow"
+        assert (await client.get("/slow")).text == "slow"
+
+    assert limiter.in_flight == 0
+
+
+def test_openapi_overload_response() -> None:
+    """Limited routes document the overload response."""
+    app = App()
+
+    @app.get("/limited", max_concurrency=10)
+    async def limited() -> str:
+        return ""
+
+    @app.get("/unlimited")
+    async def unlimited() -> str:
+        return ""
+
+    spec = app.make_openapi_spec()
+    limited_op = spec.paths["/limited"].get
+    unlimited_op = spec.paths["/unlimited"].get
+    assert limited_op is not None
+    assert unlimited_op is not None
+    assert "503" in limited_op.responses
+    assert "503" not in unlimited_op.responses
+
+
+async def test_route_timeout() -> None:
+    """Requests over the deadline are cancelled."""
+    app = App()
+    cancelled = Event()
+
+    @app.get("/slow", timeout=0.05)
+    async def slow() -> str:
+        try:
+            await sleep(5)
+        except CancelledError:
+            cancelled.set()
+            raise
+        return "slow"
+
+    @app.get("/fast", timeout=1)
+    async def fast() -> str:
+        return "fast"
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.get("/slow")
+        assert resp.status_code == 504
+        assert cancelled.is_set()
+
+        assert (await client.get("/fast")).text == "fast"
+
+    assert app.cancellations[RouteName("slow")].timeouts == 1
+    assert app.cancellations[RouteName("fast")].timeouts == 0
+
+
+@pytest.mark.parametrize("app_type", [AiohttpApp, StarletteApp])
+async def test_cancel_on_disconnect(
+    unused_tcp_port: int, app_type: type[AiohttpApp] | type[StarletteApp]
+) -> None:
+    """Requests are cancelled when clients disconnect."""
+    app = app_type(disconnect_poll_interval=0.01)
+    cancelled = Event()
+
+    @app.get("/", cancel_on_disconnect=True)
+    async def slow() -> str:
+        try:
+            await sleep(5)
+        except CancelledError:
+            cancelled.set()
+            raise
+        return "slow"
+
+    @app.get("/ping")
+    async def ping() -> str:
+        return "pong"
+
+    if isinstance(app, AiohttpApp):
+        t = create_task(run_on_aiohttp(app, unused_tcp_port))
+    else:
+        t = create_task(run_on_starlette(app, unused_tcp_port))
+    try:
+        async with AsyncClient() as client:
+            await get_when_up(client, f"http://localhost:{unused_tcp_port}/ping")
+            with pytest.raises(ReadTimeout):
+                await client.get(f"http://localhost:{unused_tcp_port}/", timeout=0.1)
+        for _ in range(100):
+            if cancelled.is_set():
+                break
+            await sleep(0.01)
+        assert cancelled.is_set()
+        assert app.cancellations[RouteName("slow")].disconnects == 1
+    finally:
+        t.cancel()
+        with suppress(CancelledError):
+            await t
+
+
+@pytest.mark.parametrize("app_type", [AiohttpApp, StarletteApp])
+async def test_cancel_on_disconnect_with_body(
+    unused_tcp_port: int, app_type: type[AiohttpApp] | type[StarletteApp]
+) -> None:
+    """Requests with unread bodies are cancelled on disconnects too.
+
+    Polling for disconnects doesn't lose the body.
+    """
+    app = app_type(disconnect_poll_interval=0.001)
+    cancelled = Event()
+
+    @app.post("/", cancel_on_disconnect=True)
+    async def slow() -> str:
+        try:
+            await sleep(5)
+        except CancelledError:
+            cancelled.set()
+            raise
+        return "slow"
+
+    @app.post("/echo", cancel_on_disconnect=True)
+    async def echo(body: ReqBytes) -> bytes:
+        await sleep(0.05)
+        return body
+
+    if isinstance(app, AiohttpApp):
+        t = create_task(run_on_aiohttp(app, unused_tcp_port))
+    else:
+        t = create_task(run_on_starlette(app, unused_tcp_port))
+    try:
+        async with AsyncClient() as client:
+            url = f"http://localhost:{unused_tcp_port}"
+            await get_when_up(client, url)
+            payload = b"x" * 100_000
+            assert (await client.post(f"{url}/echo", content=payload)).content == (
+                payload
+            )
+            with pytest.raises(ReadTimeout):
+                await client.post(url, content=b"body", timeout=0.1)
+        for _ in range(100):
+            if cancelled.is_set():
+                break
+            await sleep(0.01)
+        assert cancelled.is_set()
+        assert app.cancellations[RouteName("slow")].disconnects == 1
+    finally:
+        t.cancel()
+        with suppress(CancelledError):
+            await t
+
+
+async def test_receive_buffer() -> None:
+    """Polling for disconnects buffers body messages for the request."""
+    messages: list[dict[str, Any]] = [
+        {"type": "http.request", "body": b"a", "more_body": True},
+        {"type": "http.request", "body": b"b", "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop(0)
+
+    buffer = _ReceiveBuffer(receive)
+    assert not await buffer.poll()
+    assert not await buffer.poll()
+    assert await buffer() == {"type": "http.request", "body": b"a", "more_body": True}
+    assert await buffer.poll()
+    assert await buffer() == {"type": "http.request", "body": b"b", "more_body": False}
+
+
+def test_openapi_timeout_response() -> None:
+    """Routes with deadlines document the timeout response."""
+    app = App()
+
+    @app.get("/", timeout=1)
+    async def index() -> str:
+        return ""
+
+    op = app.make_openapi_spec().paths["/"].get
+    assert op is not None
+    assert "504" in op.responses
@@ -0,0 +1,164 @@
+"""Tests for per-route metrics."""
+from asyncio import Event, create_task, sleep
+from threading import Thread
+
+from httpx import ASGITransport, AsyncClient
+
+from uapi.flask import App as FlaskApp
+from uapi.metrics import Metrics
+from uapi.starlette import App
+from uapi.status import NotFound
+from uapi.types import Method, RouteName
+
+
+async def test_async_metrics() -> None:
+    """Requests are counted by route and status code."""
+    app = App()
+    release = Event()
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    @app.get("/missing")
+    async def missing() -> NotFound[None]:
+        return NotFound(None)
+
+    @app.get("/slow")
+    async def slow() -> str:
+        await release.wait()
+        return "slow"
+
+    @app.get("/error")
+    async def error() -> str:
+        raise Exception("error")
+
+    app.serve_metrics()
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app(), raise_app_exceptions=False),
+        base_url="http://test",
+    ) as client:
+        await client.get("/")
+        await client.get("/")
+        await client.get("/missing")
+        await client.get("/error")
+        slow_req = create_task(client.get("/slow"))
+        await sleep(0.01)
+
+        assert app.metrics is not None
+        collected = app.metrics.collect()
+        assert collected[(RouteName("index"), "GET")].responses == {200: 2}
+        assert collected[(RouteName("missing"), "GET")].responses == {404: 1}
+        assert collected[(RouteName("error"), "GET")].responses == {500: 1}
+        assert collected[(RouteName("slow"), "GET")].in_flight == 1
+
+        resp = await client.get("/metrics")
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = resp.text
+        assert 'uapi_requests_total{route="index",method="GET",status="200"} 2' in text
+        assert 'uapi_requests_in_flight{route="slow",method="GET"} 1' in text
+        assert (
+            'uapi_request_duration_seconds_bucket{route="index",method="GET",le="+Inf"} 2'
+            in text
+        )
+        assert (
+            'uapi_request_duration_seconds_count{route="index",method="GET"} 2' in text
+        )
+
+        release.set()
+        await slow_req
+
+    assert app.metrics.collect()[(RouteName("slow"), "GET")].in_flight == 0
+
+
+def test_sync_metrics() -> None:
+    """Sync apps collect metrics too."""
+    app = FlaskApp()
+
+    @app.get("/")
+    def index() -> str:
+        return "index"
+
+    app.serve_metrics("/m")
+
+    client = app.to_framework_app(__name__).test_client()
+    client.get("/")
+    resp = client.get("/m")
+
+    assert 'uapi_requests_total{route="index",method="GET",status="200"} 1' in resp.text
+
+
+def test_no_metrics() -> None:
+    """Metrics are opt-in."""
+    app = App()
+
+    @app.get("/")
+    async def index() -> str:
+        return "index"
+
+    app.to_framework_app()
+    assert app.metrics is None
+
+
+def test_histogram_buckets() -> None:
+    """Durations land in the right buckets, and threads merge."""
+    metrics = Metrics(buckets=(0.1, 1.0))
+    key: tuple[RouteName, Method] = (RouteName("r"), "GET")
+
+    def record(duration: float) -> None:
+        metrics.route_metrics(*key).observe(200, duration)
+
+    record(0.1)
+    record(0.5)
+    t = Thread(target=record, args=(5.0,))
+    t.start()
+    t.join()
+
+    merged = metrics.collect()[key]
+    assert merged.duration_counts == [1, 1, 1]
+    assert merged.requests == 3
+    assert merged.duration_sum == 5.6
+
+    text = metrics.render()
+    assert (
+        'uapi_request_duration_seconds_bucket{route="r",method="GET",le="0.1"} 1'
+        in text
+    )
+    assert (
+        'uapi_request_duration_seconds_bucket{route="r",method="GET",le="1.0"} 2'
+        in text
+    )
+    assert (
+        'uapi_request_duration_seconds_bucket{route="r",method="GET",le="+Inf"} 3'
+        in text
+    )
+
+
+def test_finished_threads() -> None:
+    """The shards of finished threads are folded together."""
+    metrics = Metrics(buckets=(0.1, 1.0))
+    key: tuple[RouteName, Method] = (RouteName("r"), "GET")
+
+    def record() -> None:
+        metrics.route_metrics(*key).observe(200, 0.5)
+
+    for i in range(1, 4):
+        for _ in range(10):
+            t = Thread(target=record)
+            t.start()
+            t.join()
+        assert metrics.collect()[key].requests == 10 * i
+        assert not metrics._shards._shards
+
+    record()
+    assert len(metrics._shards._shards) == 1
+    assert metrics.collect()[key].requests == 31
+
+
+def test_label_escaping() -> None:
+    """Label values are escaped."""
+    metrics = Metrics()
+    metrics.route_metrics(RouteName('a"b\\c'), "GET").observe(200, 0)
+
+    assert 'route="a\\"b\\\\c"' in metrics.render()
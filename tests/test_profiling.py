@@ -0,0 +1,109 @@
+"""Tests for memory profiling."""
+import tracemalloc
+
+from attrs import define
+from httpx import ASGITransport, AsyncClient
+
+from uapi import ReqBody
+from uapi.flask import App as FlaskApp
+from uapi.profiling import MemoryProfiler
+from uapi.starlette import App
+
+_cache: list[bytes] = []
+
+
+@define
+class Model:
+    a: list[int]
+
+
+async def test_async_profiling() -> None:
+    """Peak and retained memory is reported by route."""
+    app = App(memory_profiler=MemoryProfiler(sample_rate=1.0))
+
+    @app.post("/")
+    async def echo(model: ReqBody[Model]) -> Model:
+        return model
+
+    @app.get("/leak")
+    async def leak() -> None:
+        _cache.append(b"\x00" * 1_000_000)
+
+    app.serve_memory_profile()
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        for _ in range(2):
+            await client.post("/", json={"a": list(range(10_000))})
+        await client.get("/leak")
+
+        resp = await client.get("/memory")
+
+    assert not tracemalloc.is_tracing()
+    assert resp.headers["content-type"] == "application/json"
+    echo_report, leak_report = resp.json()
+    assert echo_report["name"] == "echo"
+    assert echo_report["method"] == "POST"
+    assert echo_report["samples"] == 2
+    # The body, its decoded and structured forms and the response.
+    assert echo_report["max_peak"] > 10_000 * 28
+    assert echo_report["max_retained"] < echo_report["max_peak"]
+
+    assert leak_report["name"] == "leak"
+    assert leak_report["samples"] == 1
+    assert leak_report["max_retained"] >= 1_000_000
+    _cache.clear()
+
+
+def test_sync_profiling() -> None:
+    """Sync apps support memory profiling, and sampling applies."""
+    app = FlaskApp(memory_profiler=MemoryProfiler(sample_rate=0.0))
+
+    @app.get("/")
+    def index() -> str:
+        return "index"
+
+    app.serve_memory_profile()
+    client = app.to_framework_app(__name__).test_client()
+    client.get("/")
+    assert client.get("/memory").json == []
+
+    assert app.memory_profiler is not None
+    app.memory_profiler.sample_rate = 1.0
+    client.get("/")
+    resp = client.get("/memory")
+    assert resp.json is not None
+    (report,) = resp.json
+    assert report["name"] == "index"
+    assert report["samples"] == 1
+
+
+def test_profiling_while_tracing() -> None:
+    """Profiling leaves the peak of another `tracemalloc` user alone."""
+    app = FlaskApp(memory_profiler=MemoryProfiler(sample_rate=1.0))
+
+    @app.get("/")
+    def leak() -> None:
+        _cache.append(b"\x00" * 1_000_000)
+
+    client = app.to_framework_app(__name__).test_client()
+    tracemalloc.start()
+    try:
+        temporary = b"\x00" * 10_000_000
+        del temporary
+        _, peak = tracemalloc.get_traced_memory()
+
+        client.get("/")
+
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_traced_memory()[1] >= peak
+    finally:
+        tracemalloc.stop()
+        _cache.clear()
+
+    assert app.memory_profiler is not None
+    (report,) = app.memory_profiler.report()
+    assert report["samples"] == 1
+    assert report["max_retained"] >= 1_000_000
+    assert report["max_peak"] == 0
@@ -0,0 +1,158 @@
+"""Tests for the slow request log."""
+import os
+from asyncio import sleep as async_sleep
+from logging import LogRecord
+from threading import get_ident
+from time import perf_counter, sleep
+
+import pytest
+from attrs import define
+from httpx import ASGITransport, AsyncClient
+
+from uapi import ReqBody, RouteName
+from uapi.flask import App as FlaskApp
+from uapi.slowlog import SlowRequestLog, _InFlight, sanitize_parameters
+from uapi.starlette import App
+
+
+@define
+class Model:
+    a: int
+
+
+def wait_for_records(caplog: pytest.LogCaptureFixture, count: int) -> list[LogRecord]:
+    """The records are logged by the watchdog thread, so wait for them."""
+    for _ in range(200):
+        if (
+            len(records := [r for r in caplog.records if r.name == "uapi.slow"])
+            >= count
+        ):
+            return records
+        sleep(0.01)
+    return records
+
+
+async def test_slow_requests(caplog: pytest.LogCaptureFixture) -> None:
+    """Slow requests are logged with phases, parameters and a stack sample."""
+    app = App(slow_request_log=SlowRequestLog(0.05, thresholds={"fast": None}))
+
+    @app.post("/")
+    async def slow(model: ReqBody[Model], api_key: str) -> Model:
+        await async_sleep(0.2)
+        return model
+
+    @app.get("/fast")
+    async def fast() -> None:
+        await async_sleep(0.1)
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.post("/?api_key=hunter2", json={"a": 1})
+        assert resp.json() == {"a": 1}
+        await client.get("/fast")
+
+    (record,) = wait_for_records(caplog, 1)
+    assert record.route_name == "slow"  # type: ignore
+    assert record.duration >= 0.2  # type: ignore
+    assert set(record.phases) == {  # type: ignore
+        "parse",
+        "structure",
+        "handler",
+        "unstructure",
+        "serialize",
+    }
+    assert record.phases["handler"] >= 0.2  # type: ignore
+    assert record.parameters == {  # type: ignore
+        "model": "Model(a=1)",
+        "api_key": "<redacted>",
+    }
+    message = record.getMessage()
+    assert message.startswith("Slow request to slow (POST)")
+    assert "api_key=<redacted>" in message
+    assert "Stack sample, captured after" in message
+    assert "async_sleep(0.2)" in message
+
+
+def test_sync_slow_requests(caplog: pytest.LogCaptureFixture) -> None:
+    """Sync apps support the slow request log."""
+    app = FlaskApp(slow_request_log=SlowRequestLog(0.05))
+
+    @app.get("/")
+    def index(q: int) -> str:
+        sleep(0.2)
+        return "index"
+
+    client = app.to_framework_app(__name__).test_client()
+    assert client.get("/?q=1").text == "index"
+
+    (record,) = wait_for_records(caplog, 1)
+    assert record.parameters == {"q": "1"}  # type: ignore
+    assert "sleep(0.2)" in record.getMessage()
+
+
+def test_rate_limit(caplog: pytest.LogCaptureFixture) -> None:
+    """Slow requests over the rate limit are counted and reported later."""
+    log = SlowRequestLog(0.0, rate=0.0, burst=2)
+    app = FlaskApp(slow_request_log=log)
+
+    @app.get("/")
+    def index() -> str:
+        sleep(0.01)
+        return "index"
+
+    client = app.to_framework_app(__name__).test_client()
+    for _ in range(5):
+        client.get("/")
+
+    assert len(wait_for_records(caplog, 2)) == 2
+    for _ in range(100):
+        if log.dropped == 3:
+            break
+        sleep(0.01)
+    assert log.dropped == 3
+
+
+async def test_slow_requests_with_deadlines(caplog: pytest.LogCaptureFixture) -> None:
+    """With deadlines, handlers run in child tasks, which get sampled."""
+    app = App(slow_request_log=SlowRequestLog(0.05), timeout=5)
+
+    @app.get("/")
+    async def slow() -> str:
+        await async_sleep(0.2)
+        return "slow"
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        assert (await client.get("/")).text == "slow"
+
+    (record,) = wait_for_records(caplog, 1)
+    assert "async_sleep(0.2)" in record.getMessage()
+
+
+def test_sanitize_parameters() -> None:
+    """Sensitive parameters are matched by whole words."""
+    names = ("password", "api_key", "auth_token", "Session", "monkey", "author")
+    assert sanitize_parameters(names, (1, 2, 3, 4, 5, 6), {"keyword": 7}) == {
+        "password": "<redacted>",
+        "api_key": "<redacted>",
+        "auth_token": "<redacted>",
+        "Session": "<redacted>",
+        "monkey": "5",
+        "author": "6",
+        "keyword": "7",
+    }
+
+
+def test_fork_resets_watchdogs() -> None:
+    """Forked processes start their own watchdog threads."""
+    log = SlowRequestLog(60)
+    request = _InFlight(RouteName("r"), "GET", perf_counter(), 60, get_ident(), None)
+    log._start(request)
+    log._finish(request)
+    assert log._watchdog is not None
+
+    if (pid := os.fork()) == 0:
+        os._exit(0 if log._watchdog is None else 1)
+    assert os.waitpid(pid, 0)[1] == 0
@@ -0,0 +1,117 @@
+"""Tests for sampled phase timing."""
+from typing import Any
+
+import pytest
+from attrs import define
+from httpx import ASGITransport, AsyncClient
+
+from uapi import ReqBody, requests, timing
+from uapi.flask import App as FlaskApp
+from uapi.starlette import App
+from uapi.timing import PhaseTiming
+from uapi.types import RouteName
+
+
+@define
+class Model:
+    a: int
+
+
+async def test_phase_timing() -> None:
+    """Every phase of sampled requests is timed."""
+    app = App(phase_timing=PhaseTiming(sample_rate=1.0, server_timing=True))
+
+    @app.post("/")
+    async def echo(model: ReqBody[Model]) -> Model:
+        return model
+
+    app.serve_metrics()
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.post("/", json={"a": 1})
+        assert resp.json() == {"a": 1}
+
+        phases = [p.split(";")[0] for p in resp.headers["server-timing"].split(", ")]
+        assert set(phases) == {
+            "parse",
+            "structure",
+            "handler",
+            "unstructure",
+            "serialize",
+            "total",
+        }
+
+        assert app.phase_timing is not None
+        route_phases = app.phase_timing.collect()[(RouteName("echo"), "POST")]
+        assert route_phases.samples == 1
+        assert route_phases.means()["total"] >= route_phases.means()["handler"]
+
+        metrics = (await client.get("/metrics")).text
+        assert (
+            'uapi_request_phase_seconds_count{route="echo",method="POST",phase="parse"} 1'
+            in metrics
+        )
+
+
+async def test_unsampled() -> None:
+    """Requests outside the sample are not timed."""
+    app = App(phase_timing=PhaseTiming(sample_rate=0.0, server_timing=True))
+
+    @app.post("/")
+    async def echo(model: ReqBody[Model]) -> Model:
+        return model
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.post("/", json={"a": 1})
+
+    assert resp.json() == {"a": 1}
+    assert "server-timing" not in resp.headers
+    assert app.phase_timing is not None
+    assert app.phase_timing.collect() == {}
+
+
+async def test_untimed_bodies(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Bodies are structured directly until a phase recorder is pushed."""
+    monkeypatch.setattr(timing, "_recorder_pushed", False)
+    calls = []
+
+    def counting_load_and_structure(*args: Any) -> Any:
+        calls.append(args)
+        return load_and_structure(*args)
+
+    load_and_structure = requests.load_and_structure
+    monkeypatch.setattr(requests, "load_and_structure", counting_load_and_structure)
+    app = App()
+
+    @app.post("/")
+    async def echo(model: ReqBody[Model]) -> Model:
+        return model
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        assert (await client.post("/", json={"a": 1})).json() == {"a": 1}
+        assert calls == []
+
+        timing.pop_phase_recorder(timing.push_phase_recorder(lambda *_: None))
+        assert (await client.post("/", json={"a": 2})).json() == {"a": 2}
+        assert len(calls) == 1
+
+
+def test_sync_phase_timing() -> None:
+    """Sync apps support phase timing."""
+    app = FlaskApp(phase_timing=PhaseTiming(sample_rate=1.0, server_timing=True))
+
+    @app.post("/")
+    def echo(model: ReqBody[Model]) -> Model:
+        return model
+
+    client = app.to_framework_app(__name__).test_client()
+    resp = client.post("/", json={"a": 1})
+
+    assert resp.json == {"a": 1}
+    assert "handler;dur=" in resp.headers["server-timing"]
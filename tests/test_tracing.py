@@ -0,0 +1,149 @@
+"""Tests for request tracing."""
+import pytest
+from attrs import define
+from httpx import ASGITransport, AsyncClient
+from incant import Incanter
+
+from uapi import ReqBody, base
+from uapi.flask import App as FlaskApp
+from uapi.starlette import App
+from uapi.tracing import (
+    InMemorySpanExporter,
+    Tracer,
+    current_traceparent,
+    traced_incanter,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@define
+class Model:
+    a: int
+
+
+def make_app(exporter: InMemorySpanExporter, sample_rate: float = 1.0) -> App:
+    app = App(tracer=Tracer(exporter, sample_rate))
+
+    async def user_id() -> int:
+        return 1
+
+    app.incant.register_by_name(user_id)
+
+    @app.post("/")
+    async def echo(model: ReqBody[Model], user_id: int) -> Model:
+        return model
+
+    @app.get("/traceparent")
+    async def traceparent() -> str:
+        return current_traceparent() or ""
+
+    return app
+
+
+async def test_spans() -> None:
+    """Requests get a span, with children for dependencies and phases."""
+    exporter = InMemorySpanExporter()
+    app = make_app(exporter)
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.post("/", json={"a": 1})
+    assert resp.json() == {"a": 1}
+
+    *children, root = exporter.spans
+    assert root.name == "echo"
+    assert root.kind == "server"
+    assert root.parent_span_id is None
+    assert root.attributes == {
+        "http.request.method": "POST",
+        "http.route": "/",
+        "http.response.status_code": 200,
+    }
+    assert root.status == "unset"
+
+    assert {c.name.rsplit(".", 1)[-1] for c in children} == {
+        "user_id",
+        "parse",
+        "structure",
+        "handler",
+        "unstructure",
+        "serialize",
+    }
+    for child in children:
+        assert child.trace_id == root.trace_id
+        assert child.parent_span_id == root.span_id
+        assert root.start_time <= child.start_time <= child.end_time <= root.end_time
+
+
+async def test_traceparent_propagation() -> None:
+    """Traces are continued from the `traceparent` header."""
+    exporter = InMemorySpanExporter()
+    app = make_app(exporter, sample_rate=0.0)
+
+    async with AsyncClient(
+        transport=ASGITransport(app.to_framework_app()), base_url="http://test"
+    ) as client:
+        resp = await client.get(
+            "/traceparent", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+        )
+        root = exporter.spans[-1]
+        assert root.trace_id == TRACE_ID
+        assert root.parent_span_id == PARENT_ID
+        assert resp.text == f"00-{TRACE_ID}-{root.span_id}-01"
+
+        # Unsampled parents are respected.
+        exporter.clear()
+        await client.get(
+            "/traceparent", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+        )
+        assert exporter.spans == []
+
+        # Without a parent, the sample rate applies.
+        resp = await client.get("/traceparent")
+        assert resp.text == ""
+        assert exporter.spans == []
+
+        # Invalid headers are ignored.
+        await client.get("/traceparent", headers={"traceparent": f"00-{TRACE_ID}"})
+        assert exporter.spans == []
+
+
+def test_sync_tracing() -> None:
+    """Sync apps support tracing."""
+    exporter = InMemorySpanExporter()
+    app = FlaskApp(tracer=Tracer(exporter))
+
+    @app.get("/")
+    def index() -> str:
+        raise Exception("error")
+
+    client = app.to_framework_app(__name__).test_client()
+    client.get("/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    root = exporter.spans[-1]
+    assert root.trace_id == TRACE_ID
+    assert root.status == "error"
+    assert root.attributes["error.type"] == "Exception"
+
+
+def test_traced_incanter_built_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The traced incanter is shared by all routes of an app."""
+    built = []
+
+    def counting_traced_incanter(incanter: Incanter) -> Incanter:
+        built.append(res := traced_incanter(incanter))
+        return res
+
+    monkeypatch.setattr(base, "traced_incanter", counting_traced_incanter)
+    app = make_app(InMemorySpanExporter())
+    app.to_framework_app()
+    assert len(app._route_map) > 1
+    assert len(built) == 1
+
+    # Registering hooks afterwards rebuilds it.
+    app.incant.register_by_name(lambda: 2, name="other")
+    app.to_framework_app()
+    assert len(built) == 2
@@ -0,0 +1,109 @@
+"""Tests for multi-process serving."""
+import os
+from asyncio import (
+    CancelledError,
+    StreamReader,
+    StreamWriter,
+    create_task,
+    open_connection,
+    sleep,
+    start_server,
+)
+from contextlib import suppress
+from signal import SIGKILL
+from socket import IPPROTO_TCP, TCP_NODELAY
+
+import pytest
+from httpx import AsyncClient
+
+from uapi._workers import bind_socket
+from uapi.aiohttp import AiohttpApp
+from uapi.starlette import StarletteApp
+
+from .test_lifespan import get_when_up
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("app_type", [AiohttpApp, StarletteApp])
+@pytest.mark.parametrize("reuse_port", [False, True])
+async def test_workers(
+    unused_tcp_port: int,
+    app_type: type[AiohttpApp] | type[StarletteApp],
+    reuse_port: bool,
+) -> None:
+    """Workers serve requests, are restarted on crashes and shut down."""
+    app = app_type()
+
+    @app.get("/")
+    async def index() -> str:
+        return str(os.getpid())
+
+    if isinstance(app, AiohttpApp):
+        t = create_task(
+            app.run(
+                unused_tcp_port,
+                handle_signals=False,
+                shutdown_timeout=0.0,
+                access_log=None,
+                workers=2,
+                reuse_port=reuse_port,
+            )
+        )
+    else:
+        t = create_task(
+            app.run(
+                port=unused_tcp_port,
+                handle_signals=False,
+                workers=2,
+                reuse_port=reuse_port,
+            )
+        )
+    url = f"http://localhost:{unused_tcp_port}/"
+    # Every request needs a fresh connection, to reach different workers.
+    close = {"connection": "close"}
+    try:
+        async with AsyncClient() as client:
+            pid = int((await get_when_up(client, url)).text)
+            assert pid != os.getpid()
+
+            os.kill(pid, SIGKILL)
+            pids = set()
+            for _ in range(100):
+                with suppress(Exception):
+                    pids.add(int((await client.get(url, headers=close)).text))
+                if len(pids - {pid}) == 2:
+                    break
+                await sleep(0.05)
+            assert len(pids - {pid}) == 2
+    finally:
+        t.cancel()
+        with suppress(CancelledError):
+            await t
+
+    assert not any(pid_alive(p) for p in pids)
+
+
+async def test_bound_sockets_nodelay() -> None:
+    """Connections accepted on bound sockets have Nagle's algorithm disabled."""
+    sock = bind_socket("127.0.0.1", 0)
+    nodelay = []
+
+    async def on_connect(_: StreamReader, writer: StreamWriter) -> None:
+        nodelay.append(
+            writer.get_extra_info("socket").getsockopt(IPPROTO_TCP, TCP_NODELAY)
+        )
+        writer.close()
+
+    async with await start_server(on_connect, sock=sock):
+        reader, writer = await open_connection(*sock.getsockname())
+        await reader.read()
+        writer.close()
+
+    assert nodelay == [1]
@@ -0,0 +1,102 @@
+"""Tests for serving sync apps using `run()`."""
+import os
+import sys
+from asyncio import gather, sleep
+from contextlib import suppress
+from pathlib import Path
+from signal import SIGHUP, SIGTERM
+from subprocess import Popen
+from time import monotonic
+
+import pytest
+from httpx import AsyncClient
+
+from .test_lifespan import get_when_up
+
+# Every request needs a fresh connection, to reach different workers.
+close = {"connection": "close"}
+
+
+def start_server(kind: str, port: int, workers: int, shutdown_log: Path) -> Popen:
+    args = [
+        sys.executable,
+        "-m",
+        "tests.wsgi_servers",
+        kind,
+        str(port),
+        str(workers),
+        str(shutdown_log),
+    ]
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(sys.path)}
+    return Popen(args, cwd=Path(__file__).parent.parent, env=env)  # noqa: S603
+
+
+async def collect_pids(client: AsyncClient, url: str, count: int) -> set[int]:
+    pids: set[int] = set()
+    for _ in range(200):
+        with suppress(Exception):
+            pids.add(int((await client.get(url, headers=close)).text))
+        if len(pids) == count:
+            break
+        await sleep(0.05)
+    return pids
+
+
+@pytest.mark.parametrize("kind", ["flask", "django"])
+async def test_threaded(kind: str, unused_tcp_port: int, tmp_path: Path) -> None:
+    """A single process serves requests concurrently, and shuts down cleanly."""
+    shutdown_log = tmp_path / "shutdown.log"
+    proc = start_server(kind, unused_tcp_port, 1, shutdown_log)
+    url = f"http://localhost:{unused_tcp_port}"
+    try:
+        async with AsyncClient() as client:
+            resp = await get_when_up(client, url)
+            assert int(resp.text) == proc.pid
+
+            start = monotonic()
+            resps = await gather(
+                client.get(f"{url}/slow", headers=close),
+                client.get(f"{url}/slow", headers=close),
+            )
+            assert [r.text for r in resps] == ["slow", "slow"]
+            assert monotonic() - start < 0.9
+    finally:
+        proc.send_signal(SIGTERM)
+        assert proc.wait(10) == 0
+
+    assert shutdown_log.read_text() == f"{proc.pid}\n"
+
+
+@pytest.mark.parametrize("kind", ["flask", "django"])
+async def test_workers(kind: str, unused_tcp_port: int, tmp_path: Path) -> None:
+    """Workers are replaced on SIGHUP, and shut down with the supervisor."""
+    shutdown_log = tmp_path / "shutdown.log"
+    proc = start_server(kind, unused_tcp_port, 2, shutdown_log)
+    url = f"http://localhost:{unused_tcp_port}"
+    try:
+        async with AsyncClient() as client:
+            await get_when_up(client, url)
+            pids = await collect_pids(client, url, 2)
+            assert len(pids) == 2
+            assert proc.pid not in pids
+
+            proc.send_signal(SIGHUP)
+            for _ in range(100):
+                if (
+                    len(
+                        shutdown_log.read_text().split()
+                        if shutdown_log.exists()
+                        else []
+                    )
+                    == 2
+                ):
+                    break
+                await sleep(0.05)
+            new_pids = await collect_pids(client, url, 2)
+            assert len(new_pids) == 2
+            assert not pids & new_pids
+    finally:
+        proc.send_signal(SIGTERM)
+        assert proc.wait(10) == 0
+
+    assert {int(p) for p in shutdown_log.read_text().split()} == pids | new_pids
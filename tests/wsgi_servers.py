@@ -0,0 +1,38 @@
+"""Sync apps served by `run()`, in subprocesses of the WSGI server tests.
+
+Usage: python -m tests.wsgi_servers (flask|django) <port> <workers> <shutdown-log>
+"""
+import os
+import sys
+from time import sleep
+
+from uapi.django import DjangoApp
+from uapi.flask import FlaskApp
+
+
+def configure(app: FlaskApp | DjangoApp, shutdown_log: str) -> None:
+    @app.get("/")
+    def index() -> str:
+        return str(os.getpid())
+
+    @app.get("/slow")
+    def slow() -> str:
+        sleep(0.5)
+        return "slow"
+
+    @app.on_shutdown
+    def log_shutdown() -> None:
+        with open(shutdown_log, "a") as f:
+            f.write(f"{os.getpid()}\n")
+
+
+if __name__ == "__main__":
+    kind, port, workers, shutdown_log = sys.argv[1:]
+    if kind == "flask":
+        flask_app: FlaskApp = FlaskApp()
+        configure(flask_app, shutdown_log)
+        flask_app.run(__name__, port=int(port), threads=4, workers=int(workers))
+    else:
+        django_app: DjangoApp = DjangoApp()
+        configure(django_app, shutdown_log)
+        django_app.run(port=int(port), threads=4, workers=int(workers))